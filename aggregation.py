@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Classement de groupe à partir des classements individuels `ListeATrier.<utilisateur>.csv`.
+
+Méthodes disponibles :
+- "weighted" : moyenne des mu pondérée par 1/sigma² (la précision de chaque utilisateur)
+- "borda"    : agrégation de rangs façon Borda (points normalisés par taille du classement)
+
+Les classements sont chargés dans des matrices utilisateurs × films ; chaque fichier parsé est
+mis en cache selon sa date de modification, seul un fichier modifié est relu.
+"""
+
+import argparse
+import csv
+import glob
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+METHODS = ("weighted", "borda")
+DEFAULT_METHOD = "weighted"
+GROUP_OUTPUT_FILE = "ClassementGroupe.csv"
+
+
+class UserRanking:
+    """Classement parsé d'un utilisateur (tableaux alignés par film)."""
+
+    __slots__ = ("user_name", "path", "descriptions", "genres", "categories", "mu", "sigma")
+
+    def __init__(self, user_name: str, path: str):
+        self.user_name = user_name
+        self.path = path
+        self.descriptions: List[str] = []
+        self.genres: List[str] = []
+        self.categories: List[str] = []
+        self.mu = np.empty(0)
+        self.sigma = np.empty(0)
+
+
+# {chemin: (mtime_ns, classement parsé)}
+_cache: Dict[str, Tuple[int, UserRanking]] = {}
+
+
+def user_from_path(path: str) -> str:
+    """Extrait le nom d'utilisateur d'un chemin `ListeATrier.<utilisateur>.csv`."""
+    return os.path.basename(path)[len("ListeATrier.") : -len(".csv")]
+
+
+def parse_ranking_csv(path: str) -> UserRanking:
+    """Lit un classement individuel au format produit par `save_final_ranking`."""
+    ranking = UserRanking(user_from_path(path), path)
+    mus, sigmas = [], []
+
+    with open(path, "r", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=";")
+        for row in reader:
+            if row and row[0] == "Rang":
+                break
+        for row in reader:
+            if len(row) >= 7 and row[0].isdigit():
+                try:
+                    mu, sigma = float(row[4]), float(row[5])
+                except ValueError:
+                    continue
+                ranking.descriptions.append(row[1])
+                ranking.genres.append(row[2])
+                ranking.categories.append(row[3])
+                mus.append(mu)
+                sigmas.append(sigma)
+
+    ranking.mu = np.array(mus, dtype=np.float64)
+    ranking.sigma = np.array(sigmas, dtype=np.float64)
+    return ranking
+
+
+def load_user_rankings(directory: str = ".") -> List[UserRanking]:
+    """Charge tous les classements individuels du dossier, en réutilisant le cache si le fichier n'a pas changé."""
+    rankings = []
+    paths = sorted(glob.glob(os.path.join(directory, "ListeATrier.*.csv")))
+
+    for path in paths:
+        if not user_from_path(path):
+            continue
+        mtime = os.stat(path).st_mtime_ns
+        cached = _cache.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, parse_ranking_csv(path))
+            _cache[path] = cached
+        rankings.append(cached[1])
+
+    # Oublier les fichiers supprimés
+    for path in set(_cache) - set(paths):
+        del _cache[path]
+
+    return rankings
+
+
+class GroupMatrix:
+    """Ratings de tous les utilisateurs alignés dans des matrices utilisateurs × films (NaN = film non classé)."""
+
+    def __init__(self, rankings: List[UserRanking]):
+        self.users = [ranking.user_name for ranking in rankings]
+        self.descriptions: List[str] = []
+        self.genres: List[str] = []
+        self.categories: List[str] = []
+        positions: Dict[str, int] = {}
+
+        columns = []
+        for ranking in rankings:
+            cols = np.empty(len(ranking.descriptions), dtype=np.int64)
+            for i, description in enumerate(ranking.descriptions):
+                pos = positions.get(description)
+                if pos is None:
+                    pos = positions[description] = len(self.descriptions)
+                    self.descriptions.append(description)
+                    self.genres.append(ranking.genres[i])
+                    self.categories.append(ranking.categories[i])
+                cols[i] = pos
+            columns.append(cols)
+
+        self.mu = np.full((len(rankings), len(self.descriptions)), np.nan)
+        self.sigma = np.full_like(self.mu, np.nan)
+        for row, (ranking, cols) in enumerate(zip(rankings, columns)):
+            self.mu[row, cols] = ranking.mu
+            self.sigma[row, cols] = ranking.sigma
+
+
+def weighted_scores(matrix: GroupMatrix) -> Tuple[np.ndarray, np.ndarray]:
+    """Moyenne des mu pondérée par la précision 1/sigma² ; retourne (mu, sigma) de groupe."""
+    rated = ~np.isnan(matrix.mu)
+    weights = np.where(rated, 1.0 / np.maximum(np.where(rated, matrix.sigma, 1.0), 1e-6) ** 2, 0.0)
+    total = weights.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = np.where(total > 0, (weights * np.nan_to_num(matrix.mu)).sum(axis=0) / total, np.nan)
+        sigma = np.where(total > 0, np.sqrt(1.0 / total), np.nan)
+    return mu, sigma
+
+
+def borda_scores(matrix: GroupMatrix) -> np.ndarray:
+    """Score de Borda moyen : 1 pour le premier film d'un utilisateur, 0 pour son dernier."""
+    rated = ~np.isnan(matrix.mu)
+    n_users, n_films = matrix.mu.shape
+    order = np.argsort(np.where(rated, -matrix.mu, np.inf), axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    ranks[np.arange(n_users)[:, None], order] = np.arange(n_films)
+
+    counts = rated.sum(axis=1, keepdims=True)
+    points = np.where(rated, 1.0 - ranks / np.maximum(counts - 1, 1), np.nan)
+    # Chaque film de la matrice est classé par au moins un utilisateur
+    return np.nanmean(points, axis=0)
+
+
+def aggregate(directory: str = ".", method: str = DEFAULT_METHOD, top: Optional[int] = None) -> List[Dict]:
+    """Calcule le classement de groupe à partir de tous les fichiers utilisateur du dossier."""
+    if method not in METHODS:
+        raise ValueError(f"Méthode d'agrégation inconnue: {method} (disponibles: {', '.join(METHODS)})")
+
+    matrix = GroupMatrix(load_user_rankings(directory))
+    if method == "weighted":
+        scores, sigmas = weighted_scores(matrix)
+    else:
+        scores, sigmas = borda_scores(matrix), None
+
+    voters = (~np.isnan(matrix.mu)).sum(axis=0)
+    order = np.argsort(-scores, kind="stable")
+    if top is not None:
+        order = order[:top]
+
+    results = []
+    for rank, pos in enumerate(order, 1):
+        results.append(
+            {
+                "rank": rank,
+                "description": matrix.descriptions[pos],
+                "genre": matrix.genres[pos],
+                "category": matrix.categories[pos],
+                "score": round(float(scores[pos]), 4),
+                "score_sigma": round(float(sigmas[pos]), 4) if sigmas is not None else None,
+                "voters": int(voters[pos]),
+            }
+        )
+    return results
+
+
+def save_group_ranking(results: List[Dict], users: List[str], method: str, output_file: str) -> None:
+    """Sauvegarde le classement de groupe au format CSV (même style que les classements individuels)."""
+    with open(output_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow([f"# Classement de groupe ({method})"])
+        writer.writerow([f"# Généré le: {datetime.now().strftime('%d/%m/%Y à %H:%M')}"])
+        writer.writerow([f"# Utilisateurs: {', '.join(users)}"])
+        writer.writerow([])
+        writer.writerow(["Rang", "Description", "Genre", "Catégorie", "Score", "Score_Sigma", "Votants"])
+        for film in results:
+            sigma = film["score_sigma"]
+            writer.writerow(
+                [
+                    film["rank"],
+                    film["description"],
+                    film["genre"],
+                    film["category"],
+                    f"{film['score']:.4f}",
+                    f"{sigma:.4f}" if sigma is not None else "",
+                    film["voters"],
+                ]
+            )
+
+
+def run_aggregation(
+    directory: str = ".", method: str = DEFAULT_METHOD, top: Optional[int] = None, output: str = GROUP_OUTPUT_FILE
+) -> None:
+    """Calcule, affiche et sauvegarde le classement de groupe (ligne de commande)."""
+    results = aggregate(directory, method, top)
+    users = [ranking.user_name for ranking in load_user_rankings(directory)]
+    print(f"👥 Classement de groupe ({method}) - {len(users)} utilisateurs: {', '.join(users)}")
+    for film in results:
+        print(f"{film['rank']:>4}. [{film['score']:.2f}] {film['description']}")
+    save_group_ranking(results, users, method, output)
+    print(f"✓ Classement de groupe sauvegardé dans {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classement de groupe à partir des fichiers ListeATrier.<utilisateur>.csv")
+    parser.add_argument("--method", choices=METHODS, default=DEFAULT_METHOD, help="Méthode d'agrégation")
+    parser.add_argument("--top", type=int, default=None, help="N'afficher que les N premiers films")
+    parser.add_argument("--directory", default=".", help="Dossier contenant les classements individuels")
+    parser.add_argument("--output", default=GROUP_OUTPUT_FILE, help="Fichier CSV de sortie (défaut: %(default)s)")
+    args = parser.parse_args()
+
+    run_aggregation(args.directory, args.method, args.top, args.output)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Mode de service ASGI (Starlette) : mêmes routes que `app.py`, pour servir avec plusieurs workers.
+
+    uvicorn asgi_app:app --workers 4
+
+Les handlers de `ranking_service.py` tournent dans le pool de threads de Starlette, la boucle
+d'événements reste libre pendant les calculs. Journaux et CSV sont écrits par le thread
+d'écriture en arrière-plan ; l'état des utilisateurs est partagé entre workers via SQLite
+(`RANKING_STATE_DB`, défaut `ranking_state.db`), enregistré à chaque réponse.
+"""
+
+import os
+
+# Valeurs par défaut du mode multi-workers, à fixer avant le chargement de la couche de service
+os.environ.setdefault("RANKING_STATE_BATCH", "1")
+os.environ.setdefault("RANKING_BACKGROUND_LOG", "1")
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from starlette.templating import Jinja2Templates
+
+from ranking_service import (
+    Stream,
+    call_handler,
+    handle_compare,
+    handle_compare_next,
+    handle_facets,
+    handle_finish,
+    handle_get_pair,
+    handle_group_ranking,
+    handle_metrics,
+    handle_results,
+    handle_snapshot_diff,
+    handle_snapshots,
+    handle_start,
+    handle_watch_list,
+    handle_watch_mark,
+    handle_watch_next,
+)
+
+SECRET_KEY = os.environ.get("RANKING_SECRET_KEY", "flims_ranking_secret_key_2024")
+
+templates = Jinja2Templates(directory="templates")
+# Le gabarit est partagé avec Flask, qui appelle url_for('static', filename=...)
+templates.env.globals["url_for"] = lambda endpoint, filename: f"/static/{filename}"
+
+
+async def respond(request: Request, handler, *args) -> Response:
+    """Exécute un handler de service hors de la boucle d'événements (mesuré par route) et convertit son résultat."""
+    body, status = await run_in_threadpool(call_handler, request.url.path, handler, *args)
+    if isinstance(body, Stream):
+        return StreamingResponse(body.chunks, media_type=body.mimetype, headers=body.headers)
+    return JSONResponse(body, status_code=status)
+
+
+async def index(request: Request) -> Response:
+    return templates.TemplateResponse(request, "index.html")
+
+
+async def start_session(request: Request) -> Response:
+    return await respond(request, handle_start, request.session, await request.json())
+
+
+async def get_pair(request: Request) -> Response:
+    return await respond(request, handle_get_pair, request.session)
+
+
+async def compare(request: Request) -> Response:
+    return await respond(request, handle_compare, request.session, await request.json())
+
+
+async def compare_next(request: Request) -> Response:
+    return await respond(request, handle_compare_next, request.session, await request.json())
+
+
+async def finish(request: Request) -> Response:
+    return await respond(request, handle_finish, request.session, request.query_params)
+
+
+async def results(request: Request) -> Response:
+    return await respond(request, handle_results, request.session, request.query_params)
+
+
+async def metrics(request: Request) -> Response:
+    return await respond(request, handle_metrics)
+
+
+async def facets(request: Request) -> Response:
+    return await respond(request, handle_facets)
+
+
+async def group_ranking(request: Request) -> Response:
+    return await respond(request, handle_group_ranking, request.query_params)
+
+
+async def watch_next(request: Request) -> Response:
+    return await respond(request, handle_watch_next, request.query_params)
+
+
+async def watch_mark(request: Request) -> Response:
+    return await respond(request, handle_watch_mark, await request.json())
+
+
+async def watch_list(request: Request) -> Response:
+    return await respond(request, handle_watch_list)
+
+
+async def snapshots(request: Request) -> Response:
+    return await respond(request, handle_snapshots, request.session, request.query_params)
+
+
+async def snapshot_diff(request: Request) -> Response:
+    return await respond(request, handle_snapshot_diff, request.session, request.query_params)
+
+
+app = Starlette(
+    routes=[
+        Route("/", index),
+        Route("/start", start_session, methods=["POST"]),
+        Route("/get_pair", get_pair),
+        Route("/compare", compare, methods=["POST"]),
+        Route("/compare_next", compare_next, methods=["POST"]),
+        Route("/finish", finish),
+        Route("/results", results),
+        Route("/metrics", metrics),
+        Route("/facets", facets),
+        Route("/group_ranking", group_ranking),
+        Route("/watch/next", watch_next),
+        Route("/watch/mark", watch_mark, methods=["POST"]),
+        Route("/watch/list", watch_list),
+        Route("/snapshots", snapshots),
+        Route("/snapshots/diff", snapshot_diff),
+        Mount("/static", StaticFiles(directory="static"), name="static"),
+    ],
+    middleware=[Middleware(SessionMiddleware, secret_key=SECRET_KEY)],
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("asgi_app:app", host="0.0.0.0", port=8000, workers=int(os.environ.get("RANKING_WORKERS", "4")))
@@ -0,0 +1,86 @@
+"""
+Écritures disque hors du chemin des requêtes.
+
+Un thread unique exécute les tâches soumises dans l'ordre d'arrivée. Les tâches `submit` sont
+indexées par clé (typiquement le fichier cible) : une nouvelle tâche remplace celle de même clé
+qui n'a pas encore démarré, seul le dernier état est donc écrit. Les tâches `enqueue` (ajouts à
+un journal) ne sont jamais fusionnées. Les tâches restantes sont exécutées à l'arrêt du processus.
+"""
+
+import atexit
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+
+class BackgroundWriter:
+    """File de tâches d'écriture exécutées par un thread dédié, fusionnées par clé."""
+
+    def __init__(self, name: str = "background-writer"):
+        self.name = name
+        self._tasks: "OrderedDict[Any, Tuple[Callable, Tuple[Any, ...]]]" = OrderedDict()
+        self._running: Optional[Any] = None
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def submit(self, key: str, func: Callable, *args: Any) -> None:
+        """Programme `func(*args)` ; remplace la tâche de même clé encore en attente."""
+        with self._cond:
+            self._tasks.pop(key, None)
+            self._add(key, func, args)
+
+    def enqueue(self, func: Callable, *args: Any) -> None:
+        """Programme `func(*args)` après les tâches déjà soumises, sans fusion."""
+        with self._cond:
+            self._add(("enqueue", next(self._sequence)), func, args)
+
+    def _add(self, key: Any, func: Callable, args: Tuple[Any, ...]) -> None:
+        if self._closed:
+            raise RuntimeError(f"{self.name} est arrêté")
+        self._tasks[key] = (func, args)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+
+    def pending(self, key: str) -> bool:
+        """Indique si une tâche de cette clé est en attente ou en cours."""
+        with self._cond:
+            return key in self._tasks or self._running == key
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Attend que toutes les tâches soumises soient terminées ; False si le délai expire."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._tasks and self._running is None, timeout)
+
+    def close(self) -> None:
+        """Termine les tâches en attente puis arrête le thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._tasks or self._closed)
+                if not self._tasks:
+                    return
+                key, (func, args) = self._tasks.popitem(last=False)
+                self._running = key
+
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"❌ Erreur lors de l'écriture en arrière-plan ({key}): {e}")
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._cond.notify_all()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai du classement : vitesse de convergence et débit, avec un votant simulé.
+
+Chaque film reçoit une valeur cachée (ordre de vérité) ; le votant préfère le film de plus forte
+valeur, avec un bruit gaussien et une proportion d'égalités réglables. Pour chaque exécution
+(taille de catalogue × stratégie × backend × graine), le script mesure :
+- le nombre de comparaisons pour atteindre le tau de Kendall visé entre le classement et la vérité,
+- le temps par appel de `get_random_pair` et `update_ratings`,
+- le pic mémoire (tracemalloc), mesuré à part sur la même session rejouée (préparation puis
+  `--memory-comparisons` premières comparaisons) pour ne pas fausser les temps.
+
+Les résultats sont écrits en JSON (avec le commit courant) pour comparer deux versions :
+
+    python benchmark.py --sizes catalog,1000 --output bench.json
+    python benchmark.py --sizes catalog,1000 --output new.json --baseline bench.json
+    python benchmark.py --sizes 100000 --strategies random --max-comparisons 50000
+
+`--startup N` mesure à la place le démarrage à froid de `pair_ranking.py` (N processus neufs par
+commande : aide, show, export, aggregate), à comparer à celui d'un interpréteur Python vide.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from film_catalog import Film, FilmCatalog
+from pair_selection import DEFAULT_STRATEGY, SELECTORS, TopKSelector
+from ranking_csv import list_users
+from ranking_tool import PairRankingTool
+from rating_backend import BACKENDS, DEFAULT_BACKEND
+from top_k import DEFAULT_TOP_K
+
+MAX_AUTO_COMPARISONS = 200000
+
+
+def synthetic_catalog(size: int) -> FilmCatalog:
+    """Catalogue de `size` films fictifs."""
+    return FilmCatalog([Film(i + 1, i, f"Film synthétique {i + 1}", "Genre", "Catégorie") for i in range(size)])
+
+
+def load_catalog(spec: str) -> Tuple[str, FilmCatalog]:
+    """`catalog` (ou un chemin de fichier) pour une liste source, sinon un nombre de films synthétiques."""
+    if spec.isdigit():
+        return spec, synthetic_catalog(int(spec))
+    source_file = "ListeATrier.md" if spec == "catalog" else spec
+    return spec, FilmCatalog.from_file(source_file)
+
+
+class SimulatedRater:
+    """Votant simulé : préférence selon une valeur cachée par film, bruitée, avec des égalités."""
+
+    def __init__(self, truth: np.ndarray, noise: float, draw_rate: float, rng: np.random.Generator):
+        self.truth = truth  # Valeur cachée, indexée par `Film.index`
+        self.noise = noise
+        self.draw_rate = draw_rate
+        self.rng = rng
+
+    def __call__(self, film1: Film, film2: Film) -> int:
+        if self.rng.random() < self.draw_rate:
+            return 3
+        perceived = self.truth[film1.index] - self.truth[film2.index] + self.noise * self.rng.standard_normal()
+        return 1 if perceived > 0 else 2
+
+
+def count_inversions(values: np.ndarray) -> int:
+    """Nombre de couples i < j avec values[i] > values[j] (tri fusion ascendant vectorisé, O(n log² n))."""
+    n = len(values)
+    if n < 2:
+        return 0
+    # Rangs denses : les blocs triés d'un niveau sont séparés par un décalage de n par bloc
+    current = np.unique(values, return_inverse=True)[1].astype(np.int64)
+    positions = np.arange(n, dtype=np.int64)
+    inversions = 0
+    width = 1
+    while width < n:
+        blocks = positions // (2 * width)
+        keys = current + blocks * n
+        is_left = (positions % (2 * width)) < width
+        left = keys[is_left]
+        right = keys[~is_left]
+        right_blocks = blocks[~is_left]
+        # Éléments de la moitié gauche du même bloc strictement supérieurs à chaque élément de droite
+        greater_from = np.searchsorted(left, right, side="right")
+        block_end = np.searchsorted(left, (right_blocks + 1) * n, side="left")
+        inversions += int((block_end - greater_from).sum())
+        current = np.sort(keys) - blocks * n
+        width *= 2
+    return inversions
+
+
+def kendall_tau(truth: np.ndarray, estimate: np.ndarray) -> float:
+    """Tau-b de Kendall entre la vérité (sans ex aequo) et une estimation (ex aequo possibles)."""
+    n = len(truth)
+    if n < 2:
+        return 1.0
+    in_truth_order = estimate[np.argsort(truth, kind="stable")]
+    pairs = n * (n - 1) // 2
+    _, counts = np.unique(estimate, return_counts=True)
+    tied = int((counts * (counts - 1) // 2).sum())
+    if tied == pairs:
+        return 0.0
+    discordant = count_inversions(in_truth_order)
+    concordant = pairs - tied - discordant
+    return (concordant - discordant) / float(np.sqrt(pairs * (pairs - tied)))
+
+
+def latency_stats(durations: np.ndarray) -> Dict[str, float]:
+    """Statistiques de durée par appel, en microsecondes."""
+    if len(durations) == 0:
+        return {"calls": 0, "mean_us": 0.0, "p50_us": 0.0, "p99_us": 0.0, "total_s": 0.0}
+    return {
+        "calls": int(len(durations)),
+        "mean_us": round(float(durations.mean()) * 1e6, 2),
+        "p50_us": round(float(np.percentile(durations, 50)) * 1e6, 2),
+        "p99_us": round(float(np.percentile(durations, 99)) * 1e6, 2),
+        "total_s": round(float(durations.sum()), 4),
+    }
+
+
+def build_tool(catalog: FilmCatalog, strategy: str, backend: str, top_k: int) -> PairRankingTool:
+    """Outil de classement prêt à classer le catalogue."""
+    tool = PairRankingTool(strategy=strategy, backend=backend, top_k=top_k)
+    tool.use_catalog(catalog)
+    if strategy == TopKSelector.name:
+        tool.set_top_k(min(top_k, len(catalog)))
+    return tool
+
+
+def simulation(catalog: FilmCatalog, seed: int, args: argparse.Namespace) -> Tuple[np.ndarray, SimulatedRater]:
+    """Vérité cachée et votant d'une graine (les sélecteurs tirent aussi dans `random`)."""
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    truth = rng.standard_normal(len(catalog))
+    return truth, SimulatedRater(truth, args.noise, args.draw_rate, rng)
+
+
+def measure_memory(
+    catalog: FilmCatalog, strategy: str, backend: str, seed: int, comparisons: int, args: argparse.Namespace
+) -> int:
+    """Pic mémoire (octets) de la préparation puis des `comparisons` premières comparaisons."""
+    _, rater = simulation(catalog, seed, args)
+    tracemalloc.start()
+    try:
+        tool = build_tool(catalog, strategy, backend, args.top_k)
+        for _ in range(comparisons):
+            film1, film2 = tool.get_random_pair()
+            if not film1 or not film2:
+                break
+            tool.update_ratings(film1, film2, rater(film1, film2))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_once(
+    label: str,
+    catalog: FilmCatalog,
+    strategy: str,
+    backend: str,
+    seed: int,
+    args: argparse.Namespace,
+) -> Dict:
+    """Une session simulée complète ; retourne ses mesures."""
+    n = len(catalog)
+    truth, rater = simulation(catalog, seed, args)
+    budget = args.max_comparisons or min(20 * n, MAX_AUTO_COMPARISONS)
+    eval_every = args.eval_every or max(5, n // 10)
+
+    setup_start = time.perf_counter()
+    tool = build_tool(catalog, strategy, backend, args.top_k)
+    setup_time = time.perf_counter() - setup_start
+
+    pair_times = np.empty(budget)
+    update_times = np.empty(budget)
+    curve: List[Tuple[int, float]] = []
+    to_target: Optional[int] = None
+    clock = time.perf_counter
+    done = 0
+
+    while done < budget:
+        start = clock()
+        film1, film2 = tool.get_random_pair()
+        pair_times[done] = clock() - start
+        if not film1 or not film2:
+            break
+
+        result = rater(film1, film2)
+        start = clock()
+        tool.update_ratings(film1, film2, result)
+        update_times[done] = clock() - start
+        done += 1
+
+        if done % eval_every == 0 or done == budget:
+            mu, _ = tool.user_ratings.as_arrays()
+            tau = kendall_tau(truth, mu)
+            curve.append((done, round(tau, 4)))
+            if to_target is None and tau >= args.target_tau:
+                to_target = done
+                if not args.full:
+                    break
+
+    mu, _ = tool.user_ratings.as_arrays()
+    memory_comparisons = min(done, args.memory_comparisons)
+    peak_memory = measure_memory(catalog, strategy, backend, seed, memory_comparisons, args) if args.memory else None
+    return {
+        "catalog": label,
+        "films": n,
+        "strategy": strategy,
+        "backend": backend,
+        "seed": seed,
+        "comparisons": done,
+        "comparisons_to_target": to_target,
+        "final_tau": round(kendall_tau(truth, mu), 4),
+        "convergence": round(tool.convergence.confidence, 4),
+        "setup_s": round(setup_time, 4),
+        "get_random_pair": latency_stats(pair_times[:done]),
+        "update_ratings": latency_stats(update_times[:done]),
+        "peak_memory_bytes": peak_memory,
+        "memory_comparisons": memory_comparisons if args.memory else None,
+        "tau_curve": curve,
+    }
+
+
+def startup_commands() -> Dict[str, List[str]]:
+    """Commandes dont le démarrage est mesuré (show et export seulement si un classement existe)."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pair_ranking.py")
+    commands = {"python": [sys.executable, "-c", "pass"], "help": [sys.executable, script, "--help"]}
+    users = list_users()
+    if users:
+        commands["show"] = [sys.executable, script, "show", "--user", users[0], "--top", "10"]
+        commands["export"] = [sys.executable, script, "export", "--user", users[0], "--format", "ndjson", "--top", "10"]
+        commands["aggregate"] = [sys.executable, script, "aggregate", "--top", "10", "--output", os.devnull]
+    return commands
+
+
+def measure_startup(runs: int) -> Dict[str, Dict[str, float]]:
+    """Temps de démarrage à froid (processus neuf, jusqu'à sa fin) de chaque commande."""
+    results = {}
+    for name, command in startup_commands().items():
+        durations = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            durations.append(time.perf_counter() - start)
+        results[name] = latency_stats(np.array(durations))
+    return results
+
+
+def print_startup(startup: Dict[str, Dict[str, float]], baseline: Optional[Dict] = None) -> None:
+    previous = baseline.get("startup", {}) if baseline else {}
+    print(f"{'Commande':<12}{'Moy. ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'vs réf.':>10}")
+    for name, stats in startup.items():
+        old = previous.get(name)
+        print(
+            f"{name:<12}{stats['mean_us'] / 1000:>10.1f}{stats['p50_us'] / 1000:>10.1f}{stats['p99_us'] / 1000:>10.1f}"
+            f"{ratio(stats['p50_us'], old['p50_us'] if old else None):>10}"
+        )
+
+
+def git_commit() -> Optional[str]:
+    """Commit courant (None hors d'un dépôt git)."""
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def run_key(run: Dict) -> Tuple:
+    return run["catalog"], run["strategy"], run["backend"], run["seed"]
+
+
+def ratio(new: Optional[float], old: Optional[float]) -> str:
+    if not new or not old:
+        return "-"
+    return f"x{new / old:.2f}"
+
+
+def print_summary(runs: List[Dict], baseline: Optional[Dict] = None) -> None:
+    """Tableau récapitulatif, avec les ratios par rapport à une exécution de référence si fournie."""
+    previous = {run_key(run): run for run in baseline["runs"]} if baseline else {}
+    print(
+        f"{'Catalogue':<12}{'Stratégie':<10}{'Backend':<10}{'Graine':>7}{'Comp.':>9}{'Cible':>9}"
+        f"{'Tau':>8}{'Paire µs':>10}{'Maj µs':>9}{'Pic Mo':>9}"
+    )
+    for run in runs:
+        memory = run["peak_memory_bytes"]
+        print(
+            f"{run['catalog']:<12}{run['strategy']:<10}{run['backend']:<10}{run['seed']:>7}{run['comparisons']:>9}"
+            f"{run['comparisons_to_target'] if run['comparisons_to_target'] is not None else '-':>9}"
+            f"{run['final_tau']:>8.3f}{run['get_random_pair']['mean_us']:>10.1f}{run['update_ratings']['mean_us']:>9.1f}"
+            f"{memory / 2**20 if memory is not None else float('nan'):>9.1f}"
+        )
+        old = previous.get(run_key(run))
+        if old is not None:
+            print(
+                f"{'  vs réf.':<41}{ratio(run['comparisons_to_target'], old['comparisons_to_target']):>18}"
+                f"{'':>8}{ratio(run['get_random_pair']['mean_us'], old['get_random_pair']['mean_us']):>10}"
+                f"{ratio(run['update_ratings']['mean_us'], old['update_ratings']['mean_us']):>9}"
+                f"{ratio(run['peak_memory_bytes'], old['peak_memory_bytes']):>9}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Banc d'essai du classement avec un votant simulé")
+    parser.add_argument(
+        "--sizes",
+        default="catalog,1000",
+        help="Catalogues, séparés par des virgules : 'catalog' (ListeATrier.md), un fichier, ou un nombre de films "
+        "synthétiques (défaut: %(default)s)",
+    )
+    parser.add_argument(
+        "--strategies", default=DEFAULT_STRATEGY, help=f"Stratégies parmi {', '.join(sorted(SELECTORS))} (défaut: %(default)s)"
+    )
+    parser.add_argument(
+        "--backends", default=DEFAULT_BACKEND, help=f"Backends parmi {', '.join(sorted(BACKENDS))} (défaut: %(default)s)"
+    )
+    parser.add_argument("--seeds", type=int, default=1, help="Nombre de répétitions (graines 0..N-1) (défaut: %(default)s)")
+    parser.add_argument("--noise", type=float, default=0.5, help="Écart-type du bruit du votant (défaut: %(default)s)")
+    parser.add_argument("--draw-rate", type=float, default=0.05, help="Proportion d'égalités (défaut: %(default)s)")
+    parser.add_argument("--target-tau", type=float, default=0.9, help="Tau de Kendall visé (défaut: %(default)s)")
+    parser.add_argument(
+        "--max-comparisons",
+        type=int,
+        default=0,
+        help=f"Comparaisons maximum par exécution (défaut: 20 par film, au plus {MAX_AUTO_COMPARISONS})",
+    )
+    parser.add_argument("--eval-every", type=int, default=0, help="Comparaisons entre deux calculs du tau (défaut: n/10)")
+    parser.add_argument("--full", action="store_true", help="Continuer jusqu'au maximum une fois la cible atteinte")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="Taille du top pour la stratégie topk")
+    parser.add_argument(
+        "--memory-comparisons",
+        type=int,
+        default=1000,
+        help="Comparaisons rejouées sous tracemalloc pour le pic mémoire (défaut: %(default)s)",
+    )
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Sans mesure du pic mémoire")
+    parser.add_argument("--output", default="benchmark.json", help="Fichier JSON des résultats (défaut: %(default)s)")
+    parser.add_argument("--baseline", help="Résultats JSON de référence à comparer")
+    parser.add_argument(
+        "--startup", type=int, default=0, help="Mesurer seulement le démarrage de pair_ranking.py (N lancements par commande)"
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.startup:
+        startup = measure_startup(args.startup)
+        report = {"commit": git_commit(), "date": datetime.now().isoformat(), "python": platform.python_version(), "startup": startup}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print_startup(startup, baseline)
+        print(f"📁 Résultats sauvegardés: {args.output}")
+        return
+
+    strategies = args.strategies.split(",")
+    backends = args.backends.split(",")
+    for name, known in [(s, SELECTORS) for s in strategies] + [(b, BACKENDS) for b in backends]:
+        if name not in known:
+            parser.error(f"Valeur inconnue: {name}")
+
+    runs = []
+    for spec in args.sizes.split(","):
+        label, catalog = load_catalog(spec.strip())
+        for strategy in strategies:
+            for backend in backends:
+                for seed in range(args.seeds):
+                    print(f"⏱️  {label} ({len(catalog)} films), {strategy}, {backend}, graine {seed}...", file=sys.stderr)
+                    runs.append(run_once(label, catalog, strategy, backend, seed, args))
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "settings": {
+            "noise": args.noise,
+            "draw_rate": args.draw_rate,
+            "target_tau": args.target_tau,
+            "max_comparisons": args.max_comparisons,
+            "eval_every": args.eval_every,
+            "full": args.full,
+            "top_k": args.top_k,
+            "memory": args.memory,
+            "memory_comparisons": args.memory_comparisons,
+        },
+        "runs": runs,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print_summary(runs, baseline)
+    print(f"📁 Résultats sauvegardés: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
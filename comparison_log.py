@@ -0,0 +1,233 @@
+"""
+Journal append-only des comparaisons d'un utilisateur.
+
+Chaque réponse est ajoutée en une ligne JSON dans `comparisons_<utilisateur>.jsonl` (coût O(1) par réponse),
+ce qui sert aussi de journal d'activité. Les ratings se reconstruisent en rejouant le journal ;
+un point de contrôle périodique (`checkpoint_<utilisateur>.json`) borne la partie à rejouer.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple
+
+from trueskill import Rating
+
+REPLAY_BATCH_SIZE = 10000
+
+Resolver = Callable[[int], Optional[int]]
+
+
+class ComparisonLog:
+    """Journal des comparaisons d'un utilisateur avec rejeu déterministe."""
+
+    def __init__(self, user_name: str, directory: str = ".", fsync_every: int = 1, checkpoint_every: int = 100):
+        self.user_name = user_name
+        self.path = os.path.join(directory, f"comparisons_{user_name}.jsonl")
+        self.checkpoint_path = os.path.join(directory, f"checkpoint_{user_name}.json")
+        self.fsync_every = fsync_every
+        self.checkpoint_every = checkpoint_every
+        self._file = None
+        self._unsynced = 0
+        self._since_checkpoint = 0
+
+    def exists(self) -> bool:
+        """Indique si un journal existe déjà pour cet utilisateur."""
+        return os.path.exists(self.path)
+
+    def _write(self, record: Dict) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+        # fsync par lots : au pire les `fsync_every - 1` dernières réponses sont perdues en cas de panne
+        self._unsynced += 1
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def start_session(self) -> None:
+        """Marque le début d'un nouveau classement (les réponses précédentes ne sont plus rejouées)."""
+        self._write({"type": "reset", "timestamp": datetime.now().isoformat()})
+        self._since_checkpoint = 0
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def append(self, film1_id: int, film2_id: int, result: int) -> None:
+        """Ajoute une réponse au journal (0 = comparaison passée)."""
+        self._write(
+            {
+                "type": "comparison",
+                "film1": film1_id,
+                "film2": film2_id,
+                "result": result,
+                "timestamp": datetime.now().isoformat(),
+            }
+        )
+        self._since_checkpoint += 1
+
+    def append_many(self, comparisons: Iterable[Tuple[int, int, int]]) -> int:
+        """Ajoute un lot de réponses en une seule écriture (import en masse) ; retourne leur nombre."""
+        timestamp = datetime.now().isoformat()
+        lines = [
+            json.dumps({"type": "comparison", "film1": film1_id, "film2": film2_id, "result": result, "timestamp": timestamp})
+            + "\n"
+            for film1_id, film2_id, result in comparisons
+        ]
+        if not lines:
+            return 0
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(lines))
+        self._file.flush()
+
+        self._unsynced += len(lines)
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._since_checkpoint += len(lines)
+        return len(lines)
+
+    def offset(self) -> int:
+        """Position courante de fin du journal (en octets), après écriture des données en tampon."""
+        if self._file is not None:
+            self._file.flush()
+        return os.path.getsize(self.path) if self.exists() else 0
+
+    def needs_checkpoint(self) -> bool:
+        """Indique si un point de contrôle est dû."""
+        return self._since_checkpoint >= self.checkpoint_every
+
+    def checkpoint(
+        self, ratings: MutableMapping[int, Rating], comparisons_made: int, offset: Optional[int] = None
+    ) -> None:
+        """Écrit un instantané des ratings associé à une position du journal (par défaut la position courante)."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        if offset is None:
+            offset = os.path.getsize(self.path) if self.exists() else 0
+
+        data = {
+            "user_name": self.user_name,
+            "offset": offset,
+            "comparisons_made": comparisons_made,
+            "ratings": {str(film_id): [rating.mu, rating.sigma] for film_id, rating in ratings.items()},
+            "timestamp": datetime.now().isoformat(),
+        }
+
+        # Écriture atomique : un point de contrôle est soit l'ancien, soit le nouveau
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        self._since_checkpoint = 0
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        # Un point de contrôle au-delà de la fin du journal ne correspond pas à ce journal
+        if not self.exists() or data.get("offset", 0) > os.path.getsize(self.path):
+            return None
+        return data
+
+    def has_baseline(self) -> bool:
+        """Indique si le rejeu part d'un état connu (point de contrôle ou `reset`) plutôt que des ratings chargés."""
+        if self._load_checkpoint() is not None:
+            return True
+        return any(record.get("type") == "reset" for record in self.records())
+
+    def records(self, offset: int = 0) -> Iterator[Dict]:
+        """Parcourt les enregistrements du journal à partir d'une position en octets."""
+        if not self.exists():
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Dernière ligne tronquée par une panne : on l'ignore
+                    continue
+
+    def history(self, resolve: Optional[Resolver] = None) -> List[Tuple[int, int, int]]:
+        """Toutes les réponses du classement en cours (depuis le dernier `reset`), sans point de contrôle."""
+        comparisons: List[Tuple[int, int, int]] = []
+        for record in self.records():
+            if record.get("type") == "reset":
+                comparisons = []
+            elif record.get("type") == "comparison" and record["result"] > 0:
+                film1, film2 = record["film1"], record["film2"]
+                if resolve:
+                    film1, film2 = resolve(film1), resolve(film2)
+                if film1 is not None and film2 is not None:
+                    comparisons.append((film1, film2, record["result"]))
+        return comparisons
+
+    def replay(self, ratings: MutableMapping[int, Rating], resolve: Optional[Resolver] = None) -> int:
+        """Reconstruit les ratings depuis le dernier point de contrôle et retourne le nombre de comparaisons.
+
+        `resolve` traduit les identifiants enregistrés en identifiants courants (None si le film a disparu).
+        """
+        comparisons_made = 0
+        offset = 0
+
+        checkpoint = self._load_checkpoint()
+        if checkpoint is not None:
+            offset = checkpoint["offset"]
+            comparisons_made = checkpoint["comparisons_made"]
+            for film_id, (mu, sigma) in checkpoint["ratings"].items():
+                film_id = resolve(int(film_id)) if resolve else int(film_id)
+                if film_id in ratings:
+                    ratings[film_id] = Rating(mu=mu, sigma=sigma)
+
+        return self.replay_from(ratings, offset, comparisons_made, resolve)
+
+    def replay_from(
+        self,
+        ratings: MutableMapping[int, Rating],
+        offset: int,
+        comparisons_made: int = 0,
+        resolve: Optional[Resolver] = None,
+    ) -> int:
+        """Applique les réponses écrites après `offset` à des ratings déjà à jour jusque-là."""
+        if offset > (os.path.getsize(self.path) if self.exists() else 0):
+            return comparisons_made
+
+        batch: List[Tuple[int, int, int]] = []
+        for record in self.records(offset):
+            if record.get("type") == "reset":
+                batch = []
+                comparisons_made = 0
+                for film_id in ratings:
+                    ratings[film_id] = Rating()
+            elif record.get("type") == "comparison" and record["result"] > 0:
+                film1, film2 = record["film1"], record["film2"]
+                if resolve:
+                    film1, film2 = resolve(film1), resolve(film2)
+                if film1 in ratings and film2 in ratings:
+                    batch.append((film1, film2, record["result"]))
+                    comparisons_made += 1
+                if len(batch) >= REPLAY_BATCH_SIZE:
+                    ratings.rate_batch(batch)
+                    batch = []
+
+        if batch:
+            ratings.rate_batch(batch)
+        return comparisons_made
+
+    def close(self) -> None:
+        """Force l'écriture sur disque et ferme le journal."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._unsynced = 0
@@ -0,0 +1,98 @@
+"""
+Suivi incrémental de la convergence du classement.
+
+La confiance d'ordre est la moyenne, sur les couples de films adjacents dans le classement,
+de la probabilité que les deux films soient dans le bon ordre : P = Φ((mu_haut - mu_bas) / √(σ_haut² + σ_bas²)).
+Elle part de 0.5 (tout est incertain) et tend vers 1. Après chaque comparaison, seuls les couples
+adjacents aux deux films déplacés sont recalculés : O(log n) par mise à jour, sans retri complet.
+"""
+
+import math
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from trueskill import Rating, global_env
+
+from film_catalog import Film
+from sorted_index import SortedIndex
+
+DEFAULT_TARGET = 0.6
+
+
+class ConvergenceTracker:
+    """Confiance moyenne dans l'ordre des films adjacents, tenue à jour comparaison après comparaison."""
+
+    def __init__(self, target: float = DEFAULT_TARGET):
+        self.target = target
+        self.ratings: Mapping[int, Rating] = {}
+        self._index = SortedIndex()
+        self._pairs: Dict[Tuple[int, int], float] = {}  # {(film au-dessus, film en dessous): probabilité}
+        self._total = 0.0
+
+    def reset(self, films: List[Film], ratings: Mapping[int, Rating]) -> None:
+        """(Ré)initialise le suivi sur une liste de films et leurs ratings."""
+        self.ratings = ratings
+        self._index = SortedIndex()
+        for film in films:
+            self._index.add(-ratings[film.id].mu, film.id)
+
+        self._pairs = {}
+        self._total = 0.0
+        ordered = [film_id for _, film_id in self._index]
+        for upper, lower in zip(ordered, ordered[1:]):
+            self._link(upper, lower)
+
+    @property
+    def confidence(self) -> float:
+        """Probabilité moyenne que deux films adjacents soient correctement ordonnés."""
+        if len(self._pairs) == 0:
+            return 0.0
+        return min(1.0, max(0.0, self._total / len(self._pairs)))
+
+    @property
+    def converged(self) -> bool:
+        """Indique si la confiance cible est atteinte."""
+        return self.confidence >= self.target
+
+    def _order_probability(self, upper: int, lower: int) -> float:
+        rating1, rating2 = self.ratings[upper], self.ratings[lower]
+        spread = math.sqrt(rating1.sigma**2 + rating2.sigma**2)
+        return global_env().cdf((rating1.mu - rating2.mu) / spread)
+
+    def _link(self, upper: Optional[int], lower: Optional[int]) -> None:
+        if upper is None or lower is None:
+            return
+        probability = self._order_probability(upper, lower)
+        self._pairs[(upper, lower)] = probability
+        self._total += probability
+
+    def _unlink(self, upper: Optional[int], lower: Optional[int]) -> None:
+        if upper is None or lower is None:
+            return
+        self._total -= self._pairs.pop((upper, lower))
+
+    def _around(self, pos: int) -> Tuple[Optional[int], Optional[int]]:
+        """Films juste au-dessus et juste en dessous de la position `pos` (exclue)."""
+        upper = self._index[pos - 1][1] if pos > 0 else None
+        lower = self._index[pos + 1][1] if pos + 1 < len(self._index) else None
+        return upper, lower
+
+    def notify(self, film1: Film, film2: Film) -> None:
+        """Repositionne les deux films qui viennent d'être comparés et met à jour la confiance."""
+        for film_id in (film1.id, film2.id):
+            if film_id not in self._index:
+                continue  # Film absent de la liste suivie
+            # Retirer le film : ses deux voisins deviennent adjacents
+            pos = self._index.position(film_id)
+            upper, lower = self._around(pos)
+            self._unlink(upper, film_id)
+            self._unlink(film_id, lower)
+            self._index.discard(film_id)
+            self._link(upper, lower)
+
+            # Le réinsérer à sa nouvelle place
+            self._index.add(-self.ratings[film_id].mu, film_id)
+            pos = self._index.position(film_id)
+            upper, lower = self._around(pos)
+            self._unlink(upper, lower)
+            self._link(upper, film_id)
+            self._link(film_id, lower)
@@ -0,0 +1,265 @@
+"""
+Catalogue des films à classer, chargé une fois depuis la liste source.
+
+Chaque film est un objet compact (`__slots__`), les genres/catégories sont internés
+(une seule copie de chaque valeur) et la position du film dans le catalogue sert d'indice
+dans les tableaux de ratings. Index par identifiant et par description pour des recherches en O(1),
+et par genre et par catégorie (facettes) pour restreindre une sélection ou un classement sans parcourir
+toute la liste.
+
+L'identifiant d'un film est dérivé de sa description (hachage sur 52 bits, exact en JSON/JavaScript) :
+ajouter, retirer ou déplacer des lignes ne change pas l'identifiant des autres films. La liste
+analysée est mise en cache (`.<fichier>.cache`, JSON : des données, jamais du code exécuté à la
+lecture) et réutilisée tant que l'empreinte SHA-256 du contenu est inchangée.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+ID_BITS = 52
+CACHE_VERSION = 2
+
+# « SF » couvre « SF-Épopée », « SF-Réaliste »... (catégories hiérarchiques de la liste source)
+FACET_SEPARATOR = "-"
+MAX_CACHED_FACETS = 256
+
+Row = Tuple[int, int, str, str, str]  # (id, numéro de ligne, description, genre, catégorie)
+
+
+def content_id(description: str, occurrence: int = 0) -> int:
+    """Identifiant stable d'un film, dérivé de sa description (et de son rang parmi les doublons)."""
+    key = description if occurrence == 0 else f"{description}\x00{occurrence}"
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> (64 - ID_BITS)
+
+
+def parse_rows(text: str) -> List[Row]:
+    """Analyse la liste source (une entrée par ligne : description \\t genre \\t catégorie)."""
+    rows = []
+    seen: Dict[str, int] = {}
+    # Mêmes fins de ligne que la lecture en mode texte (numéros de ligne des anciens identifiants)
+    for i, line in enumerate(io.StringIO(text, newline=None)):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            parts = line.split("\t")
+            description = parts[0].strip()
+            occurrence = seen.get(description, 0)
+            seen[description] = occurrence + 1
+            rows.append(
+                (
+                    content_id(description, occurrence),
+                    i + 1,
+                    description,
+                    parts[1].strip() if len(parts) > 1 else "",
+                    parts[2].strip() if len(parts) > 2 else "",
+                )
+            )
+    return rows
+
+
+def facet_key(value: Optional[str]) -> str:
+    """Forme normalisée d'une valeur de facette (casse et espaces ignorés)."""
+    return (value or "").strip().casefold()
+
+
+def facet_matches(value: str, wanted: Optional[str]) -> bool:
+    """Indique si une valeur de genre ou de catégorie relève de la facette demandée (ou de ses sous-catégories)."""
+    wanted = facet_key(wanted)
+    value = facet_key(value)
+    return not wanted or value == wanted or value.startswith(wanted + FACET_SEPARATOR)
+
+
+def cache_path(source_file: str) -> str:
+    directory, name = os.path.split(source_file)
+    return os.path.join(directory, f".{name}.cache")
+
+
+def _read_cache(path: str, digest: str) -> Optional[List[Row]]:
+    """Lignes analysées du cache si elles correspondent à ce contenu (empreinte SHA-256), None sinon."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION or data.get("digest") != digest:
+        return None
+    try:
+        return [
+            (int(film_id), int(line), str(description), str(genre), str(category))
+            for film_id, line, description, genre, category in data["rows"]
+        ]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _write_cache(path: str, digest: str, rows: List[Row]) -> None:
+    # Fichier temporaire propre au processus puis renommage : plusieurs workers peuvent écrire en même temps
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "digest": digest, "rows": rows}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️  Cache du catalogue non écrit ({path}): {e}")
+
+
+class Film:
+    """Film du catalogue (métadonnées en lecture seule, partagées entre utilisateurs)."""
+
+    __slots__ = ("id", "index", "description", "genre", "category")
+
+    def __init__(self, film_id: int, index: int, description: str, genre: str = "", category: str = ""):
+        self.id = film_id
+        self.index = index  # Position dans le catalogue (= indice dans les tableaux de ratings)
+        self.description = description
+        self.genre = sys.intern(genre)
+        self.category = sys.intern(category)
+
+    def to_dict(self) -> Dict:
+        """Champs exposés par les routes JSON."""
+        return {"id": self.id, "description": self.description, "genre": self.genre, "category": self.category}
+
+    def __repr__(self) -> str:
+        return f"Film(id={self.id}, description={self.description!r})"
+
+
+class FilmCatalog:
+    """Liste de films indexée par id et par description."""
+
+    def __init__(self, films: Optional[List[Film]] = None, legacy_ids: Optional[Dict[int, int]] = None):
+        self.films: List[Film] = films if films is not None else []
+        self.ids: List[int] = [film.id for film in self.films]
+        self.by_id: Dict[int, Film] = {film.id: film for film in self.films}
+        self.by_description: Dict[str, Film] = {film.description: film for film in self.films}
+        # Anciens identifiants (numéros de ligne) des journaux et états enregistrés avant les identifiants stables
+        self.legacy_ids: Dict[int, int] = legacy_ids if legacy_ids is not None else {}
+        # Facettes : {valeur: positions des films, dans l'ordre du catalogue}
+        self.genres: Dict[str, List[int]] = {}
+        self.categories: Dict[str, List[int]] = {}
+        for film in self.films:
+            self.genres.setdefault(film.genre, []).append(film.index)
+            self.categories.setdefault(film.category, []).append(film.index)
+        self._facets: Dict[Tuple[str, str], List[int]] = {}
+        self.source_file: Optional[str] = None
+        self.signature: Optional[Tuple[int, int]] = None  # (taille, mtime en ns) du fichier lu
+        self.digest: Optional[str] = None  # SHA-256 du contenu lu
+
+    @classmethod
+    def from_rows(cls, rows: List[Row]) -> "FilmCatalog":
+        films = [
+            Film(film_id, index, description, genre, category)
+            for index, (film_id, _, description, genre, category) in enumerate(rows)
+        ]
+        return cls(films, {line: film_id for film_id, line, _, _, _ in rows})
+
+    @classmethod
+    def from_file(cls, source_file: str, use_cache: bool = True) -> "FilmCatalog":
+        """Charge la liste source, depuis le cache si son contenu n'a pas changé."""
+        stat = os.stat(source_file)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with open(source_file, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+
+        path = cache_path(source_file)
+        rows = _read_cache(path, digest) if use_cache else None
+        if rows is None:
+            rows = parse_rows(data.decode("utf-8"))
+            if use_cache:
+                _write_cache(path, digest, rows)
+
+        catalog = cls.from_rows(rows)
+        catalog.source_file = source_file
+        catalog.signature = signature
+        catalog.digest = digest
+        return catalog
+
+    def is_stale(self) -> bool:
+        """Indique si le fichier source a changé (taille ou date) depuis sa lecture."""
+        if self.source_file is None:
+            return False
+        try:
+            stat = os.stat(self.source_file)
+        except OSError:
+            return False  # Fichier en cours de remplacement : on garde le catalogue courant
+        return (stat.st_size, stat.st_mtime_ns) != self.signature
+
+    def diff(self, other: "FilmCatalog") -> Tuple[Set[int], Set[int]]:
+        """Identifiants ajoutés et retirés pour passer de ce catalogue à `other`."""
+        old, new = set(self.ids), set(other.ids)
+        return new - old, old - new
+
+    def __len__(self) -> int:
+        return len(self.films)
+
+    def __iter__(self) -> Iterator[Film]:
+        return iter(self.films)
+
+    def __getitem__(self, index: int) -> Film:
+        return self.films[index]
+
+    def get(self, film_id: int) -> Optional[Film]:
+        """Retourne le film d'identifiant donné, ou None."""
+        return self.by_id.get(film_id)
+
+    def resolve(self, film_id: int) -> Optional[int]:
+        """Identifiant courant d'un film, y compris depuis un ancien identifiant (numéro de ligne)."""
+        if film_id in self.by_id:
+            return film_id
+        return self.legacy_ids.get(film_id)
+
+    def find_description(self, description: str) -> Optional[Film]:
+        """Retourne le film de description donnée, ou None."""
+        return self.by_description.get(description.strip())
+
+    def facet(self, genre: Optional[str] = None, category: Optional[str] = None) -> List[int]:
+        """Positions des films d'un genre et/ou d'une catégorie (tous les films si aucun filtre).
+
+        Une valeur couvre aussi ses sous-catégories : « SF » inclut « SF-Épopée » et « SF-Réaliste ».
+        """
+        key = (facet_key(genre), facet_key(category))
+        positions = self._facets.get(key)
+        if positions is not None:
+            return positions
+
+        selected: Optional[Set[int]] = None
+        for index, value in ((self.genres, key[0]), (self.categories, key[1])):
+            if not value:
+                continue
+            matched: Set[int] = set()
+            for name, members in index.items():
+                if facet_matches(name, value):
+                    matched.update(members)
+            selected = matched if selected is None else selected & matched
+        positions = sorted(selected) if selected is not None else list(range(len(self.films)))
+
+        if len(self._facets) >= MAX_CACHED_FACETS:
+            self._facets.clear()
+        self._facets[key] = positions
+        return positions
+
+    def facet_films(self, genre: Optional[str] = None, category: Optional[str] = None) -> List[Film]:
+        """Films d'un genre et/ou d'une catégorie, dans l'ordre du catalogue."""
+        if not facet_key(genre) and not facet_key(category):
+            return self.films
+        return [self.films[i] for i in self.facet(genre, category)]
+
+    def facet_counts(self) -> Dict[str, Dict[str, int]]:
+        """Nombre de films par genre et par catégorie."""
+        return {
+            "genres": {name: len(members) for name, members in sorted(self.genres.items()) if name},
+            "categories": {name: len(members) for name, members in sorted(self.categories.items()) if name},
+        }
+
+    def find(self, reference: str) -> Optional[Film]:
+        """Film désigné par son identifiant (ou son ancien numéro de ligne) ou par sa description."""
+        reference = reference.strip()
+        if reference.isdigit():
+            film_id = self.resolve(int(reference))
+            if film_id is not None:
+                return self.get(film_id)
+        return self.find_description(reference)
@@ -0,0 +1,196 @@
+"""
+Classement de groupe tenu à jour pour orienter le choix des paires de chaque utilisateur.
+
+Chaque utilisateur apporte sur chaque film une information gaussienne : ses ratings (mu, sigma)
+divisés par l'a priori TrueSkill, soit une précision λ = 1/σ² - 1/σ₀² et un terme η = μ/σ² - μ₀/σ₀²
+(nuls pour un film qu'il n'a jamais comparé). Le classement de groupe est l'a priori multiplié par
+l'information de tous : deux tableaux de sommes par film. Pour proposer une paire à un utilisateur,
+sa propre contribution est retirée : on obtient le classement des *autres* et la probabilité qu'ils
+ordonnent mal les deux films. Une paire déjà tranchée par le groupe perd presque tout son intérêt.
+
+Les sources sont les utilisateurs en mémoire (ratings à jour) et les fichiers
+`ListeATrier.<utilisateur>.csv` des autres. Le calcul est vectorisé par utilisateur et refait au
+plus une fois par intervalle, dans un thread à part : une requête ne l'attend jamais et lit le
+dernier état publié (`GroupState`, non modifié une fois publié).
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from trueskill import Rating, global_env
+
+from aggregation import UserRanking, load_user_rankings
+from film_catalog import FilmCatalog
+from metrics import timed
+
+DEFAULT_INTERVAL = 5.0
+
+# Poids minimal d'une paire déjà tranchée par le groupe (l'utilisateur doit pouvoir affiner son propre ordre)
+GROUP_FLOOR = 0.1
+
+Messages = Tuple[np.ndarray, np.ndarray]
+Source = Tuple[str, Mapping[int, Rating]]
+
+
+def gaussian_messages(mu: np.ndarray, sigma: np.ndarray) -> Messages:
+    """Information (λ, η) apportée sur chaque film par un classement individuel, a priori retiré."""
+    env = global_env()
+    prior = 1.0 / env.sigma**2
+    # Les CSV arrondissent sigma au centième : un film jamais comparé y vaut 8.33
+    informed = sigma < env.sigma - 0.005
+    safe = np.where(informed, sigma, env.sigma)
+    precision = np.where(informed, np.maximum(1.0 / safe**2 - prior, 0.0), 0.0)
+    shift = np.where(precision > 0, mu / safe**2 - env.mu * prior, 0.0)
+    return precision, shift
+
+
+def catalog_columns(descriptions: Sequence[str], catalog: FilmCatalog) -> np.ndarray:
+    """Position dans le catalogue de chaque film d'un classement CSV (-1 si le film n'y est plus)."""
+    return np.fromiter(
+        (film.index if film is not None else -1 for film in map(catalog.find_description, descriptions)),
+        dtype=np.int64,
+        count=len(descriptions),
+    )
+
+
+class GroupState:
+    """Sommes d'information du groupe par film, figées à la publication."""
+
+    __slots__ = ("generation", "precision", "shift", "messages")
+
+    def __init__(
+        self,
+        generation: int = 0,
+        precision: Optional[np.ndarray] = None,
+        shift: Optional[np.ndarray] = None,
+        messages: Optional[Dict[str, Messages]] = None,
+    ):
+        self.generation = generation
+        self.precision = precision  # 1/σ₀² + Σ λ
+        self.shift = shift  # μ₀/σ₀² + Σ η
+        self.messages = messages if messages is not None else {}  # Contributions des utilisateurs en mémoire
+
+    def pair_weights(self, user_name: str, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Intérêt de chaque paire pour le groupe, hors contribution de `user_name` (de GROUP_FLOOR à 1 + GROUP_FLOOR)."""
+        if self.precision is None or max(first.max(initial=0), second.max(initial=0)) >= len(self.precision):
+            return np.ones(len(first))  # Pas encore de classement de groupe pour ce catalogue
+        p1, p2 = self.precision[first], self.precision[second]
+        s1, s2 = self.shift[first], self.shift[second]
+        own = self.messages.get(user_name)
+        if own is not None:
+            p1, p2 = p1 - own[0][first], p2 - own[0][second]
+            s1, s2 = s1 - own[1][first], s2 - own[1][second]
+
+        # Probabilité que le groupe ordonne mal les deux films
+        gap = np.abs(s1 / p1 - s2 / p2) / np.sqrt(2 * (1.0 / p1 + 1.0 / p2))
+        misorder = 0.5 * np.fromiter(map(math.erfc, gap.tolist()), dtype=np.float64, count=len(gap))
+        return GROUP_FLOOR + 2 * misorder
+
+
+class GroupView:
+    """Classement de groupe vu par un utilisateur (interface attendue par `GroupSelector`)."""
+
+    __slots__ = ("scheduler", "user_name")
+
+    def __init__(self, scheduler: "GroupScheduler", user_name: str):
+        self.scheduler = scheduler
+        self.user_name = user_name
+
+    def pair_weights(self, first: Sequence[int], second: Sequence[int]) -> np.ndarray:
+        """Poids des paires (indices dans le catalogue) ; lance au besoin une mise à jour en arrière-plan."""
+        self.scheduler.poll()
+        return self.scheduler.state.pair_weights(
+            self.user_name, np.asarray(first, dtype=np.int64), np.asarray(second, dtype=np.int64)
+        )
+
+
+class GroupScheduler:
+    """Calcule et publie périodiquement le classement de groupe."""
+
+    def __init__(
+        self,
+        directory: str = ".",
+        interval: float = DEFAULT_INTERVAL,
+        sources: Optional[Callable[[], Iterable[Source]]] = None,
+        catalog: Optional[Callable[[], FilmCatalog]] = None,
+    ):
+        self.directory = directory
+        self.interval = interval
+        self.sources = sources  # Utilisateurs en mémoire (nom, ratings) ; None : pas de mise à jour automatique
+        self.catalog = catalog
+        self.state = GroupState()
+        self._columns: Dict[str, Tuple[UserRanking, FilmCatalog, np.ndarray]] = {}
+        self._running = False
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def view(self, user_name: str) -> GroupView:
+        return GroupView(self, user_name)
+
+    def poll(self) -> None:
+        """Lance un recalcul dans un thread si l'intervalle est écoulé et qu'aucun n'est en cours."""
+        if self.sources is None or self.catalog is None or time.monotonic() < self._next_refresh:
+            return
+        with self._lock:
+            if self._running or time.monotonic() < self._next_refresh:
+                return
+            self._running = True
+        threading.Thread(target=self._run, name="group-scheduler", daemon=True).start()
+
+    def _run(self) -> None:
+        try:
+            self.refresh(self.sources(), self.catalog())
+        except Exception as e:
+            print(f"⚠️  Classement de groupe non mis à jour: {e}")
+        finally:
+            self._next_refresh = time.monotonic() + self.interval
+            self._running = False
+
+    def _ranking_columns(self, ranking: UserRanking, catalog: FilmCatalog) -> np.ndarray:
+        """Colonnes d'un classement CSV dans le catalogue, gardées tant que le fichier et le catalogue sont inchangés."""
+        cached = self._columns.get(ranking.path)
+        if cached is not None and cached[0] is ranking and cached[1] is catalog:
+            return cached[2]
+        columns = catalog_columns(ranking.descriptions, catalog)
+        self._columns[ranking.path] = (ranking, catalog, columns)
+        return columns
+
+    @timed("group_refresh")
+    def refresh(self, live: Iterable[Source], catalog: FilmCatalog) -> GroupState:
+        """Recalcule le classement de groupe et le publie.
+
+        `live` donne les ratings à jour des utilisateurs en mémoire ; ils remplacent leur fichier CSV.
+        """
+        env = global_env()
+        prior = 1.0 / env.sigma**2
+        precision = np.full(len(catalog), prior)
+        shift = np.full(len(catalog), env.mu * prior)
+
+        messages: Dict[str, Messages] = {}
+        for user_name, ratings in live:
+            mu, sigma = ratings.as_arrays()
+            if len(mu) != len(catalog):
+                continue  # Utilisateur encore sur l'ancienne version du catalogue
+            messages[user_name] = gaussian_messages(np.array(mu), np.array(sigma))
+            precision += messages[user_name][0]
+            shift += messages[user_name][1]
+
+        rankings: List[UserRanking] = load_user_rankings(self.directory)
+        for ranking in rankings:
+            if ranking.user_name in messages:
+                continue
+            columns = self._ranking_columns(ranking, catalog)
+            known = columns >= 0
+            user_precision, user_shift = gaussian_messages(ranking.mu, ranking.sigma)
+            np.add.at(precision, columns[known], user_precision[known])
+            np.add.at(shift, columns[known], user_shift[known])
+
+        paths = {ranking.path for ranking in rankings}
+        for path in set(self._columns) - paths:
+            del self._columns[path]
+
+        self.state = GroupState(self.state.generation + 1, precision, shift, messages)
+        return self.state
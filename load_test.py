@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test de charge de la boucle de comparaison de l'interface web.
+
+Chaque utilisateur virtuel (un thread, ses propres cookies) démarre une session puis enchaîne
+les réponses aléatoires pendant la durée demandée. Affiche le débit (requêtes/s) et les
+latences p50/p95/p99 par route.
+
+    python load_test.py --url http://127.0.0.1:8000 --users 50 --duration 30
+"""
+
+import argparse
+import http.cookiejar
+import json
+import random
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+class VirtualUser(threading.Thread):
+    """Utilisateur simulé : /start, /get_pair puis réponses en boucle jusqu'à l'échéance."""
+
+    def __init__(self, base_url: str, index: int, deadline: float, mode: str):
+        super().__init__(daemon=True)
+        self.base_url = base_url.rstrip("/")
+        self.index = index
+        self.deadline = deadline
+        self.mode = mode
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors = 0
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, route: str, payload: Optional[Dict] = None) -> Optional[Dict]:
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + route, data=data, headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                body = json.loads(response.read())
+        except Exception:
+            self.errors += 1
+            return None
+        finally:
+            self.latencies[route.split("?")[0]].append(time.perf_counter() - start)
+        return body
+
+    def run(self) -> None:
+        started = self.request(
+            "/start", {"user_name": f"loadtest_{self.index}", "max_comparisons": 1000000, "strategy": "active"}
+        )
+        if started is None:
+            return
+        pair = self.request("/get_pair")
+
+        while pair is not None and time.time() < self.deadline:
+            answer = {"film1_id": pair["film1"]["id"], "film2_id": pair["film2"]["id"], "result": random.choice([1, 2, 3])}
+            if self.mode == "compare_next":
+                body = self.request("/compare_next", answer)
+                pair = body.get("next_pair") if body else None
+            else:
+                if self.request("/compare", answer) is None:
+                    break
+                pair = self.request("/get_pair")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(latencies: List[float]) -> Tuple[float, float, float, float]:
+    values = sorted(latencies)
+    return percentile(values, 0.50), percentile(values, 0.95), percentile(values, 0.99), values[-1] if values else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Test de charge de la boucle /compare")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Adresse du serveur (défaut: %(default)s)")
+    parser.add_argument("--users", type=int, default=20, help="Utilisateurs simultanés (défaut: %(default)s)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durée du test en secondes (défaut: %(default)s)")
+    parser.add_argument(
+        "--mode",
+        choices=["compare_next", "compare"],
+        default="compare_next",
+        help="Une requête par réponse (compare_next) ou deux (/compare puis /get_pair)",
+    )
+    args = parser.parse_args()
+
+    start = time.time()
+    users = [VirtualUser(args.url, i, start + args.duration, args.mode) for i in range(args.users)]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.time() - start
+
+    by_route: Dict[str, List[float]] = defaultdict(list)
+    for user in users:
+        for route, values in user.latencies.items():
+            by_route[route].extend(values)
+    total = sum(len(values) for values in by_route.values())
+    errors = sum(user.errors for user in users)
+
+    print(f"🚀 {args.users} utilisateurs, {elapsed:.1f} s, mode {args.mode}")
+    print(f"✓ {total} requêtes ({errors} erreurs), {total / elapsed:.1f} req/s")
+    print(f"{'Route':<16}{'Requêtes':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'max (ms)':>10}")
+    for route in sorted(by_route):
+        p50, p95, p99, worst = summarize(by_route[route])
+        print(
+            f"{route:<16}{len(by_route[route]):>10}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}{worst * 1000:>10.1f}"
+        )
+    p50, p95, p99, worst = summarize([value for values in by_route.values() for value in values])
+    print(f"{'Total':<16}{total:>10}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}{worst * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
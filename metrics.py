@@ -0,0 +1,273 @@
+"""
+Mesures de temps des chemins critiques, exposées au format texte Prometheus.
+
+Les méthodes décorées par `@timed("opération")` alimentent un histogramme par opération ; la
+couche web ajoute un histogramme par route. Désactivé, un appel décoré ne coûte qu'un test
+d'attribut (`registry.enabled`). Activation : `RANKING_METRICS=1` (le serveur web l'active par
+défaut, `RANKING_METRICS=0` le coupe), ou `--metrics` pour l'outil en ligne de commande.
+
+`RANKING_PROFILE=cprofile` ou `RANKING_PROFILE=tracemalloc` capture un profil d'une seule
+session (`SessionProfiler`), écrit dans `profile_<utilisateur>.prof` ou `.txt`.
+"""
+
+import bisect
+import cProfile
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Bornes des histogrammes en secondes (de 10 µs à 10 s)
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Répartition de durées par tranches cumulables (compteur, somme, maximum)."""
+
+    __slots__ = ("counts", "count", "total", "max", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Quantile approché (borne supérieure de la tranche qui le contient)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+class MetricsRegistry:
+    """Histogrammes nommés et étiquetés, plus des jauges calculées à la lecture."""
+
+    def __init__(self, prefix: str = "ranking", enabled: bool = False):
+        self.prefix = prefix
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._help: Dict[str, str] = {}
+        self._counters: Dict[Tuple[str, Labels], int] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, default: bool) -> None:
+        """Active ou non les mesures selon `RANKING_METRICS`, sinon selon `default`."""
+        value = os.environ.get("RANKING_METRICS")
+        self.enabled = default if value is None else value == "1"
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """Ajoute une durée à l'histogramme `name` (sans effet si les mesures sont désactivées)."""
+        if self.enabled:
+            self.histogram(name, **labels).observe(seconds)
+
+    def increment(self, name: str, **labels: str) -> None:
+        """Incrémente un compteur (sans effet si les mesures sont désactivées)."""
+        if self.enabled:
+            key = (name, tuple(sorted(labels.items())))
+            with self._lock:
+                self._counters[key] = self._counters.get(key, 0) + 1
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """Déclare une jauge, lue au moment de l'export."""
+        self._gauges[name] = (help_text, read)
+
+    @contextmanager
+    def time(self, name: str, **labels: str) -> Iterator[None]:
+        """Mesure la durée du bloc."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name, **labels).observe(time.perf_counter() - start)
+
+    def render_prometheus(self) -> str:
+        """Export au format texte Prometheus (version 0.0.4)."""
+        lines: List[str] = []
+        by_name: Dict[str, List[Tuple[Labels, Histogram]]] = {}
+        for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+            by_name.setdefault(name, []).append((labels, histogram))
+
+        for name, entries in by_name.items():
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, histogram in entries:
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{metric}_bucket{format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{metric}_sum{format_labels(labels)} {histogram.total!r}")
+                lines.append(f"{metric}_count{format_labels(labels)} {histogram.count}")
+
+        counter_names = sorted({name for name, _ in self._counters})
+        for name in counter_names:
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {metric} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, labels), value in sorted(self._counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}{format_labels(labels)} {value}")
+
+        for name, (help_text, read) in sorted(self._gauges.items()):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {float(read())!r}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> List[str]:
+        """Récapitulatif lisible des histogrammes (appels, moyenne, p50, p99, max)."""
+        lines = [f"{'Opération':<28}{'Appels':>9}{'Moy. (ms)':>11}{'p50 (ms)':>10}{'p99 (ms)':>10}{'Max (ms)':>10}"]
+        for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+            if not histogram.count:
+                continue
+            label = ",".join(value for _, value in labels) or name
+            lines.append(
+                f"{label:<28}{histogram.count:>9}{histogram.total / histogram.count * 1000:>11.3f}"
+                f"{histogram.quantile(0.5) * 1000:>10.3f}{histogram.quantile(0.99) * 1000:>10.3f}"
+                f"{histogram.max * 1000:>10.3f}"
+            )
+        return lines
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+registry = MetricsRegistry()
+registry.describe("operation_seconds", "Durée des opérations du classement (secondes)")
+registry.describe("request_seconds", "Durée de traitement des requêtes HTTP par route (secondes)")
+registry.describe("requests_total", "Nombre de requêtes HTTP par route et code de réponse")
+
+
+def timed(operation: str) -> Callable[[Callable], Callable]:
+    """Décorateur : durée de chaque appel dans l'histogramme `operation_seconds{operation=...}`."""
+
+    def decorator(func: Callable) -> Callable:
+        histogram: List[Optional[Histogram]] = [None]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if histogram[0] is None:
+                    histogram[0] = registry.histogram("operation_seconds", operation=operation)
+                histogram[0].observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class SessionProfiler:
+    """Profil (cProfile ou tracemalloc) d'une seule session, selon `RANKING_PROFILE`."""
+
+    def __init__(self, mode: Optional[str] = None):
+        mode = mode if mode is not None else os.environ.get("RANKING_PROFILE", "")
+        if mode and mode not in PROFILE_MODES:
+            print(f"⚠️  RANKING_PROFILE inconnu: {mode} (attendu: {', '.join(PROFILE_MODES)})")
+            mode = ""
+        self.mode = mode
+        self.owner: Optional[str] = None  # Session profilée ; une seule par processus
+        self.done = False
+        self._profile: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+
+    def start(self, owner: str) -> bool:
+        """Commence le profil de la session `owner` si aucun n'a encore été pris ; True si c'est le cas."""
+        with self._lock:
+            if not self.mode or self.owner is not None or self.done:
+                return False
+            self.owner = owner
+        if self.mode == "cprofile":
+            self._profile = cProfile.Profile()
+        else:
+            tracemalloc.start(25)
+        print(f"🔍 Profil {self.mode} de la session {owner}")
+        return True
+
+    def active(self, owner: str) -> bool:
+        return self.owner == owner and not self.done
+
+    @contextmanager
+    def run(self, owner: str) -> Iterator[None]:
+        """Ajoute au profil cProfile le traitement en cours s'il concerne la session profilée.
+
+        cProfile ne suit que le thread qui l'active : chaque requête de la session est profilée
+        séparément et cumulée dans le même profil. tracemalloc, lui, suit tout le processus.
+        """
+        if self._profile is None or not self.active(owner):
+            yield
+            return
+        with self._lock:
+            self._profile.enable()
+            try:
+                yield
+            finally:
+                self._profile.disable()
+
+    def stop(self, owner: str) -> Optional[str]:
+        """Termine le profil de la session et l'écrit sur disque ; retourne le chemin du fichier."""
+        if not self.active(owner):
+            return None
+        self.done = True
+        if self.mode == "cprofile":
+            path = f"profile_{owner}.prof"
+            self._profile.dump_stats(path)
+            self._profile = None
+        else:
+            path = f"profile_{owner}.txt"
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"# Pic mémoire: {peak} octets\n")
+                for stat in snapshot.statistics("lineno")[:50]:
+                    f.write(f"{stat}\n")
+        print(f"📁 Profil sauvegardé: {path}")
+        return path
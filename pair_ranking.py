@@ -2,374 +2,359 @@
 """
 Outil de pair ranking pour classer des films selon les préférences utilisateur.
 Utilise TrueSkill pour optimiser le nombre de comparaisons nécessaires.
+
+Point d'entrée de la ligne de commande : sans commande, lance le classement interactif.
+Les commandes `show`, `export`, `aggregate` et `watch` ne font que lire des CSV ; les modules lourds
+(NumPy, TrueSkill, questionary) ne sont importés que par les commandes qui en ont besoin.
 """
 
-import csv
+import argparse
 import json
 import os
-import random
-from datetime import datetime
-from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-
-import questionary
-from trueskill import Rating, rate, setup
-
-
-class PairRankingTool:
-    def __init__(self, source_file: str = "ListeATrier.md"):
-        self.source_file = source_file
-        self.films = []
-        self.user_ratings = {}  # {film_id: Rating}
-        self.comparisons_made = 0
-        self.user_name = ""
-        self.output_file = ""
-
-        # Configuration TrueSkill
-        setup(mu=25.0, sigma=8.333, beta=4.166, tau=0.0833, draw_probability=0.0)
-
-    def load_films(self) -> None:
-        """Charge la liste de films depuis le fichier source."""
-        try:
-            with open(self.source_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            self.films = []
-            for i, line in enumerate(lines):
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    # Format: description \t genre \t catégorie
-                    parts = line.split("\t")
-                    if len(parts) >= 1:
-                        film_data = {
-                            "id": i + 1,
-                            "description": parts[0].strip(),
-                            "genre": parts[1].strip() if len(parts) > 1 else "",
-                            "category": parts[2].strip() if len(parts) > 2 else "",
-                            "rating": Rating(),
-                        }
-                        self.films.append(film_data)
-                        self.user_ratings[film_data["id"]] = film_data["rating"]
-
-            print(f"✓ {len(self.films)} films chargés depuis {self.source_file}")
-
-        except FileNotFoundError:
-            print(f"❌ Fichier {self.source_file} non trouvé")
-            exit(1)
-        except Exception as e:
-            print(f"❌ Erreur lors du chargement: {e}")
-            exit(1)
-
-    def detect_existing_csv(self) -> Optional[str]:
-        """Détecte s'il existe un fichier CSV pour reprendre le classement."""
-        csv_files = []
-        for file in os.listdir("."):
-            if file.startswith("ListeATrier.") and file.endswith(".csv"):
-                # Extraire le nom d'utilisateur du fichier
-                user_name = file.replace("ListeATrier.", "").replace(".csv", "")
-                csv_files.append((file, user_name))
-
-        if not csv_files:
-            return None
-
-        print(f"\n📁 Fichiers CSV existants détectés:")
-        for i, (file, user) in enumerate(csv_files, 1):
-            print(f"  {i}. {file} (utilisateur: {user})")
-
-        choice = questionary.select(
-            "Voulez-vous reprendre un classement existant?",
-            choices=["Nouveau classement"] + [f"Reprendre {user}" for _, user in csv_files],
-        ).ask()
-
-        if choice == "Nouveau classement":
+import sys
+from typing import Dict, List, Optional
+
+
+def rating_options(args: argparse.Namespace) -> Dict:
+    """Options de `PairRankingTool` données sur la ligne de commande (les autres gardent leur défaut)."""
+    options = {
+        "strategy": args.strategy,
+        "backend": args.backend,
+        "fsync_every": args.fsync_every,
+        "target_confidence": args.target,
+        "top_k": args.top_k,
+        "refit": args.refit,
+        "report": args.report,
+        "genre": args.genre,
+        "category": args.category,
+    }
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def run_tool(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    """Classement interactif, ou import en masse (`import`)."""
+    from metrics import SessionProfiler, registry
+    from ranking_tool import PairRankingTool
+
+    registry.configure(default=False)
+    if args.metrics:
+        registry.enabled = True
+
+    try:
+        tool = PairRankingTool(**rating_options(args))
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == "import":
+        import_options = {} if args.batch_size is None else {"batch_size": args.batch_size}
+        tool.run_import(args.file, args.user, fresh=args.fresh, delimiter=args.delimiter, **import_options)
+        tool.report_metrics(SessionProfiler(""))
+    else:
+        tool.run()
+
+
+def load_user_ranking(user_name: Optional[str]):
+    """Classement CSV de l'utilisateur (ou du seul utilisateur présent) ; None après un message d'erreur."""
+    from ranking_csv import list_users, ranking_path, read_ranking
+
+    users = list_users()
+    if user_name is None:
+        if len(users) != 1:
+            print(f"❌ Précisez --user parmi: {', '.join(users) or 'aucun classement trouvé'}", file=sys.stderr)
             return None
-
-        # Trouver le fichier correspondant au choix
-        for i, (file, user) in enumerate(csv_files, 1):
-            if choice == f"Reprendre {user}":
-                return file
-
+        user_name = users[0]
+    try:
+        return read_ranking(ranking_path(user_name))
+    except FileNotFoundError:
+        print(f"❌ Aucun classement pour {user_name} ({ranking_path(user_name)})", file=sys.stderr)
         return None
 
-    def load_existing_ratings(self, csv_file: str) -> None:
-        """Charge les ratings existants depuis un fichier CSV."""
-        try:
-            with open(csv_file, "r", encoding="utf-8") as f:
-                reader = csv.reader(f, delimiter=";")
-
-                # Lire les métadonnées
-                metadata = {}
-                for row in reader:
-                    if row and row[0].startswith("#"):
-                        if "Comparaisons effectuées:" in row[0]:
-                            metadata["comparisons"] = int(row[0].split(":")[1].strip())
-                        elif "utilisateur" in row[0].lower():
-                            metadata["user"] = row[0].split("de")[1].strip()
-                    elif row and row[0] == "Rang":  # En-tête des colonnes
-                        break
-
-                # Lire les données des films
-                for row in reader:
-                    if len(row) >= 7 and row[0].isdigit():
-                        try:
-                            film_id = int(row[0])  # Le rang
-                            mu = float(row[4])  # Score_Mu
-                            sigma = float(row[5])  # Score_Sigma
-
-                            # Trouver le film correspondant par description
-                            for film in self.films:
-                                if film["id"] == film_id:
-                                    # Créer un nouveau Rating avec les valeurs chargées
-                                    film["rating"] = Rating(mu=mu, sigma=sigma)
-                                    self.user_ratings[film["id"]] = film["rating"]
-                                    break
-                        except (ValueError, IndexError):
-                            continue
-
-                # Mettre à jour les métadonnées
-                if "comparisons" in metadata:
-                    self.comparisons_made = metadata["comparisons"]
-                if "user" in metadata:
-                    self.user_name = metadata["user"]
-                    self.output_file = csv_file
-
-                print(f"✓ Classement existant chargé: {self.comparisons_made} comparaisons effectuées")
-                print(f"✓ Utilisateur: {self.user_name}")
-
-        except Exception as e:
-            print(f"❌ Erreur lors du chargement du CSV existant: {e}")
-            print("✓ Démarrage d'un nouveau classement...")
-            self.comparisons_made = 0
-
-    def authenticate_user(self) -> None:
-        """Authentification simple de l'utilisateur."""
-        self.user_name = questionary.text("Entrez votre nom d'utilisateur:").ask()
-
-        if not self.user_name:
-            self.user_name = "Anonyme"
-
-        self.output_file = f"ListeATrier.{self.user_name}.csv"
-        print(f"✓ Utilisateur: {self.user_name}")
-        print(f"✓ Fichier de sortie: {self.output_file}")
-
-    def select_comparison_count(self) -> int:
-        """Permet à l'utilisateur de choisir le nombre de comparaisons."""
-        choices = [
-            ("Rapide (20 comparaisons)", 20),
-            ("Standard (50 comparaisons)", 50),
-            ("Complet (100 comparaisons)", 100),
-            ("Personnalisé", -1),
-        ]
-
-        choice = questionary.select(
-            "Combien de comparaisons souhaitez-vous faire?", choices=[c[0] for c in choices]
-        ).ask()
-
-        if choice == "Personnalisé":
-            count = questionary.text("Nombre de comparaisons:", validate=lambda x: x.isdigit() and int(x) > 0).ask()
-            return int(count)
-
-        for desc, count in choices:
-            if choice == desc:
-                return count
-
-        return 50  # Par défaut
-
-    def get_random_pair(self) -> Tuple[Optional[Dict], Optional[Dict]]:
-        """Sélectionne une paire aléatoire de films pour comparaison."""
-        if len(self.films) < 2:
-            return None, None
-
-        film1, film2 = random.sample(self.films, 2)
-        return film1, film2
-
-    def display_film(self, film: Dict) -> str:
-        """Affiche un film de manière formatée."""
-        return f"{film['genre']} | {film['category']}\n\n  {film['description']}\n"
-
-    def make_comparison(self, film1: Dict, film2: Dict) -> Optional[int]:
-        """Effectue une comparaison entre deux films."""
-        print(f"\n{'='*60}")
-        print(f"Comparaison {self.comparisons_made + 1}")
-        print(f"{'='*60}")
-
-        print(f"\n🎬 FILM A: {self.display_film(film1)}")
-        print(f"\n🎬 FILM B: {self.display_film(film2)}")
-
-        choice = questionary.select(
-            "\nQuel film préférez-vous?",
-            choices=["Film A", "Film B", "Égalité", "Passer cette comparaison", "Arrêter le classement"],
-        ).ask()
-
-        if choice == "Arrêter le classement":
-            return None
-        elif choice == "Passer cette comparaison":
-            return 0
-        elif choice == "Film A":
-            return 1
-        elif choice == "Film B":
-            return 2
-        elif choice == "Égalité":
-            return 3
 
+def ranking_entries(ranking, args: argparse.Namespace) -> List[Dict]:
+    """Films du classement, restreints au genre et/ou à la catégorie demandés, puis aux `--top` premiers."""
+    from film_catalog import facet_matches
+
+    entries = ranking.entries
+    if args.genre or args.category:
+        # Rangs renumérotés dans la facette, comme les vues filtrées de l'interface web
+        entries = [
+            {**entry, "rank": rank}
+            for rank, entry in enumerate(
+                (
+                    entry
+                    for entry in entries
+                    if facet_matches(entry["genre"], args.genre) and facet_matches(entry["category"], args.category)
+                ),
+                1,
+            )
+        ]
+    return entries[: args.top]
+
+
+def show_ranking(args: argparse.Namespace) -> int:
+    """Affiche le classement d'un utilisateur."""
+    ranking = load_user_ranking(args.user)
+    if ranking is None:
+        return 1
+    for line in ranking.header:
+        print(line.lstrip("# "))
+    print()
+    for entry in ranking_entries(ranking, args):
+        print(f"{entry['rank']:>4}. [{entry['score_mu']:.2f} ± {entry['score_sigma']:.2f}] {entry['description']}")
+    return 0
+
+
+def export_ranking(args: argparse.Namespace) -> int:
+    """Exporte le classement d'un utilisateur en JSON ou NDJSON (sortie standard ou fichier)."""
+    ranking = load_user_ranking(args.user)
+    if ranking is None:
+        return 1
+    entries = ranking_entries(ranking, args)
+    if args.format == "ndjson":
+        text = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    else:
+        text = json.dumps({"header": ranking.header, "results": entries}, ensure_ascii=False, indent=2) + "\n"
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"✓ {len(entries)} films exportés dans {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+def aggregate_rankings(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """Classement de groupe (mêmes options que `aggregation.py`)."""
+    from aggregation import run_aggregation
+
+    options = {"method": args.method, "top": args.top, "directory": args.directory, "output": args.output}
+    try:
+        run_aggregation(**{name: value for name, value in options.items() if value is not None})
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+
+def snapshot_user(user_name: Optional[str]) -> Optional[str]:
+    """Utilisateur demandé, ou le seul utilisateur ayant des versions enregistrées ; None après un message d'erreur."""
+    from snapshot_store import SNAPSHOT_DIR
+
+    if user_name is not None:
+        return user_name
+    users = sorted(os.listdir(SNAPSHOT_DIR)) if os.path.isdir(SNAPSHOT_DIR) else []
+    if len(users) != 1:
+        print(f"❌ Précisez --user parmi: {', '.join(users) or 'aucune version enregistrée'}", file=sys.stderr)
+        return None
+    return users[0]
+
+
+def show_history(args: argparse.Namespace) -> int:
+    """Liste les versions enregistrées du classement d'un utilisateur."""
+    from snapshot_store import SnapshotStore
+
+    user_name = snapshot_user(args.user)
+    if user_name is None:
+        return 1
+    try:
+        history = SnapshotStore().history(user_name)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if not history:
+        print(f"❌ Aucune version enregistrée pour {user_name}", file=sys.stderr)
+        return 1
+    for entry in history:
+        print(f"{entry['version']:>6}  {entry['created']}  {entry['comparisons']:>6} comparaisons  {entry['films']} films")
+    return 0
+
+
+def show_diff(args: argparse.Namespace) -> int:
+    """Films déplacés entre deux versions du classement d'un utilisateur."""
+    from film_catalog import FilmCatalog
+    from snapshot_store import SnapshotStore
+
+    user_name = snapshot_user(args.user)
+    if user_name is None:
+        return 1
+    try:
+        diff = SnapshotStore().diff(user_name, getattr(args, "from"), args.to)
+        catalog = FilmCatalog.from_file(args.source)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    def describe(film_id: int) -> str:
+        film = catalog.get(film_id)
+        return film.description if film is not None else f"#{film_id}"
+
+    print(f"🔄 {user_name}: version {diff.old.version} → {diff.new.version}")
+    for move in diff.moves(limit=args.top):
+        print(
+            f"{move['old_rank']:>5} → {move['new_rank']:<5} ({move['shift']:+d}, mu {move['mu_change']:+.2f}) "
+            f"{describe(move['id'])}"
+        )
+    for label, film_ids in (("ajouté", diff.added), ("retiré", diff.removed)):
+        for film_id in film_ids.tolist():
+            print(f"  {label}: {describe(film_id)}")
+    return 0
+
+
+def plan_watch(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """Ordre de visionnage des spectateurs présents et films vus (même fichier que l'interface web)."""
+    from film_catalog import FilmCatalog
+    from watch_planner import DEFAULT_COUNT, WatchPlanner
+
+    try:
+        catalog = FilmCatalog.from_file(args.source)
+    except FileNotFoundError:
+        print(f"❌ Fichier {args.source} non trouvé", file=sys.stderr)
+        return 1
+    planner = WatchPlanner(catalog)
+
+    if args.watch_command in ("mark", "unmark"):
+        status = 0
+        for reference in args.films:
+            film = catalog.find(reference)
+            if film is None:
+                print(f"❌ Film non trouvé: {reference}", file=sys.stderr)
+                status = 1
+            elif planner.mark_watched(film, args.watch_command == "mark"):
+                print(f"✓ {film.description} {'vu' if args.watch_command == 'mark' else 'à revoir'}")
+            else:
+                print(f"⚠️  {film.description} déjà {'vu' if args.watch_command == 'mark' else 'non vu'}")
+        return status
+
+    if args.watch_command == "list":
+        for entry in planner.watched_films():
+            print(f"{entry['watched_at']}  {entry['description']}")
         return 0
 
-    def update_ratings(self, film1: Dict, film2: Dict, result: int) -> None:
-        """Met à jour les ratings TrueSkill selon le résultat de la comparaison."""
-        if result == 0:  # Passer
-            return
-
-        rating1 = self.user_ratings[film1["id"]]
-        rating2 = self.user_ratings[film2["id"]]
-
-        new_rating1 = None
-        new_rating2 = None
-
-        if result == 1:  # Film A gagne
-            new_rating1, new_rating2 = rate([(rating1,), (rating2,)])
-        elif result == 2:  # Film B gagne
-            new_rating2, new_rating1 = rate([(rating2,), (rating1,)])
-        elif result == 3:  # Égalité
-            new_rating1, new_rating2 = rate([(rating1,), (rating2,)], ranks=[0, 0])
-
-        if new_rating1 is not None and new_rating2 is not None:
-            self.user_ratings[film1["id"]] = new_rating1[0]
-            self.user_ratings[film2["id"]] = new_rating2[0]
-
-            # Mettre à jour les films
-            film1["rating"] = new_rating1[0]
-            film2["rating"] = new_rating2[0]
-
-    def save_progress(self) -> None:
-        """Sauvegarde le progrès actuel."""
-        # Sauvegarde des ratings en JSON pour reprise possible
-        progress_file = f"progress_{self.user_name}.json"
-        progress_data = {
-            "user_name": self.user_name,
-            "comparisons_made": self.comparisons_made,
-            "ratings": {
-                str(film_id): {"mu": rating.mu, "sigma": rating.sigma} for film_id, rating in self.user_ratings.items()
-            },
-            "timestamp": datetime.now().isoformat(),
-        }
-
-        with open(progress_file, "w", encoding="utf-8") as f:
-            json.dump(progress_data, f, indent=2)
-
-    def generate_ranking(self) -> List[Dict]:
-        """Génère la liste finale triée par rating."""
-        # Trier par mu (rating moyen) décroissant
-        sorted_films = sorted(self.films, key=lambda x: x["rating"].mu, reverse=True)
-        return sorted_films
-
-    def save_final_ranking(self, ranked_films: List[Dict]) -> None:
-        """Sauvegarde le classement final au format CSV."""
-        with open(self.output_file, "w", encoding="utf-8", newline="") as f:
-            writer = csv.writer(f, delimiter=";")
-
-            # En-tête avec métadonnées
-            writer.writerow([f"# Classement personnel de {self.user_name}"])
-            writer.writerow([f"# Généré le: {datetime.now().strftime('%d/%m/%Y à %H:%M')}"])
-            writer.writerow([f"# Comparaisons effectuées: {self.comparisons_made}"])
-            writer.writerow([f"# Score de confiance moyen: {self.calculate_confidence():.2f}"])
-            writer.writerow([])  # Ligne vide
-
-            # En-têtes des colonnes
-            writer.writerow(["Rang", "Description", "Genre", "Catégorie", "Score_Mu", "Score_Sigma", "Score_Confiance"])
-
-            # Données des films
-            for i, film in enumerate(ranked_films, 1):
-                confidence = max(0, 1 - (film["rating"].sigma / 8.333))  # Score de confiance individuel
-                writer.writerow(
-                    [
-                        i,
-                        film["description"],
-                        film["genre"],
-                        film["category"],
-                        f"{film['rating'].mu:.2f}",
-                        f"{film['rating'].sigma:.2f}",
-                        f"{confidence:.2f}",
-                    ]
-                )
-
-        print(f"✓ Classement sauvegardé dans {self.output_file}")
-
-    def calculate_confidence(self) -> float:
-        """Calcule un score de confiance basé sur la variance des ratings."""
-        if not self.user_ratings:
-            return 0.0
-
-        # Score basé sur l'inverse de la variance moyenne
-        avg_sigma = sum(rating.sigma for rating in self.user_ratings.values()) / len(self.user_ratings)
-        return max(0, 1 - (avg_sigma / 8.333))  # Normalisé par rapport à sigma initial
-
-    def run(self) -> None:
-        """Lance l'outil de pair ranking."""
-        print("🎬 Outil de Pair Ranking pour Films")
-        print("=" * 40)
-
-        # Chargement des données
-        self.load_films()
-
-        # Détection et chargement d'un classement existant
-        existing_csv = self.detect_existing_csv()
-        if existing_csv:
-            self.load_existing_ratings(existing_csv)
-        else:
-            self.authenticate_user()
-
-        # S'assurer qu'un fichier de sortie est défini
-        if not self.output_file:
-            self.output_file = f"ListeATrier.{self.user_name}.csv"
-
-        # Configuration du nombre de comparaisons
-        max_comparisons = self.select_comparison_count()
-
-        print(f"\n✓ Prêt à commencer! {max_comparisons} comparaisons maximum.")
-        if self.comparisons_made > 0:
-            print(f"✓ Reprise: {self.comparisons_made} comparaisons déjà effectuées")
-        print("Appuyez sur Entrée pour commencer...")
-        input()
-
-        # Boucle principale de comparaisons
-        while self.comparisons_made < max_comparisons:
-            film1, film2 = self.get_random_pair()
-            if not film1 or not film2:
-                break
-
-            result = self.make_comparison(film1, film2)
-
-            if result is None:  # Arrêt demandé
-                break
-
-            if result > 0:  # Comparaison valide
-                self.update_ratings(film1, film2, result)
-                self.comparisons_made += 1
-
-                # Sauvegarde après chaque comparaison
-                self.save_progress()
-
-                print(f"✓ Comparaison {self.comparisons_made}/{max_comparisons} terminée")
-
-        # Génération du classement final
-        if self.comparisons_made > 0:
-            print(f"\n🎯 Génération du classement final...")
-            ranked_films = self.generate_ranking()
-            self.save_final_ranking(ranked_films)
-        else:
-            print(f"\n⚠️  Aucune comparaison effectuée. Aucun classement généré.")
-            return
-
-        # Nettoyage
-        progress_file = f"progress_{self.user_name}.json"
-        if os.path.exists(progress_file):
-            os.remove(progress_file)
-
-        print(f"\n✅ Classement terminé!")
-        print(f"📊 {self.comparisons_made} comparaisons effectuées")
-        print(f"📁 Résultat sauvegardé: {self.output_file}")
+    attendees = [name.strip() for name in (getattr(args, "users", None) or "").split(",") if name.strip()]
+    try:
+        results = planner.next_films(attendees, getattr(args, "count", None) or DEFAULT_COUNT)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"🎯 Prochains films pour {', '.join(attendees or planner.users())}:")
+    for entry in results:
+        print(f"{entry['rank']:>4}. [{entry['score_mu']:.2f} ± {entry['score_sigma']:.2f}] {entry['description']}")
+    return 0
+
+
+def add_facet_arguments(parser: argparse.ArgumentParser, action: str, default=None) -> None:
+    """Options --genre et --category (« SF » couvre aussi « SF-Épopée », « SF-Réaliste »...)."""
+    parser.add_argument("--genre", default=default, help=f"{action} les films de ce genre")
+    parser.add_argument("--category", default=default, help=f"{action} les films de cette catégorie")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Pas de `choices` ni de défauts importés : la validation est faite par les fabriques (create_selector, ...)
+    parser = argparse.ArgumentParser(description="Outil de pair ranking pour films")
+    parser.add_argument(
+        "--strategy", help="Stratégie de sélection des paires: active (défaut), quality, random, topk, group, cross"
+    )
+    parser.add_argument("--backend", help="Backend de calcul des ratings: numpy (défaut) ou trueskill")
+    parser.add_argument(
+        "--fsync-every",
+        type=int,
+        default=1,
+        help="Nombre de réponses entre deux fsync du journal (défaut: %(default)s)",
+    )
+    parser.add_argument("--target", type=float, help="Confiance d'ordre visée par le mode automatique (défaut: 0.6)")
+    parser.add_argument("--top-k", type=int, help="Taille du top avec la stratégie topk (défaut: 10)")
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Mesurer le temps des opérations et l'afficher en fin de session (ou RANKING_METRICS=1)",
+    )
+    parser.add_argument(
+        "--refit",
+        action="store_true",
+        default=None,
+        help="Réajuster les scores sur tout l'historique (Bradley–Terry) avant le classement final",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        default=None,
+        help="Ajouter au CSV final l'intervalle de rangs et la probabilité de top-K de chaque film (tirages Monte-Carlo)",
+    )
+    add_facet_arguments(parser, "Ne comparer (ou n'afficher) que")
+    subparsers = parser.add_subparsers(dest="command", metavar="commande")
+
+    import_parser = subparsers.add_parser(
+        "import", help="Importer sans interaction un fichier de comparaisons (film A, film B, résultat)"
+    )
+    import_parser.add_argument("file", help="Fichier CSV: film A, film B, résultat (1/A, 2/B, 3/=, 0)")
+    import_parser.add_argument("--user", required=True, help="Utilisateur dont le classement est mis à jour")
+    import_parser.add_argument(
+        "--fresh", action="store_true", help="Ignorer le classement existant de l'utilisateur"
+    )
+    import_parser.add_argument("--delimiter", help="Séparateur du fichier (détecté automatiquement par défaut)")
+    import_parser.add_argument(
+        "--batch-size", type=int, help="Comparaisons appliquées et journalisées par lot (défaut: 10000)"
+    )
+
+    show_parser = subparsers.add_parser("show", help="Afficher le classement d'un utilisateur")
+    show_parser.add_argument("--user", help="Utilisateur (facultatif s'il n'y a qu'un classement)")
+    show_parser.add_argument("--top", type=int, help="N'afficher que les N premiers films")
+    # SUPPRESS : sans l'option ici, la valeur donnée avant la commande est gardée
+    add_facet_arguments(show_parser, "N'afficher que", argparse.SUPPRESS)
+
+    export_parser = subparsers.add_parser("export", help="Exporter le classement d'un utilisateur en JSON")
+    export_parser.add_argument("--user", help="Utilisateur (facultatif s'il n'y a qu'un classement)")
+    export_parser.add_argument("--format", choices=("json", "ndjson"), default="json", help="Format (défaut: %(default)s)")
+    export_parser.add_argument("--top", type=int, help="N'exporter que les N premiers films")
+    export_parser.add_argument("--output", help="Fichier de sortie (défaut: sortie standard)")
+    add_facet_arguments(export_parser, "N'exporter que", argparse.SUPPRESS)
+
+    aggregate_parser = subparsers.add_parser("aggregate", help="Classement de groupe de tous les utilisateurs")
+    aggregate_parser.add_argument("--method", help="Méthode d'agrégation: weighted (défaut) ou borda")
+    aggregate_parser.add_argument("--top", type=int, help="N'afficher que les N premiers films")
+    aggregate_parser.add_argument("--directory", help="Dossier contenant les classements individuels")
+    aggregate_parser.add_argument("--output", help="Fichier CSV de sortie (défaut: ClassementGroupe.csv)")
+
+    history_parser = subparsers.add_parser("history", help="Versions enregistrées du classement d'un utilisateur")
+    history_parser.add_argument("--user", help="Utilisateur (facultatif s'il n'y en a qu'un)")
+
+    diff_parser = subparsers.add_parser("diff", help="Films déplacés entre deux versions d'un classement")
+    diff_parser.add_argument("--user", help="Utilisateur (facultatif s'il n'y en a qu'un)")
+    diff_parser.add_argument("--from", type=int, help="Version de départ (défaut: l'avant-dernière)")
+    diff_parser.add_argument("--to", type=int, help="Version d'arrivée (défaut: la dernière)")
+    diff_parser.add_argument("--top", type=int, help="N'afficher que les N plus grands déplacements")
+    diff_parser.add_argument("--source", default="ListeATrier.md", help="Liste des films (défaut: %(default)s)")
+
+    watch_parser = subparsers.add_parser("watch", help="Ordre de visionnage du groupe et films vus")
+    watch_parser.add_argument("--source", default="ListeATrier.md", help="Liste des films (défaut: %(default)s)")
+    watch_commands = watch_parser.add_subparsers(dest="watch_command", metavar="action")
+    next_parser = watch_commands.add_parser("next", help="Prochains films non vus (action par défaut)")
+    next_parser.add_argument("--users", help="Spectateurs présents, séparés par des virgules (défaut: tous)")
+    next_parser.add_argument("--count", type=int, help="Nombre de films proposés (défaut: 5)")
+    for action, help_text in (("mark", "Marquer des films comme vus"), ("unmark", "Retirer des films vus")):
+        mark_parser = watch_commands.add_parser(action, help=help_text)
+        mark_parser.add_argument("films", nargs="+", help="Identifiant ou description de chaque film")
+    watch_commands.add_parser("list", help="Afficher les films vus")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "show":
+        return show_ranking(args)
+    if args.command == "export":
+        return export_ranking(args)
+    if args.command == "aggregate":
+        return aggregate_rankings(args, parser)
+    if args.command == "history":
+        return show_history(args)
+    if args.command == "diff":
+        return show_diff(args)
+    if args.command == "watch":
+        return plan_watch(args, parser)
+    run_tool(args, parser)
+    return 0
 
 
 if __name__ == "__main__":
-    tool = PairRankingTool()
-    tool.run()
+    sys.exit(main())
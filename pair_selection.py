@@ -0,0 +1,416 @@
+"""
+Stratégies de sélection des paires de films à comparer.
+
+- "random"  : tirage uniforme (comportement historique)
+- "active"  : paire qui maximise la baisse attendue de variance (apprentissage actif)
+- "quality" : paire la plus incertaine selon `quality_1vs1` de TrueSkill (probabilité de match nul)
+- "topk"    : apprentissage actif concentré sur les films proches de la frontière du top-K
+- "group"   : apprentissage actif concentré sur les paires que le classement de groupe n'a pas encore tranchées
+- "cross"   : apprentissage actif limité aux paires de films de catégories (ou genres) différentes
+
+Les stratégies actives gardent un tas de paires candidates (voisines dans l'ordre des mu),
+rafraîchi uniquement pour les deux films touchés par chaque mise à jour.
+
+`PairQueue` précalcule quelques paires à l'avance (interface web : la paire suivante est
+envoyée avec la réponse précédente).
+"""
+
+import heapq
+import itertools
+import math
+import random
+from collections import deque
+from typing import Deque, Dict, List, Mapping, Optional, Tuple
+
+from trueskill import Rating, global_env, quality_1vs1
+
+from film_catalog import Film
+from sorted_index import SortedIndex
+from top_k import DEFAULT_TOP_K, TopKTracker
+
+DEFAULT_STRATEGY = "active"
+
+FACETS = ("category", "genre")
+
+
+def expected_variance_drop(rating1: Rating, rating2: Rating) -> float:
+    """Baisse attendue de sigma² cumulée sur les deux films si on les compare."""
+    env = global_env()
+    var1, var2 = rating1.sigma**2, rating2.sigma**2
+    c2 = 2 * env.beta**2 + var1 + var2
+    t = (rating1.mu - rating2.mu) / math.sqrt(c2)
+
+    # Espérance de w sur les deux issues possibles (A gagne / B gagne)
+    expected_w = 0.0
+    for x in (t, -t):
+        p = env.cdf(x)
+        if p > 1e-12:
+            v = env.pdf(x) / p
+            expected_w += p * v * (v + x)
+
+    return (var1**2 + var2**2) / c2 * expected_w
+
+
+class PairSelector:
+    """Stratégie de base : tirage aléatoire uniforme d'une paire."""
+
+    name = "random"
+
+    def __init__(self):
+        self.films: List[Film] = []
+        self.ratings: Mapping[int, Rating] = {}
+
+    def reset(self, films: List[Film], ratings: Mapping[int, Rating]) -> None:
+        """(Ré)initialise la stratégie sur une liste de films et leurs ratings."""
+        self.films = films
+        self.ratings = ratings
+
+    def notify(self, film1: Film, film2: Film) -> None:
+        """Signale que les ratings de deux films viennent d'être mis à jour."""
+
+    def release(self, film1: Film, film2: Film) -> None:
+        """Rend une paire obtenue par `next_pair` mais finalement pas proposée."""
+
+    def memory_size(self) -> int:
+        """Estimation de la mémoire occupée par les structures propres à la stratégie."""
+        return 0
+
+    def next_pair(self) -> Tuple[Optional[Film], Optional[Film]]:
+        """Retourne la prochaine paire à comparer."""
+        if len(self.films) < 2:
+            return None, None
+        film1, film2 = random.sample(self.films, 2)
+        return film1, film2
+
+
+class ActiveSelector(PairSelector):
+    """Apprentissage actif : paire qui apporte le plus d'information attendue."""
+
+    name = "active"
+
+    def __init__(self, window: int = 16):
+        super().__init__()
+        self.window = window
+        self._films_by_id: Dict[int, Film] = {}
+        self._index = SortedIndex()
+        self._heap: List[Tuple] = []
+        self._live: Dict[Tuple[int, int], int] = {}  # {paire: jeton de la dernière entrée poussée}
+        self._version: Dict[int, int] = {}
+        self._tokens = itertools.count()
+        self._last_pair: Optional[Tuple[int, int]] = None
+
+    def score(self, rating1: Rating, rating2: Rating) -> float:
+        """Intérêt d'une comparaison entre deux films (plus grand = plus utile)."""
+        return expected_variance_drop(rating1, rating2)
+
+    def reset(self, films: List[Film], ratings: Mapping[int, Rating]) -> None:
+        super().reset(films, ratings)
+        self._films_by_id = {film.id: film for film in films}
+        self._version = {film.id: 0 for film in films}
+        self._last_pair = None
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Reconstruit l'index trié et le tas de candidats."""
+        self._index = SortedIndex()
+        for film_id in self._films_by_id:
+            self._index.add(-self.ratings[film_id].mu, film_id)
+
+        self._heap = []
+        self._live = {}
+        for pos, (_, film_id) in enumerate(self._index):
+            for _, other in self._index.slice(pos + 1, pos + self.window + 1):
+                self._push(film_id, other)
+
+    def memory_size(self) -> int:
+        # Ordres de grandeur CPython : tuple d'entrée du tas ~150 o, entrée de dict ~100 o
+        return 150 * len(self._heap) + 100 * (len(self._live) + 2 * len(self._index))
+
+    def _push(self, id1: int, id2: int) -> None:
+        """Ajoute (ou rafraîchit) une paire candidate dans le tas."""
+        if id1 == id2:
+            return
+        key = (id1, id2) if id1 < id2 else (id2, id1)
+        token = next(self._tokens)
+        self._live[key] = token
+        score = self.score(self.ratings[key[0]], self.ratings[key[1]])
+        # Le tirage aléatoire départage les ex-aequo (ex: tous les films au rating initial)
+        entry = (-score, random.random(), token, key[0], key[1], self._version[key[0]], self._version[key[1]])
+        heapq.heappush(self._heap, entry)
+
+    def release(self, film1: Film, film2: Film) -> None:
+        self._push(film1.id, film2.id)
+
+    def _is_valid(self, entry: Tuple) -> bool:
+        _, _, token, id1, id2, version1, version2 = entry
+        return (
+            self._live.get((id1, id2)) == token
+            and self._version[id1] == version1
+            and self._version[id2] == version2
+        )
+
+    def notify(self, film1: Film, film2: Film) -> None:
+        # Un film absent de la liste de `reset` (autre facette) n'a pas de candidats à rafraîchir
+        moved = [film_id for film_id in (film1.id, film2.id) if film_id in self._version]
+        for film_id in moved:
+            self._version[film_id] += 1
+
+        for film_id in moved:
+            pos = self._index.position(film_id)
+            self._index.discard(film_id)
+            # Les voisins de part et d'autre du trou deviennent voisins entre eux
+            for i in range(max(0, pos - self.window), pos):
+                if i + self.window < len(self._index):
+                    self._push(self._index[i][1], self._index[i + self.window][1])
+            self._index.add(-self.ratings[film_id].mu, film_id)
+
+        for film_id in moved:
+            for other in self._index.neighbors(film_id, self.window):
+                self._push(film_id, other)
+
+        # Compacter le tas quand les entrées périmées dominent
+        if len(self._heap) > 4 * len(self._live) + 64:
+            self._heap = [entry for entry in self._heap if self._is_valid(entry)]
+            heapq.heapify(self._heap)
+
+    def _pop_valid(self) -> Optional[Tuple]:
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if self._is_valid(entry):
+                del self._live[(entry[3], entry[4])]
+                return entry
+        return None
+
+    def next_pair(self) -> Tuple[Optional[Film], Optional[Film]]:
+        if len(self.films) < 2:
+            return None, None
+
+        entry = self._pop_valid()
+        if entry is None:
+            self._rebuild()
+            entry = self._pop_valid()
+
+        # Éviter de reproposer immédiatement la paire qui vient d'être jugée
+        if entry is not None and (entry[3], entry[4]) == self._last_pair:
+            repeated = entry
+            entry = self._pop_valid() or repeated
+            if entry is not repeated:
+                self._live[(repeated[3], repeated[4])] = repeated[2]
+                heapq.heappush(self._heap, repeated)
+
+        if entry is None:
+            return super().next_pair()
+
+        self._last_pair = (entry[3], entry[4])
+        return self._films_by_id[entry[3]], self._films_by_id[entry[4]]
+
+
+class QualitySelector(ActiveSelector):
+    """Paire dont le match nul est le plus probable (`quality_1vs1` maximale)."""
+
+    name = "quality"
+
+    def score(self, rating1: Rating, rating2: Rating) -> float:
+        return quality_1vs1(rating1, rating2)
+
+
+class TopKSelector(ActiveSelector):
+    """Apprentissage actif pondéré par la probabilité que les films changent de côté de la frontière du top-K."""
+
+    name = "topk"
+
+    def __init__(self, window: int = 16, top_k: int = DEFAULT_TOP_K):
+        super().__init__(window)
+        self.top = TopKTracker(top_k)
+
+    def score(self, rating1: Rating, rating2: Rating) -> float:
+        # Un film dont l'intervalle de crédibilité ne touche pas la frontière n'apporte presque rien
+        weight = self.top.straddle_probability(rating1) + self.top.straddle_probability(rating2)
+        return expected_variance_drop(rating1, rating2) * weight
+
+    def reset(self, films: List[Film], ratings: Mapping[int, Rating]) -> None:
+        self.top.reset(films, ratings)
+        super().reset(films, ratings)
+
+    def memory_size(self) -> int:
+        return super().memory_size() + self.top.memory_size()
+
+    def notify(self, film1: Film, film2: Film) -> None:
+        edge = (self.top.last_inside(), self.top.first_outside())
+        self.top.notify(film1, film2)
+        super().notify(film1, film2)
+
+        # La frontière a changé de films : rafraîchir les candidats autour d'elle
+        for film_id in (self.top.last_inside(), self.top.first_outside()):
+            if film_id is not None and film_id not in edge:
+                for other in self._index.neighbors(film_id, self.window):
+                    self._push(film_id, other)
+
+    def _pop_valid(self) -> Optional[Tuple]:
+        # Les scores du tas dépendent de la frontière au moment où ils ont été calculés :
+        # une entrée qui a perdu de son intérêt est réévaluée avant d'être retenue
+        for _ in range(4 * self.window):
+            entry = super()._pop_valid()
+            if entry is None or not self._heap:
+                return entry
+            score = self.score(self.ratings[entry[3]], self.ratings[entry[4]])
+            if score >= -self._heap[0][0]:
+                return entry
+            self._push(entry[3], entry[4])
+        return super()._pop_valid()
+
+
+class GroupSelector(ActiveSelector):
+    """Apprentissage actif pondéré par l'incertitude du classement de groupe sur chaque paire.
+
+    `group` fournit `pair_weights(indices1, indices2)` : pour chaque paire, un poids élevé si les
+    autres utilisateurs n'ont pas tranché l'ordre des deux films, faible sinon. Les poids changent
+    avec le groupe, indépendamment des réponses de l'utilisateur : ils ne sont pas gardés dans le tas
+    mais appliqués, en un seul calcul, aux meilleures paires candidates au moment du choix.
+    Sans `group`, la stratégie se comporte comme "active".
+    """
+
+    name = "group"
+
+    def __init__(self, window: int = 16, group=None, candidates: int = 32):
+        super().__init__(window)
+        self.group = group
+        self.candidates = candidates
+
+    def _pop_valid(self) -> Optional[Tuple]:
+        if self.group is None:
+            return super()._pop_valid()
+
+        entries = []
+        while len(entries) < self.candidates:
+            entry = super()._pop_valid()
+            if entry is None:
+                break
+            entries.append(entry)
+        if not entries:
+            return None
+
+        weights = self.group.pair_weights(
+            [self._films_by_id[entry[3]].index for entry in entries],
+            [self._films_by_id[entry[4]].index for entry in entries],
+        )
+        best = max(range(len(entries)), key=lambda i: -entries[i][0] * weights[i])
+        for i, entry in enumerate(entries):
+            if i != best:
+                self._live[(entry[3], entry[4])] = entry[2]
+                heapq.heappush(self._heap, entry)
+        return entries[best]
+
+
+class PairQueue:
+    """Quelques paires précalculées, deux à deux disjointes, invalidées quand leurs films changent de rating."""
+
+    # Paires candidates examinées au plus par remplissage (les meilleures partagent souvent un même film)
+    max_attempts = 64
+
+    def __init__(self, selector: PairSelector, size: int = 2):
+        self.selector = selector
+        self.size = size
+        self._pairs: Deque[Tuple[Film, Film]] = deque()
+        self._issued: Tuple[Film, ...] = ()  # Paire proposée, en attente de réponse
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def reset(self, selector: Optional[PairSelector] = None) -> None:
+        """Vide la file (et change de stratégie si besoin)."""
+        if selector is not None:
+            self.selector = selector
+        self._pairs.clear()
+        self._issued = ()
+
+    def _films(self) -> set:
+        return {film.id for pair in self._pairs for film in pair} | {film.id for film in self._issued}
+
+    def fill(self) -> None:
+        """Complète la file avec des paires qui ne partagent aucun film avec celles déjà prévues ou proposées."""
+        queued = self._films()
+        rejected = []
+        for _ in range(self.max_attempts):
+            if len(self._pairs) >= self.size:
+                break
+            film1, film2 = self.selector.next_pair()
+            if film1 is None or film2 is None:
+                break
+            if film1.id in queued or film2.id in queued:
+                rejected.append((film1, film2))
+                continue
+            self._pairs.append((film1, film2))
+            queued.update((film1.id, film2.id))
+
+        for film1, film2 in rejected:
+            self.selector.release(film1, film2)
+
+        # À défaut, tirage aléatoire parmi les films libres
+        if len(self._pairs) < self.size:
+            free = [film for film in self.selector.films if film.id not in queued]
+            while len(self._pairs) < self.size and len(free) >= 2:
+                film1, film2 = random.sample(free, 2)
+                self._pairs.append((film1, film2))
+                free = [film for film in free if film is not film1 and film is not film2]
+
+    def pop(self) -> Tuple[Optional[Film], Optional[Film]]:
+        """Retire et retourne la prochaine paire à proposer."""
+        if not self._pairs:
+            self.fill()
+        if not self._pairs:
+            return None, None
+        pair = self._pairs.popleft()
+        self._issued = pair
+        self.fill()
+        return pair
+
+    def peek(self) -> Tuple[Optional[Film], Optional[Film]]:
+        """Paire qui suivra (disjointe de celle retournée par le dernier `pop`), sans la retirer."""
+        if not self._pairs:
+            self.fill()
+        return self._pairs[0] if self._pairs else (None, None)
+
+    def invalidate(self, film1: Film, film2: Film) -> None:
+        """Oublie les paires qui touchent deux films dont les ratings viennent de changer."""
+        changed = {film1.id, film2.id}
+        if {film.id for film in self._issued} == changed:
+            self._issued = ()
+        kept = [pair for pair in self._pairs if pair[0].id not in changed and pair[1].id not in changed]
+        if len(kept) != len(self._pairs):
+            self._pairs = deque(kept)
+
+
+class CrossFacetSelector(ActiveSelector):
+    """Apprentissage actif limité aux paires dont les deux films sont de facettes différentes.
+
+    Des comparaisons faites surtout à l'intérieur de chaque catégorie ne disent pas comment les
+    catégories se placent les unes par rapport aux autres : cette stratégie les compare entre elles.
+    """
+
+    name = "cross"
+
+    def __init__(self, window: int = 16, facet: str = "category"):
+        if facet not in FACETS:
+            raise ValueError(f"Facette inconnue: {facet} (disponibles: {', '.join(FACETS)})")
+        super().__init__(window)
+        self.facet = facet
+
+    def _push(self, id1: int, id2: int) -> None:
+        film1, film2 = self._films_by_id[id1], self._films_by_id[id2]
+        if getattr(film1, self.facet) != getattr(film2, self.facet):
+            super()._push(id1, id2)
+
+
+SELECTORS = {
+    cls.name: cls
+    for cls in (PairSelector, ActiveSelector, QualitySelector, TopKSelector, GroupSelector, CrossFacetSelector)
+}
+
+
+def create_selector(name: str = DEFAULT_STRATEGY, **options) -> PairSelector:
+    """Instancie une stratégie de sélection à partir de son nom (options passées au constructeur)."""
+    selector_class = SELECTORS.get(name)
+    if selector_class is None:
+        raise ValueError(f"Stratégie de sélection inconnue: {name} (disponibles: {', '.join(SELECTORS)})")
+    return selector_class(**options)
@@ -0,0 +1,260 @@
+"""
+Incertitude du classement final par tirages de Monte-Carlo dans la loi de chaque film.
+
+Chaque tirage donne à chaque film un score dans sa loi N(mu, sigma²) et en déduit un classement
+complet. Sur quelques milliers de tirages, chaque film obtient un intervalle de rangs (90 % des
+tirages par défaut) et sa probabilité d'être dans le top-K.
+
+Les tirages sont vectorisés (une matrice tirages × films par bloc, `argsort` par ligne) et répartis
+entre les processus d'un pool persistant, créé au premier rapport. Les rangs sont écrits dans une
+matrice films × tirages en mémoire partagée : chaque processus remplit ses lots de tirages (chaque
+lot a sa propre graine, `SeedSequence.spawn`, le résultat ne dépend pas du nombre de processus),
+puis résume ses tranches de films par sélection partielle. Rien d'autre que les résumés ne transite
+entre processus. Les petits classements, ou un seul cœur disponible, sont calculés dans le processus
+courant.
+"""
+
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_SAMPLES = 2000
+DEFAULT_LEVEL = 0.9
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Tirages par lot envoyé à un processus, et éléments (tirages × films) par bloc vectorisé
+CHUNK_SAMPLES = 250
+BLOCK_ELEMENTS = 1 << 21
+# En dessous (tirages × films), le lancement du pool coûte plus que le calcul
+MIN_PARALLEL_ELEMENTS = 1 << 20
+
+REPORT_COLUMNS = ["Rang_Min", "Rang_Max", "Proba_Top"]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _fill_ranks(ranks: np.ndarray, mu: np.ndarray, sigma: np.ndarray, start: int, stop: int, seed) -> None:
+    """Écrit dans les colonnes `start:stop` de `ranks` (films × tirages) le rang de chaque film (à partir de 0)."""
+    rng = np.random.default_rng(seed)
+    count = len(mu)
+    places = np.arange(count, dtype=ranks.dtype)
+    block = max(1, BLOCK_ELEMENTS // count)
+    for first in range(start, stop, block):
+        last = min(first + block, stop)
+        draws = rng.standard_normal((last - first, count), dtype=np.float32)
+        draws *= sigma
+        draws -= mu  # Scores opposés : argsort croissant = meilleur film en premier
+        order = np.argsort(draws, axis=1)
+        block_ranks = np.empty(order.shape, dtype=ranks.dtype)
+        np.put_along_axis(block_ranks, order, places[None, :], axis=1)
+        ranks[:, first:last] = block_ranks.T
+
+
+def _summarize(ranks: np.ndarray, lower: int, upper: int, top_k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Rangs d'ordre `lower` et `upper` de chaque ligne (sélection partielle, en place) et tirages dans le top-K."""
+    in_top = np.count_nonzero(ranks < top_k, axis=1)
+    ranks.partition([lower, upper], axis=1)
+    return ranks[:, lower].astype(np.int64) + 1, ranks[:, upper].astype(np.int64) + 1, in_top
+
+
+def _attach(name: str, shape: Tuple[int, int], dtype: str) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _fill_shared(name: str, shape: Tuple[int, int], dtype: str, mu, sigma, start: int, stop: int, seed) -> None:
+    block, ranks = _attach(name, shape, dtype)
+    try:
+        _fill_ranks(ranks, mu, sigma, start, stop, seed)
+    finally:
+        del ranks
+        block.close()
+
+
+def _summarize_shared(name: str, shape: Tuple[int, int], dtype: str, first: int, last: int, lower: int, upper: int, top_k: int):
+    block, ranks = _attach(name, shape, dtype)
+    try:
+        return _summarize(ranks[first:last], lower, upper, top_k)
+    finally:
+        del ranks
+        block.close()
+
+
+def _executor(workers: int) -> ProcessPoolExecutor:
+    """Pool de processus partagé par les rapports, recréé si le nombre de processus change."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # forkserver : les processus ne copient pas l'état (threads, verrous) du serveur web
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def shutdown() -> None:
+    """Arrête le pool de processus (à la sortie du programme)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+class RankReport:
+    """Intervalle de rangs et probabilité de top-K par film, dans l'ordre des films donnés."""
+
+    __slots__ = ("samples", "level", "top_k", "low", "high", "p_top")
+
+    def __init__(self, samples: int, level: float, top_k: int, low: np.ndarray, high: np.ndarray, p_top: np.ndarray):
+        self.samples = samples
+        self.level = level
+        self.top_k = top_k
+        self.low = low  # Rangs à partir de 1 (0 : film hors du rapport)
+        self.high = high
+        self.p_top = p_top
+
+    def __len__(self) -> int:
+        return len(self.low)
+
+    def take(self, positions: Sequence[int]) -> "RankReport":
+        """Rapport restreint (et réordonné) aux positions données."""
+        positions = np.asarray(positions, dtype=np.int64)
+        return RankReport(
+            self.samples, self.level, self.top_k, self.low[positions], self.high[positions], self.p_top[positions]
+        )
+
+    def expand(self, positions: Sequence[int], size: int) -> "RankReport":
+        """Rapport sur `size` films dont ceux-ci occupent les positions données (les autres restent vides)."""
+        positions = np.asarray(positions, dtype=np.int64)
+        low, high, p_top = np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int64), np.zeros(size)
+        low[positions], high[positions], p_top[positions] = self.low, self.high, self.p_top
+        return RankReport(self.samples, self.level, self.top_k, low, high, p_top)
+
+    def header(self) -> str:
+        """Ligne de métadonnées du CSV."""
+        return (
+            f"# Incertitude des rangs: {self.samples} tirages, intervalle à {self.level:.0%}, "
+            f"probabilité d'être dans le top-{self.top_k}"
+        )
+
+    def summary(self) -> Dict:
+        """Paramètres du rapport, pour la réponse JSON."""
+        return {"samples": self.samples, "level": self.level, "top_k": self.top_k}
+
+    def entry(self, position: int) -> Dict:
+        """Champs JSON d'un film."""
+        if not self.low[position]:
+            return {"rank_low": None, "rank_high": None, "p_top": None}
+        return {
+            "rank_low": int(self.low[position]),
+            "rank_high": int(self.high[position]),
+            "p_top": round(float(self.p_top[position]), 3),
+        }
+
+    def csv_columns(self, position: int) -> List:
+        """Colonnes CSV d'un film (REPORT_COLUMNS)."""
+        if not self.low[position]:
+            return ["", "", ""]
+        return [int(self.low[position]), int(self.high[position]), f"{self.p_top[position]:.3f}"]
+
+
+def simulate_ranks(
+    mu: Sequence[float],
+    sigma: Sequence[float],
+    top_k: int,
+    samples: int = DEFAULT_SAMPLES,
+    level: float = DEFAULT_LEVEL,
+    workers: int = DEFAULT_WORKERS,
+    seed: Optional[int] = None,
+) -> RankReport:
+    """Tire `samples` classements dans les lois N(mu, sigma²) des films et résume le rang de chacun."""
+    if samples < 1:
+        raise ValueError(f"Nombre de tirages invalide: {samples}")
+    if not 0 < level < 1:
+        raise ValueError(f"Niveau d'intervalle invalide: {level}")
+    mu = np.asarray(mu, dtype=np.float32)
+    sigma = np.asarray(sigma, dtype=np.float32)
+    count = len(mu)
+    top_k = max(1, min(top_k, count))
+    if count == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return RankReport(samples, level, top_k, empty, empty, np.zeros(0))
+
+    dtype = np.dtype(np.int16 if count <= np.iinfo(np.int16).max else np.int32)
+    chunks = [(start, min(start + CHUNK_SAMPLES, samples)) for start in range(0, samples, CHUNK_SAMPLES)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    # Bornes de l'intervalle : rangs d'ordre pris vers l'extérieur
+    tail = (1 - level) / 2
+    lower = int(math.floor(tail * (samples - 1)))
+    upper = int(math.ceil((1 - tail) * (samples - 1)))
+
+    summary = None
+    if workers > 1 and len(chunks) > 1 and samples * count >= MIN_PARALLEL_ELEMENTS:
+        try:
+            summary = _simulate_parallel(mu, sigma, dtype, samples, chunks, seeds, (lower, upper, top_k), workers)
+        except (BrokenProcessPool, OSError) as e:
+            print(f"⚠️  Pool de processus indisponible, tirages dans le processus courant: {e}")
+            shutdown()
+    if summary is None:
+        ranks = np.empty((count, samples), dtype=dtype)
+        for (start, stop), chunk_seed in zip(chunks, seeds):
+            _fill_ranks(ranks, mu, sigma, start, stop, chunk_seed)
+        summary = _summarize(ranks, lower, upper, top_k)
+
+    low, high, in_top = summary
+    return RankReport(samples, level, top_k, low, high, in_top / samples)
+
+
+def _simulate_parallel(
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    dtype: np.dtype,
+    samples: int,
+    chunks: List[Tuple[int, int]],
+    seeds: List[np.random.SeedSequence],
+    bounds: Tuple[int, int, int],
+    workers: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Tirages puis résumés répartis entre les processus du pool, sur une matrice de rangs partagée."""
+    count = len(mu)
+    pool = _executor(min(workers, len(chunks)))
+    block = shared_memory.SharedMemory(create=True, size=count * samples * dtype.itemsize)
+    try:
+        shape = (count, samples)
+        filled = [
+            pool.submit(_fill_shared, block.name, shape, dtype.str, mu, sigma, start, stop, chunk_seed)
+            for (start, stop), chunk_seed in zip(chunks, seeds)
+        ]
+        for future in filled:
+            future.result()
+        step = -(-count // (2 * workers))
+        slices = [
+            pool.submit(_summarize_shared, block.name, shape, dtype.str, first, min(first + step, count), *bounds)
+            for first in range(0, count, step)
+        ]
+        parts = [future.result() for future in slices]
+    finally:
+        block.close()
+        block.unlink()
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def catalog_report(mu: np.ndarray, sigma: np.ndarray, positions: Sequence[int], top_k: int, **options) -> RankReport:
+    """Rapport sur les films aux positions données, indexé par position dans le catalogue (`mu`, `sigma`)."""
+    positions = np.asarray(positions, dtype=np.int64)
+    mu, sigma = np.asarray(mu), np.asarray(sigma)
+    return simulate_ranks(mu[positions], sigma[positions], top_k, **options).expand(positions, len(mu))
@@ -0,0 +1,72 @@
+"""
+Lecture des classements individuels `ListeATrier.<utilisateur>.csv` avec la seule bibliothèque standard.
+
+Utilisé par les commandes non interactives de `pair_ranking.py` (show, export) : elles démarrent
+sans charger NumPy, TrueSkill ni questionary.
+"""
+
+import csv
+import glob
+import os
+from typing import Dict, List
+
+RANKING_PREFIX = "ListeATrier."
+RANKING_SUFFIX = ".csv"
+
+
+def ranking_path(user_name: str, directory: str = ".") -> str:
+    """Chemin du classement d'un utilisateur."""
+    return os.path.join(directory, f"{RANKING_PREFIX}{user_name}{RANKING_SUFFIX}")
+
+
+def list_users(directory: str = ".") -> List[str]:
+    """Utilisateurs ayant un classement dans le dossier, par ordre alphabétique."""
+    users = []
+    for path in sorted(glob.glob(os.path.join(directory, f"{RANKING_PREFIX}*{RANKING_SUFFIX}"))):
+        user_name = os.path.basename(path)[len(RANKING_PREFIX) : -len(RANKING_SUFFIX)]
+        if user_name:
+            users.append(user_name)
+    return users
+
+
+class RankingFile:
+    """Classement lu depuis un CSV : lignes de métadonnées (`# ...`) et films dans l'ordre du classement."""
+
+    __slots__ = ("path", "header", "entries")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header: List[str] = []
+        self.entries: List[Dict] = []
+
+
+def read_ranking(path: str) -> RankingFile:
+    """Lit un classement au format produit par `save_final_ranking` (mêmes champs que l'interface web)."""
+    ranking = RankingFile(path)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        for row in reader:
+            if row and row[0].startswith("#"):
+                ranking.header.append(row[0])
+            elif row and row[0] == "Rang":
+                break
+        for row in reader:
+            if len(row) >= 7 and row[0].isdigit():
+                try:
+                    mu, sigma, confidence = float(row[4]), float(row[5]), float(row[6])
+                except ValueError:
+                    continue
+                entry = {
+                    "rank": int(row[0]),
+                    "description": row[1],
+                    "genre": row[2],
+                    "category": row[3],
+                    "score_mu": mu,
+                    "score_sigma": sigma,
+                    "confidence": confidence,
+                }
+                # Colonnes du rapport d'incertitude (`--report`), vides pour un film hors du rapport
+                if len(row) >= 10 and row[7].isdigit():
+                    entry.update(rank_low=int(row[7]), rank_high=int(row[8]), p_top=float(row[9]))
+                ranking.entries.append(entry)
+    return ranking
@@ -0,0 +1,1100 @@
+"""
+Couche de service de l'interface web, indépendante du framework.
+
+Les routes Flask (`app.py`) et ASGI (`asgi_app.py`) appellent les mêmes fonctions `handle_*` :
+elles reçoivent la session du navigateur (dictionnaire signé dans un cookie) et les paramètres
+de la requête, et retournent (corps JSON, code HTTP). L'état de chaque utilisateur est gardé en
+mémoire et enregistré par lots dans une base SQLite (`RANKING_STATE_DB`) : il est rechargé à la
+première requête après un redémarrage (réponses non encore enregistrées rejouées depuis le journal)
+et partagé entre processus pour servir avec plusieurs workers. Les requêtes d'un même utilisateur
+sont traitées une à une, entre threads comme entre workers (`UserLocks`) ; le nombre de
+comparaisons fait foi côté serveur, le cookie n'en garde qu'une copie.
+"""
+
+import atexit
+import csv
+import functools
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Mapping, MutableMapping, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from trueskill import Rating, setup
+
+from aggregation import DEFAULT_METHOD, METHODS, aggregate
+from background_writer import BackgroundWriter
+from comparison_log import ComparisonLog
+from convergence import DEFAULT_TARGET, ConvergenceTracker
+from film_catalog import Film, FilmCatalog, facet_key, facet_matches
+from group_scheduler import DEFAULT_INTERVAL, GroupScheduler
+from metrics import SessionProfiler, registry, timed
+from pair_selection import DEFAULT_STRATEGY, SELECTORS, GroupSelector, PairQueue, TopKSelector, create_selector
+from rating_backend import DEFAULT_BACKEND, create_ratings
+from rank_uncertainty import RankReport, catalog_report
+from refit import refit_ratings
+from session_store import SessionStore
+from snapshot_store import SNAPSHOT_DIR, Snapshot, SnapshotStore, check_user_name, csv_columns, csv_row, export_csv
+from state_store import LockTimeout, StateStore, UserLocks
+from top_k import DEFAULT_TOP_K
+from watch_planner import DEFAULT_COUNT, WATCHED_FILE, WatchPlanner
+
+# Configuration TrueSkill
+setup(mu=25.0, sigma=8.333, beta=4.166, tau=0.0833, draw_probability=0.0)
+
+# Pagination des résultats
+RESULTS_PAGE_SIZE = 100
+MAX_RESULTS_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 1000
+
+# Vues filtrées (genre, catégorie) gardées par classement figé
+MAX_VIEWS = 32
+
+
+class RankingSnapshot:
+    """Classement figé (ordre + copies des mu/sigma) : pages et CSV restent cohérents entre eux."""
+
+    __slots__ = ("films", "mu", "sigma", "header", "report", "ranks", "views")
+
+    def __init__(
+        self,
+        films: List[Film],
+        mu: np.ndarray,
+        sigma: np.ndarray,
+        header: List[str],
+        report: Optional[RankReport] = None,
+    ):
+        self.films = films
+        self.mu = mu
+        self.sigma = sigma
+        self.header = header
+        self.report = report  # Incertitude des rangs, indexée par position dans le catalogue
+        self.ranks: Optional[np.ndarray] = None  # Rang de chaque position du catalogue (-1 : hors classement)
+        self.views: Dict[Tuple[str, str], "RankingSnapshot"] = {}
+
+    def view(self, catalog: FilmCatalog, genre: Optional[str], category: Optional[str]) -> "RankingSnapshot":
+        """Classement restreint à une facette : films de l'index de facette, remis dans l'ordre du classement."""
+        key = (facet_key(genre), facet_key(category))
+        if not any(key):
+            return self
+        view = self.views.get(key)
+        if view is not None:
+            return view
+
+        if self.ranks is None:
+            self.ranks = np.full(len(self.mu), -1, dtype=np.int64)
+            self.ranks[[film.index for film in self.films]] = np.arange(len(self.films))
+        ranks = self.ranks[np.asarray(catalog.facet(genre, category), dtype=np.int64)]
+        ranks = np.sort(ranks[ranks >= 0])
+        label = ", ".join(
+            f"{name} {value}" for name, value in (("genre", genre), ("catégorie", category)) if facet_key(value)
+        )
+        films = [self.films[rank] for rank in ranks.tolist()]
+        view = RankingSnapshot(films, self.mu, self.sigma, [*self.header, f"# Filtre: {label}"], self.report)
+
+        if len(self.views) >= MAX_VIEWS:
+            self.views.clear()
+        self.views[key] = view
+        return view
+
+    def __len__(self) -> int:
+        return len(self.films)
+
+    def entries(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """Lignes du classement au format JSON, du rang `start + 1` au rang `stop`."""
+        for i, film in enumerate(self.films[start:stop], start + 1):
+            sigma = float(self.sigma[film.index])
+            yield {
+                "rank": i,
+                "description": film.description,
+                "genre": film.genre,
+                "category": film.category,
+                "score_mu": round(float(self.mu[film.index]), 2),
+                "score_sigma": round(sigma, 2),
+                "confidence": round(max(0.0, 1 - (sigma / 8.333)), 2),
+                **(self.report.entry(film.index) if self.report is not None else {}),
+            }
+
+    def csv_rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[List]:
+        """Lignes du classement au format CSV."""
+        for i, film in enumerate(self.films[start:stop], start + 1):
+            extra = self.report.csv_columns(film.index) if self.report is not None else ()
+            yield csv_row(i, film, float(self.mu[film.index]), float(self.sigma[film.index]), extra)
+
+    def save(self, store: SnapshotStore, user_name: str, comparisons: int, catalog: FilmCatalog, path: str) -> Snapshot:
+        """Enregistre le classement comme nouvelle version de l'utilisateur, puis son export CSV."""
+        positions = np.fromiter((film.index for film in self.films), dtype=np.int64, count=len(self.films))
+        ids = np.fromiter((film.id for film in self.films), dtype=np.uint64, count=len(self.films))
+        snapshot = store.save(
+            user_name, ids, self.mu[positions], self.sigma[positions], comparisons, {"header": self.header}
+        )
+        export_csv(snapshot, catalog, path, self.report.take(positions) if self.report is not None else None)
+        return snapshot
+
+
+class PairRankingWeb:
+    def __init__(
+        self,
+        source_file: str = "ListeATrier.md",
+        strategy: str = DEFAULT_STRATEGY,
+        backend: str = DEFAULT_BACKEND,
+        fsync_every: int = 1,
+        target_confidence: float = DEFAULT_TARGET,
+        top_k: int = DEFAULT_TOP_K,
+        prefetch: int = 2,
+        background_log: bool = False,
+    ):
+        self.source_file = source_file
+        self.backend = backend
+        self.catalog = FilmCatalog()
+        self.films = self.catalog.films
+        self.user_ratings = create_ratings(backend, [])  # {film_id: Rating}
+        self.comparisons_made = 0
+        self.user_name = ""
+        self.output_file = ""
+        self.top_k: Optional[int] = top_k if strategy == TopKSelector.name else None
+        self.selector = create_selector(strategy, **({"top_k": top_k} if self.top_k else {}))
+        self.pair_queue = PairQueue(self.selector, size=prefetch)
+        self.convergence = ConvergenceTracker(target_confidence)
+        self.fsync_every = fsync_every
+        self.log: Optional[ComparisonLog] = None
+        self._since_checkpoint = 0
+        self.background_log = background_log  # Journal écrit par le thread `writer`
+        self.final_ranking: Optional[RankingSnapshot] = None
+        self.version: Optional[int] = None  # Version de l'état enregistré connue de ce processus
+        self.dirty: Set[int] = set()  # Films modifiés depuis le dernier enregistrement
+        self.selection: Tuple[Optional[str], Optional[str]] = (None, None)  # Facette (genre, catégorie) des paires
+        self.unsaved = 0  # Réponses non encore enregistrées
+
+    @timed("load_films")
+    def load_films(self) -> None:
+        """Charge la liste de films depuis le fichier source."""
+        try:
+            self.catalog = FilmCatalog.from_file(self.source_file)
+            self.films = self.catalog.films
+
+            self.user_ratings = create_ratings(self.backend, self.catalog.ids)
+            self.reset_tracking()
+
+        except FileNotFoundError:
+            print(f"❌ Fichier {self.source_file} non trouvé")
+        except Exception as e:
+            print(f"❌ Erreur lors du chargement: {e}")
+
+    def spawn(
+        self, user_name: str, strategy: str = DEFAULT_STRATEGY, top_k: int = DEFAULT_TOP_K
+    ) -> "PairRankingWeb":
+        """Crée l'état d'un nouvel utilisateur qui partage (en lecture seule) les films de cette instance."""
+        tool = PairRankingWeb(
+            self.source_file,
+            strategy,
+            self.backend,
+            self.fsync_every,
+            self.convergence.target,
+            top_k,
+            self.pair_queue.size,
+            self.background_log,
+        )
+        tool.catalog = self.catalog
+        tool.films = self.films
+        tool.user_name = user_name
+        tool.output_file = f"ListeATrier.{user_name}.csv"
+        tool.user_ratings = create_ratings(self.backend, self.catalog.ids)
+        tool.attach_group()
+        tool.reset_tracking()
+        return tool
+
+    def use_catalog(self, catalog: FilmCatalog) -> None:
+        """Passe à une nouvelle version du catalogue en gardant les ratings des films inchangés."""
+        self.catalog = catalog
+        self.films = catalog.films
+        self.user_ratings.reindex(catalog.ids)
+        if self.top_k:
+            self.top_k = min(self.top_k, len(self.films))
+            self.selector = create_selector(TopKSelector.name, top_k=self.top_k)
+            self.pair_queue.reset(self.selector)
+        self.reset_tracking()
+
+    def reload_films(self) -> bool:
+        """Recharge la liste source si elle a changé ; retourne True si le catalogue a été remplacé."""
+        try:
+            catalog = FilmCatalog.from_file(self.source_file)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"⚠️  Rechargement de {self.source_file} impossible: {e}")
+            return False
+        if catalog.digest == self.catalog.digest:
+            self.catalog.signature = catalog.signature  # Fichier touché, contenu identique
+            return False
+
+        added, removed = self.catalog.diff(catalog)
+        self.use_catalog(catalog)
+        print(f"🔄 {self.source_file} rechargé: {len(added)} films ajoutés, {len(removed)} retirés")
+        return True
+
+    def selection_films(self) -> List[Film]:
+        """Films parmi lesquels les paires sont choisies (facette choisie au démarrage, sinon tous)."""
+        return self.catalog.facet_films(*self.selection)
+
+    def in_selection(self, film: Film) -> bool:
+        """Indique si un film fait partie des films comparés (même règle que `selection_films`)."""
+        genre, category = self.selection
+        return facet_matches(film.genre, genre) and facet_matches(film.category, category)
+
+    def set_selection(self, genre: Optional[str], category: Optional[str]) -> None:
+        """Limite les paires à un genre et/ou une catégorie (None : tous les films)."""
+        if (genre, category) != self.selection:
+            self.selection = (genre, category)
+            self.reset_tracking()
+
+    def reset_tracking(self) -> None:
+        """Recalcule les structures dérivées des ratings (paires candidates, suivi de convergence)."""
+        films = self.selection_films()
+        self.selector.reset(films, self.user_ratings)
+        self.pair_queue.reset()
+        self.convergence.reset(films, self.user_ratings)
+        self.final_ranking = None
+        if self.user_name:
+            watch_planner.load_user(self.user_name, self.catalog, self.user_ratings)
+
+    @timed("refit")
+    def refit_scores(self) -> int:
+        """Réajuste les ratings sur tout l'historique du journal (Bradley–Terry) ; retourne le nombre de comparaisons utilisées."""
+        if self.background_log:
+            writer.flush()  # Le journal doit contenir toutes les réponses avant d'être relu
+        used = refit_ratings(self.user_ratings, self.log.history(self.catalog.resolve))
+        self.dirty.update(self.catalog.ids)
+        self.reset_tracking()
+        return used
+
+    def memory_size(self) -> int:
+        """Estimation de la mémoire propre à cet utilisateur (les films partagés ne sont pas comptés)."""
+        if hasattr(self.user_ratings, "mu"):
+            ratings_size = self.user_ratings.mu.nbytes + self.user_ratings.sigma.nbytes
+        else:
+            ratings_size = 150 * len(self.user_ratings)
+        if self.final_ranking is not None:
+            snapshot = self.final_ranking
+            ratings_size += snapshot.mu.nbytes + snapshot.sigma.nbytes + 8 * len(snapshot)
+        # Index trié + probabilités des couples adjacents du suivi de convergence
+        return ratings_size + self.selector.memory_size() + 200 * len(self.films)
+
+    def set_strategy(self, strategy: str, top_k: int = DEFAULT_TOP_K) -> None:
+        """Change la stratégie de sélection des paires."""
+        self.top_k = top_k if strategy == TopKSelector.name else None
+        self.selector = create_selector(strategy, **({"top_k": top_k} if self.top_k else {}))
+        self.attach_group()
+        self.selector.reset(self.selection_films(), self.user_ratings)
+        self.pair_queue.reset(self.selector)
+
+    def attach_group(self) -> None:
+        """Stratégie "group" : relie le sélecteur au classement de groupe partagé, vu par cet utilisateur."""
+        if isinstance(self.selector, GroupSelector):
+            self.selector.group = group_scheduler.view(self.user_name)
+
+    @timed("get_random_pair")
+    def get_random_pair(self) -> Tuple[Optional[Film], Optional[Film]]:
+        """Sélectionne la prochaine paire de films selon la stratégie choisie."""
+        if len(self.films) < 2:
+            return None, None
+        return self.pair_queue.pop()
+
+    def get_upcoming_pair(self) -> Tuple[Optional[Film], Optional[Film]]:
+        """Paire précalculée qui suivra celle qui vient d'être proposée (le client peut l'afficher sans attendre)."""
+        return self.pair_queue.peek()
+
+    @timed("update_ratings")
+    def update_ratings(self, film1: Film, film2: Film, result: int) -> None:
+        """Met à jour les ratings TrueSkill selon le résultat de la comparaison."""
+        if result == 0:  # Passer
+            return
+
+        # Les films sont partagés entre utilisateurs : seuls les ratings de l'utilisateur changent
+        self.user_ratings.rate_1vs1(film1.id, film2.id, result)
+        self.selector.notify(film1, film2)
+        self.convergence.notify(film1, film2)
+        self.pair_queue.invalidate(film1, film2)
+        self.final_ranking = None
+        watch_planner.notify(self.user_name, self.catalog, self.user_ratings, (film1, film2))
+
+    def update_ratings_batch(self, comparisons: List[Tuple[Film, Film, int]]) -> None:
+        """Applique un lot de comparaisons (film1, film2, résultat) en un seul appel au backend."""
+        self.user_ratings.rate_batch((film1.id, film2.id, result) for film1, film2, result in comparisons)
+        self.final_ranking = None
+        for film1, film2, result in comparisons:
+            if result > 0:
+                self.selector.notify(film1, film2)
+                self.convergence.notify(film1, film2)
+                self.pair_queue.invalidate(film1, film2)
+        watch_planner.notify(
+            self.user_name,
+            self.catalog,
+            self.user_ratings,
+            [film for film1, film2, result in comparisons if result > 0 for film in (film1, film2)],
+        )
+
+    def _write_log(self, func: Callable, *args) -> None:
+        """Exécute une écriture du journal, tout de suite ou via le thread d'écriture."""
+        if self.background_log:
+            writer.enqueue(func, *args)
+        else:
+            func(*args)
+
+    def open_log(self, new_session: bool = False) -> None:
+        """Ouvre le journal de l'utilisateur courant (et y marque un nouveau classement si demandé)."""
+        if self.log is not None:
+            self.close_log()
+        self.log = ComparisonLog(self.user_name, fsync_every=self.fsync_every)
+        if new_session:
+            self._write_log(self.log.start_session)
+
+    def start_log(self) -> None:
+        """Ouvre le journal de l'utilisateur courant et y marque un nouveau classement."""
+        self.open_log(new_session=True)
+
+    def close_log(self) -> None:
+        """Ferme le journal après les écritures en attente."""
+        self._write_log(self.log.close)
+
+    def record_comparison(self, film1: Film, film2: Film, result: int) -> None:
+        """Ajoute la réponse au journal des comparaisons (O(1) par réponse)."""
+        self._write_log(self.log.append, film1.id, film2.id, result)
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.log.checkpoint_every:
+            self.save_progress()
+
+    @timed("save_progress")
+    def save_progress(self, background: bool = False) -> None:
+        """Sauvegarde un point de contrôle des ratings pour borner le rejeu du journal.
+
+        `background` : écriture par le thread `writer` même si le journal est écrit par la requête (/finish).
+        """
+        self._since_checkpoint = 0
+        if not self.background_log and not background:
+            self.log.checkpoint(self.user_ratings, self.comparisons_made)
+            return
+
+        # Les ratings continuent d'évoluer pendant l'écriture : le thread reçoit une copie
+        mu, sigma = (np.array(values) for values in self.user_ratings.as_arrays())
+        # Journal écrit par la requête : position relevée maintenant, les réponses suivantes ne sont pas dans la copie
+        offset = None if self.background_log else self.log.offset()
+        writer.submit(
+            self.log.checkpoint_path,
+            self._checkpoint_arrays,
+            self.catalog.ids,
+            mu,
+            sigma,
+            self.comparisons_made,
+            offset,
+        )
+
+    def _checkpoint_arrays(
+        self, ids: List[int], mu: np.ndarray, sigma: np.ndarray, comparisons_made: int, offset: Optional[int]
+    ) -> None:
+        ratings = {film_id: Rating(mu=m, sigma=s) for film_id, m, s in zip(ids, mu.tolist(), sigma.tolist())}
+        self.log.checkpoint(ratings, comparisons_made, offset)
+
+    def generate_ranking(self) -> List[Film]:
+        """Génère la liste finale triée par rating."""
+        if self.top_k:
+            # Mode top-K : seuls les K films du tas du sélecteur sont triés
+            return [self.catalog.get(film_id) for film_id in self.selector.top.members()]
+        mu, _ = self.user_ratings.as_arrays()
+        return [self.films[i] for i in np.argsort(-mu, kind="stable")]
+
+    def ranking_header(self) -> List[str]:
+        """Lignes de métadonnées en tête du CSV."""
+        header = [
+            f"# Classement personnel de {self.user_name}",
+            f"# Généré le: {datetime.now().strftime('%d/%m/%Y à %H:%M')}",
+            f"# Comparaisons effectuées: {self.comparisons_made}",
+            f"# Score de confiance moyen: {self.calculate_confidence():.2f}",
+        ]
+        if self.top_k:
+            header.append(f"# Top-{self.top_k} sur {len(self.films)} films")
+            header.append(f"# Confiance du top-{self.top_k}: {self.calculate_top_k_confidence():.2f}")
+        return header
+
+    @timed("rank_report")
+    def rank_report(self) -> RankReport:
+        """Incertitude des rangs par tirages dans la loi de chaque film (en mode top-K : parmi les films comparés)."""
+        mu, sigma = self.user_ratings.as_arrays()
+        films = self.selection_films() if self.top_k else self.films
+        return catalog_report(mu, sigma, [film.index for film in films], self.top_k or DEFAULT_TOP_K)
+
+    def snapshot_ranking(self, ranked_films: List[Film], report: bool = False) -> RankingSnapshot:
+        """Fige le classement : les comparaisons suivantes ne modifient ni les pages ni le CSV en cours d'écriture."""
+        mu, sigma = self.user_ratings.as_arrays()
+        header = self.ranking_header()
+        rank_report = self.rank_report() if report else None
+        if rank_report is not None:
+            header.append(rank_report.header())
+        return RankingSnapshot(ranked_films, np.array(mu), np.array(sigma), header, rank_report)
+
+    def save_final_ranking(self, ranked_films: List[Film]) -> None:
+        """Sauvegarde le classement final (nouvelle version binaire et export CSV)."""
+        self.snapshot_ranking(ranked_films).save(
+            snapshot_store, self.user_name, self.comparisons_made, self.catalog, self.output_file
+        )
+
+    def calculate_confidence(self) -> float:
+        """Calcule un score de confiance basé sur la variance des ratings."""
+        if not self.user_ratings:
+            return 0.0
+        avg_sigma = self.user_ratings.mean_sigma()
+        return max(0, 1 - (avg_sigma / 8.333))
+
+    def calculate_top_k_confidence(self) -> float:
+        """Probabilité moyenne que chaque film du top batte le meilleur film exclu."""
+        return self.selector.top.confidence() if self.top_k else 0.0
+
+
+def close_session(user_name: str, tool: PairRankingWeb, wait: bool = False) -> None:
+    """Enregistre l'état d'un utilisateur retiré du cache puis ferme son journal.
+
+    Appelée hors du verrou du cache, sous le verrou de l'utilisateur : une requête encore en cours sur
+    cette copie finit avant l'enregistrement. Le thread d'une requête n'attend pas le verrou d'un autre
+    utilisateur (deux requêtes qui s'évincent mutuellement se bloqueraient) : si l'utilisateur est
+    occupé, l'enregistrement est confié au thread d'écriture (`wait`), qui attend son tour.
+    """
+    try:
+        with user_locks.hold(user_name, timeout=None if wait else 0):
+            flush_state(tool)
+            if tool.log is not None:
+                tool.close_log()
+    except LockTimeout:
+        if not wait:
+            writer.enqueue(close_session, user_name, tool, True)
+        else:
+            print(f"⚠️  {user_name} occupé: {tool.unsaved} réponses de la session retirée du cache non enregistrées")
+
+
+# Écritures disque (CSV finaux, et journaux en mode RANKING_BACKGROUND_LOG) hors du thread de la requête
+writer = BackgroundWriter("ranking-writer")
+
+# Catalogue partagé : les films sont chargés une fois et jamais modifiés par les sessions
+ranking_tool = PairRankingWeb(
+    backend=os.environ.get("RANKING_BACKEND", DEFAULT_BACKEND),
+    fsync_every=int(os.environ.get("RANKING_FSYNC_EVERY", "1")),
+    target_confidence=float(os.environ.get("RANKING_TARGET_CONFIDENCE", str(DEFAULT_TARGET))),
+    prefetch=int(os.environ.get("RANKING_PREFETCH", "2")),
+    background_log=os.environ.get("RANKING_BACKGROUND_LOG", "0") == "1",
+)
+ranking_tool.load_films()
+
+# Cache en mémoire de l'état de chaque utilisateur, indexé par nom d'utilisateur
+sessions = SessionStore(
+    max_sessions=int(os.environ.get("RANKING_MAX_SESSIONS", "1000")),
+    ttl=float(os.environ.get("RANKING_SESSION_TTL", str(4 * 3600))),
+    max_bytes=int(os.environ.get("RANKING_SESSIONS_MAX_MB", "256")) * 1024 * 1024,
+    on_evict=close_session,
+)
+
+# Classement de groupe des utilisateurs en mémoire et des CSV, pour la stratégie "group" (recalcul en arrière-plan)
+group_scheduler = GroupScheduler(
+    interval=float(os.environ.get("RANKING_GROUP_INTERVAL", str(DEFAULT_INTERVAL))),
+    sources=lambda: [
+        (tool.user_name, tool.user_ratings) for tool in sessions.values() if tool.catalog is ranking_tool.catalog
+    ],
+    catalog=lambda: ranking_tool.catalog,
+)
+
+# Ordre de visionnage des spectateurs présents, tenu à jour à chaque réponse (routes /watch/...)
+watch_planner = WatchPlanner(ranking_tool.catalog, watched_file=os.environ.get("RANKING_WATCHED_FILE", WATCHED_FILE))
+
+# Mesures de temps (actives par défaut côté web, RANKING_METRICS=0 pour les couper) et profil d'une session
+registry.configure(default=True)
+registry.gauge("sessions", "Utilisateurs gardés en mémoire", lambda: len(sessions))
+registry.gauge("sessions_memory_bytes", "Mémoire estimée des utilisateurs en mémoire", lambda: sessions.memory_used)
+profiler = SessionProfiler()
+
+# État enregistré : survit aux redémarrages et partagé entre processus
+state_store = StateStore(os.environ.get("RANKING_STATE_DB", "ranking_state.db"))
+# Une seule requête à la fois par utilisateur, tous threads et workers confondus
+user_locks = UserLocks(state_store, timeout=float(os.environ.get("RANKING_LOCK_TIMEOUT", "10")))
+# Réponses regroupées par écriture (1 avec plusieurs workers : chaque réponse est visible des autres)
+STATE_BATCH = max(1, int(os.environ.get("RANKING_STATE_BATCH", "20")))
+# Versions successives des classements finaux (le CSV en est l'export)
+snapshot_store = SnapshotStore(os.environ.get("RANKING_SNAPSHOT_DIR", SNAPSHOT_DIR))
+# Durée de conservation de l'état d'un utilisateur inactif
+STATE_RETENTION = float(os.environ.get("RANKING_STATE_RETENTION_DAYS", "30")) * 86400
+
+
+# Rechargement à chaud de la liste source : secondes entre deux vérifications (0 pour désactiver)
+RELOAD_INTERVAL = float(os.environ.get("RANKING_RELOAD_INTERVAL", "2"))
+
+# Réajustement global des scores (Bradley–Terry) à chaque /finish, sinon seulement avec /finish?refit=1
+REFIT_ON_FINISH = os.environ.get("RANKING_REFIT", "0") == "1"
+# Intervalles de rangs et probabilité de top-K (tirages Monte-Carlo) à chaque /finish, sinon avec /finish?report=1
+REPORT_ON_FINISH = os.environ.get("RANKING_REPORT", "0") == "1"
+_reload_lock = threading.Lock()
+_next_reload_check = 0.0
+
+
+def refresh_catalog() -> None:
+    """Recharge la liste source si elle a été modifiée (au plus une vérification par intervalle)."""
+    global _next_reload_check
+    if RELOAD_INTERVAL <= 0 or time.monotonic() < _next_reload_check:
+        return
+    with _reload_lock:
+        now = time.monotonic()
+        if now < _next_reload_check:
+            return
+        _next_reload_check = now + RELOAD_INTERVAL
+        if ranking_tool.catalog.is_stale() and ranking_tool.reload_films():
+            watch_planner.use_catalog(ranking_tool.catalog)
+
+
+def current_tool(sess: Mapping) -> Optional[PairRankingWeb]:
+    """Retourne l'état de l'utilisateur de la session, rechargé si absent du cache ou modifié par un autre processus."""
+    user_name = sess.get("user_name")
+    if not user_name:
+        return None
+    refresh_catalog()
+    tool = sessions.get(user_name)
+
+    version = state_store.version(user_name)
+    if version is None:
+        if tool is not None:
+            sessions.pop(user_name)
+        return None
+    if tool is None or tool.version != version:
+        tool = restore_tool(user_name)
+    elif tool.catalog is not ranking_tool.catalog:
+        # Liste source rechargée : les films inchangés gardent leurs ratings
+        tool.use_catalog(ranking_tool.catalog)
+    # Facette des paires choisie au démarrage (gardée dans la session du navigateur)
+    tool.set_selection(sess.get("genre"), sess.get("category"))
+    return tool
+
+
+def restore_tool(user_name: str) -> Optional[PairRankingWeb]:
+    """Reconstruit l'état d'un utilisateur : ratings enregistrés, puis réponses du journal postérieures."""
+    loaded = state_store.load(user_name)
+    if loaded is None:
+        return None
+    meta, ratings = loaded
+
+    sessions.pop(user_name)
+    tool = ranking_tool.spawn(user_name, meta["strategy"], meta["top_k"] or DEFAULT_TOP_K)
+    for film_id, mu, sigma in ratings:
+        film_id = tool.catalog.resolve(film_id)
+        if film_id is not None:
+            tool.user_ratings[film_id] = Rating(mu=mu, sigma=sigma)
+    tool.version = meta["version"]
+    tool.comparisons_made = meta["comparisons_made"]
+    tool.open_log()
+
+    # Réponses journalisées mais pas encore enregistrées (arrêt avant la fin du lot)
+    if meta["log_offset"] is not None and meta["log_offset"] < tool.log.offset():
+        tool.comparisons_made = tool.log.replay_from(
+            tool.user_ratings, meta["log_offset"], tool.comparisons_made, tool.catalog.resolve
+        )
+        tool.dirty.update(tool.catalog.ids)
+        tool.unsaved = 1
+    tool.reset_tracking()
+    flush_state(tool)
+    sessions.put(user_name, tool)
+    return tool
+
+
+@timed("save_state")
+def flush_state(tool: PairRankingWeb) -> bool:
+    """Écrit dans la base les ratings modifiés depuis le dernier enregistrement ; False si la copie était périmée."""
+    if not tool.unsaved:
+        return True
+    changes = [(film_id, tool.user_ratings[film_id].mu, tool.user_ratings[film_id].sigma) for film_id in tool.dirty]
+    # Avec le journal écrit en arrière-plan, sa taille n'est pas connue ici : pas de rejeu possible
+    log_offset = None if tool.background_log or tool.log is None else tool.log.offset()
+    # Écriture seulement si personne n'a écrit depuis la version sur laquelle repose cette copie
+    version = None
+    if tool.version is not None:
+        version = state_store.update(tool.user_name, changes, tool.comparisons_made, log_offset, tool.version)
+    if version is None:
+        # Copie périmée (éviction ou arrêt après l'écriture d'un autre worker) : l'état enregistré est gardé
+        print(f"⚠️  État de {tool.user_name} modifié par un autre processus: {tool.unsaved} réponses de cette copie écartées")
+    tool.version = version  # None : rechargement à la prochaine requête
+    tool.dirty.clear()
+    tool.unsaved = 0
+    return version is not None
+
+
+def persist(tool: PairRankingWeb, films: Tuple[Film, ...]) -> bool:
+    """Note les films modifiés par une réponse et enregistre l'état tous les `STATE_BATCH` réponses ; False si écartées."""
+    tool.dirty.update(film.id for film in films)
+    tool.unsaved += 1
+    if tool.unsaved >= STATE_BATCH:
+        return flush_state(tool)
+    return True
+
+
+@atexit.register
+def flush_all() -> None:
+    """Enregistre à l'arrêt du processus les réponses encore en attente.
+
+    Chaque utilisateur est enregistré sous son verrou : une requête encore en cours finit d'abord.
+    """
+    for tool in sessions.values():
+        try:
+            with user_locks.hold(tool.user_name):
+                flush_state(tool)
+        except LockTimeout:
+            print(f"⚠️  {tool.user_name} occupé à l'arrêt: {tool.unsaved} réponses non enregistrées")
+
+
+def int_arg(args: Mapping, name: str, default: int) -> int:
+    """Paramètre entier de la requête, ou `default` s'il est absent ou invalide."""
+    try:
+        return int(args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class Stream(NamedTuple):
+    """Réponse transmise en flux par la couche HTTP."""
+
+    chunks: Iterator[str]
+    mimetype: str
+    headers: Dict[str, str]
+
+
+def call_handler(route: str, handler: Callable, *args):
+    """Exécute un handler en mesurant sa durée (et en le profilant si sa session est profilée)."""
+    if not registry.enabled and not profiler.mode:
+        return handler(*args)
+    # Le premier argument des handlers de session est la session du navigateur (un proxy sous Flask)
+    owner = args[0].get("user_name") if args and hasattr(args[0], "get") else None
+    start = time.perf_counter()
+    with profiler.run(owner):
+        body, status = handler(*args)
+    # Pour un flux, seule la préparation est mesurée, pas l'envoi
+    registry.observe("request_seconds", time.perf_counter() - start, route=route)
+    registry.increment("requests_total", route=route, status=str(status))
+    return body, status
+
+
+NOT_STARTED = ({"error": "Session non démarrée"}, 400)
+BUSY = ({"error": "Classement occupé par une autre requête, réessayez"}, 503)
+CONFLICT = ({"error": "Classement modifié par une autre session entre-temps : réponses non enregistrées, rechargez"}, 409)
+FORBIDDEN = ({"error": "Seules les versions de votre propre classement sont consultables"}, 403)
+
+
+def user_handler(handler: Callable) -> Callable:
+    """Exécute un handler de session seul sur l'utilisateur de la session (voir `UserLocks`)."""
+
+    @functools.wraps(handler)
+    def wrapper(sess: MutableMapping, *args):
+        user_name = sess.get("user_name")
+        if not user_name:
+            return handler(sess, *args)
+        try:
+            with user_locks.hold(user_name):
+                return handler(sess, *args)
+        except LockTimeout:
+            return BUSY
+
+    return wrapper
+
+
+def handle_start(sess: MutableMapping, data: Dict) -> Tuple[Dict, int]:
+    # Le nom désigne le classement (état, journal, CSV) : sans nom, pas de classement partagé par défaut
+    user_name = str(data.get("user_name") or "").strip()
+    if not user_name:
+        return {"status": "error", "message": "Nom d'utilisateur requis"}, 400
+    try:
+        check_user_name(user_name)  # Le nom sert aussi de nom de fichier (journal, CSV, versions)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}, 400
+    max_comparisons = data.get("max_comparisons", 50)
+    strategy = data.get("strategy", DEFAULT_STRATEGY)
+
+    if strategy not in SELECTORS:
+        return {"status": "error", "message": f"Stratégie inconnue: {strategy}"}, 400
+
+    refresh_catalog()
+    top_k = data.get("top_k", DEFAULT_TOP_K)
+    try:
+        top_k = int(top_k)
+    except (TypeError, ValueError):
+        return {"status": "error", "message": f"Taille de top invalide: {top_k}"}, 400
+    if top_k < 1:
+        return {"status": "error", "message": f"Taille de top invalide: {top_k}"}, 400
+    top_k = min(top_k, len(ranking_tool.films))
+    genre, category = data.get("genre") or None, data.get("category") or None
+    if len(ranking_tool.catalog.facet(genre, category)) < 2:
+        return {"status": "error", "message": "Moins de deux films pour ce genre et cette catégorie"}, 400
+
+    # "auto" : arrêt à la convergence, borné par le nombre de paires distinctes
+    auto_stop = max_comparisons == "auto"
+    if auto_stop:
+        n = len(ranking_tool.films)
+        max_comparisons = n * (n - 1) // 2
+    else:
+        try:
+            max_comparisons = int(max_comparisons)
+        except (TypeError, ValueError):
+            return {"status": "error", "message": f"Nombre de comparaisons invalide: {max_comparisons}"}, 400
+        if max_comparisons < 1:
+            return {"status": "error", "message": f"Nombre de comparaisons invalide: {max_comparisons}"}, 400
+
+    sess["user_name"] = user_name
+    sess["max_comparisons"] = max_comparisons
+    sess["auto_stop"] = auto_stop
+    sess["genre"] = genre
+    sess["category"] = category
+    # Profil (RANKING_PROFILE) de la première session démarrée, jusqu'à son /finish
+    profiler.start(user_name)
+
+    return open_ranking(sess, data.get("resume", True), strategy, top_k)
+
+
+@user_handler
+def open_ranking(sess: MutableMapping, resume: bool, strategy: str, top_k: int) -> Tuple[Dict, int]:
+    """Reprend le classement de l'utilisateur de la session, ou en commence un nouveau."""
+    user_name = sess["user_name"]
+    max_comparisons = sess["max_comparisons"]
+
+    # Utilisateur déjà connu : reprise de son classement là où il l'avait laissé
+    tool = current_tool(sess) if resume else None
+    if tool is not None:
+        sess["comparisons_made"] = tool.comparisons_made
+        # Le nombre choisi porte sur les comparaisons à faire dans cette séance
+        if not sess["auto_stop"]:
+            sess["max_comparisons"] = tool.comparisons_made + max_comparisons
+        return {
+            "status": "success",
+            "message": "Classement repris",
+            "resumed": True,
+            "comparisons_made": tool.comparisons_made,
+            "max_comparisons": sess["max_comparisons"],
+            "strategy": tool.selector.name,
+            "top_k": tool.top_k,
+        }, 200
+
+    # Nouveau classement : remplace l'état précédent de cet utilisateur
+    sessions.pop(user_name)
+    state_store.purge(STATE_RETENTION)
+    tool = ranking_tool.spawn(user_name, strategy, top_k)
+    tool.set_selection(sess["genre"], sess["category"])
+    tool.start_log()
+    mu, sigma = tool.user_ratings.as_arrays()
+    tool.version = state_store.create(
+        user_name,
+        strategy,
+        tool.top_k,
+        zip(tool.catalog.ids, mu.tolist(), sigma.tolist()),
+        None if tool.background_log else tool.log.offset(),
+    )
+    sessions.put(user_name, tool)
+    sess["comparisons_made"] = 0
+
+    return {"status": "success", "message": "Session démarrée", "resumed": False, "comparisons_made": 0, "max_comparisons": max_comparisons}, 200
+
+
+def pair_payload(film1: Optional[Film], film2: Optional[Film]) -> Optional[Dict]:
+    """Représentation JSON d'une paire (None s'il n'y en a plus)."""
+    if not film1 or not film2:
+        return None
+    return {"film1": film1.to_dict(), "film2": film2.to_dict()}
+
+
+@user_handler
+def handle_get_pair(sess: MutableMapping) -> Tuple[Dict, int]:
+    tool = current_tool(sess)
+    if tool is None:
+        return NOT_STARTED
+
+    film1, film2 = tool.get_random_pair()
+    if not film1 or not film2:
+        return {"error": "Pas assez de films"}, 400
+
+    # La paire suivante est envoyée d'avance : le client l'affiche dès la réponse à celle-ci
+    return {**pair_payload(film1, film2), "upcoming": pair_payload(*tool.get_upcoming_pair())}, 200
+
+
+def apply_answer(sess: MutableMapping, tool: PairRankingWeb, data: Dict) -> Tuple[Dict, int]:
+    """Applique une réponse (1, 2, 3 ou 0 pour passer) et retourne (corps JSON, code HTTP)."""
+    film1_id = data.get("film1_id")
+    film2_id = data.get("film2_id")
+    result = data.get("result")  # 1, 2, 3, ou 0
+
+    # Trouver les films
+    film1 = tool.catalog.get(film1_id)
+    film2 = tool.catalog.get(film2_id)
+
+    if not film1 or not film2:
+        return {"error": "Films non trouvés"}, 400
+    # Mêmes règles qu'à l'import : rien n'est appliqué ni journalisé pour une réponse invalide
+    if result not in (0, 1, 2, 3):
+        return {"error": f"Résultat invalide: {result}"}, 400
+    if film1 is film2:
+        return {"error": "Un film ne peut pas être comparé à lui-même"}, 400
+    # Ni les ratings ni le suivi des paires ne sont touchés pour un film hors de la facette choisie au démarrage
+    if not tool.in_selection(film1) or not tool.in_selection(film2):
+        return {"error": "Film hors du genre ou de la catégorie choisis"}, 400
+
+    if result == 0:  # Passer
+        tool.record_comparison(film1, film2, result)
+        return {"status": "skipped"}, 200
+
+    # Mettre à jour les ratings ; le compteur du serveur fait foi, le cookie en garde une copie
+    tool.update_ratings(film1, film2, result)
+    tool.comparisons_made += 1
+    sess["comparisons_made"] = tool.comparisons_made
+    # Journal d'abord : la position enregistrée avec l'état couvre cette réponse
+    tool.record_comparison(film1, film2, result)
+    if not persist(tool, (film1, film2)):
+        return CONFLICT
+
+    return {
+        "status": "success",
+        "comparisons_made": tool.comparisons_made,
+        "max_comparisons": sess.get("max_comparisons", 50),
+        "auto_stop": sess.get("auto_stop", False),
+        "convergence": round(tool.convergence.confidence, 4),
+        "target": tool.convergence.target,
+        "converged": tool.convergence.converged,
+    }, 200
+
+
+@user_handler
+def handle_compare(sess: MutableMapping, data: Dict) -> Tuple[Dict, int]:
+    tool = current_tool(sess)
+    if tool is None:
+        return NOT_STARTED
+    return apply_answer(sess, tool, data)
+
+
+@user_handler
+def handle_compare_next(sess: MutableMapping, data: Dict) -> Tuple[Dict, int]:
+    """Applique la réponse et renvoie la paire à afficher ensuite, en une seule requête."""
+    tool = current_tool(sess)
+    if tool is None:
+        return NOT_STARTED
+
+    body, status = apply_answer(sess, tool, data)
+    if status != 200:
+        return body, status
+
+    # `next_pair` est en général la paire `upcoming` de la réponse précédente, déjà affichée par le client
+    body["next_pair"] = pair_payload(*tool.get_random_pair())
+    body["upcoming"] = pair_payload(*tool.get_upcoming_pair())
+    return body, status
+
+
+def page_limit(args: Mapping) -> int:
+    """Taille de page demandée (paramètre `limit`), bornée."""
+    return max(1, min(int_arg(args, "limit", RESULTS_PAGE_SIZE), MAX_RESULTS_PAGE_SIZE))
+
+
+def ranking_view(tool: PairRankingWeb, args: Mapping) -> RankingSnapshot:
+    """Classement figé, restreint au genre et/ou à la catégorie demandés (paramètres `genre`, `category`)."""
+    return tool.final_ranking.view(tool.catalog, args.get("genre"), args.get("category"))
+
+
+def results_page(tool: PairRankingWeb, snapshot: RankingSnapshot, cursor: int, limit: int) -> Dict:
+    """Page d'un classement figé commençant au rang `cursor + 1`."""
+    stop = min(cursor + limit, len(snapshot))
+    return {
+        "results": list(snapshot.entries(cursor, stop)),
+        "total": len(snapshot),
+        "next_cursor": stop if stop < len(snapshot) else None,
+        "csv_pending": writer.pending(tool.output_file),
+    }
+
+
+@user_handler
+def handle_finish(sess: MutableMapping, args: Mapping) -> Tuple[Dict, int]:
+    tool = current_tool(sess)
+    if tool is None:
+        return NOT_STARTED
+    # Réponses en attente enregistrées d'abord : pas de classement final tiré d'une copie périmée
+    if not flush_state(tool):
+        return CONFLICT
+
+    refit = args.get("refit", "1" if REFIT_ON_FINISH else "0") == "1"
+    if refit:
+        tool.refit_scores()
+
+    # Figer le classement final ; la version enregistrée et son CSV sont écrits en arrière-plan
+    report = args.get("report", "1" if REPORT_ON_FINISH else "0") == "1"
+    tool.final_ranking = tool.snapshot_ranking(tool.generate_ranking(), report)
+    writer.submit(
+        tool.output_file,
+        tool.final_ranking.save,
+        snapshot_store,
+        tool.user_name,
+        tool.comparisons_made,
+        tool.catalog,
+        tool.output_file,
+    )
+    tool.save_progress(background=True)
+    profiler.stop(tool.user_name)
+
+    # Seule la première page est renvoyée, la suite via /results?cursor=...
+    return {
+        "status": "success",
+        **results_page(tool, ranking_view(tool, args), 0, page_limit(args)),
+        "comparisons_made": tool.comparisons_made,
+        "confidence": round(tool.calculate_confidence(), 2),
+        "convergence": round(tool.convergence.confidence, 4),
+        "top_k": tool.top_k,
+        "top_k_confidence": round(tool.calculate_top_k_confidence(), 2) if tool.top_k else None,
+        "refit": refit,
+        "report": tool.final_ranking.report.summary() if report else None,
+    }, 200
+
+
+def stream_ndjson(snapshot: RankingSnapshot, cursor: int) -> Iterator[str]:
+    for start in range(cursor, len(snapshot), STREAM_CHUNK_SIZE):
+        yield "".join(
+            json.dumps(entry, ensure_ascii=False) + "\n" for entry in snapshot.entries(start, start + STREAM_CHUNK_SIZE)
+        )
+
+
+def stream_csv(snapshot: RankingSnapshot, cursor: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    csv_out = csv.writer(buffer, delimiter=";")
+    if cursor == 0:
+        for line in snapshot.header:
+            csv_out.writerow([line])
+        csv_out.writerow([])
+        csv_out.writerow(csv_columns(snapshot.report))
+    for start in range(cursor, len(snapshot), STREAM_CHUNK_SIZE):
+        csv_out.writerows(snapshot.csv_rows(start, start + STREAM_CHUNK_SIZE))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@user_handler
+def handle_results(sess: MutableMapping, args: Mapping):
+    """Page JSON du classement figé, ou flux NDJSON/CSV (`Stream`) selon le paramètre `format`."""
+    tool = current_tool(sess)
+    if tool is None:
+        return NOT_STARTED
+
+    # Sans /finish préalable, le classement courant est figé sans écrire de CSV
+    if tool.final_ranking is None:
+        tool.final_ranking = tool.snapshot_ranking(tool.generate_ranking())
+
+    cursor = max(0, int_arg(args, "cursor", 0))
+    output_format = args.get("format", "json")
+    snapshot = ranking_view(tool, args)
+
+    if output_format == "ndjson":
+        return Stream(stream_ndjson(snapshot, cursor), "application/x-ndjson", {}), 200
+    if output_format == "csv":
+        headers = {"Content-Disposition": f'attachment; filename="{os.path.basename(tool.output_file)}"'}
+        return Stream(stream_csv(snapshot, cursor), "text/csv", headers), 200
+    if output_format != "json":
+        return {"error": f"Format inconnu: {output_format}"}, 400
+
+    return {"status": "success", **results_page(tool, snapshot, cursor, page_limit(args))}, 200
+
+
+def handle_metrics() -> Tuple[Stream, int]:
+    """Mesures au format texte Prometheus (propres à ce processus)."""
+    return Stream(iter([registry.render_prometheus()]), "text/plain; version=0.0.4", {}), 200
+
+
+def handle_facets() -> Tuple[Dict, int]:
+    """Genres et catégories de la liste, avec leur nombre de films."""
+    refresh_catalog()
+    return {"status": "success", **ranking_tool.catalog.facet_counts()}, 200
+
+
+def handle_group_ranking(args: Mapping) -> Tuple[Dict, int]:
+    method = args.get("method", DEFAULT_METHOD)
+    top = int_arg(args, "top", 0) or None
+
+    if method not in METHODS:
+        return {"error": f"Méthode inconnue: {method}"}, 400
+
+    return {"status": "success", "method": method, "results": aggregate(".", method, top)}, 200
+
+
+def handle_watch_next(args: Mapping) -> Tuple[Dict, int]:
+    """Prochains films non vus pour les spectateurs `users` (séparés par des virgules, tous par défaut)."""
+    refresh_catalog()
+    attendees = [name.strip() for name in args.get("users", "").split(",") if name.strip()]
+    count = max(1, int_arg(args, "count", DEFAULT_COUNT))
+    try:
+        results = watch_planner.next_films(attendees, count)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return {"status": "success", "users": attendees or watch_planner.users(), "results": results}, 200
+
+
+def handle_watch_mark(data: Dict) -> Tuple[Dict, int]:
+    """Marque un film comme vu (`watched` absent ou vrai) ou non vu."""
+    refresh_catalog()
+    film = watch_planner.catalog.get(data.get("film_id"))
+    if film is None:
+        return {"error": "Film non trouvé"}, 400
+    watched = bool(data.get("watched", True))
+    changed = watch_planner.mark_watched(film, watched)
+    return {"status": "success", "film": film.to_dict(), "watched": watched, "changed": changed}, 200
+
+
+def handle_watch_list() -> Tuple[Dict, int]:
+    refresh_catalog()
+    return {"status": "success", "results": watch_planner.watched_films()}, 200
+
+
+def snapshot_user(sess: Mapping, args: Mapping) -> Tuple[Optional[str], Optional[Tuple[Dict, int]]]:
+    """Utilisateur dont on consulte les versions (celui de la session), ou la réponse d'erreur.
+
+    Les classements des autres ne sont pas consultables : le paramètre `user`, s'il est donné, doit
+    désigner l'utilisateur de la session.
+    """
+    user_name = sess.get("user_name")
+    if not user_name:
+        return None, NOT_STARTED
+    if args.get("user", user_name) != user_name:
+        return None, FORBIDDEN
+    return user_name, None
+
+
+def handle_snapshots(sess: Mapping, args: Mapping) -> Tuple[Dict, int]:
+    """Versions enregistrées du classement de l'utilisateur de la session."""
+    user_name, error = snapshot_user(sess, args)
+    if error is not None:
+        return error
+    try:
+        versions = snapshot_store.history(user_name)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return {"status": "success", "user": user_name, "versions": versions}, 200
+
+
+def handle_snapshot_diff(sess: Mapping, args: Mapping) -> Tuple[Dict, int]:
+    """Films déplacés entre deux versions (`from`, `to` ; par défaut les deux dernières)."""
+    user_name, error = snapshot_user(sess, args)
+    if error is not None:
+        return error
+    try:
+        diff = snapshot_store.diff(user_name, int_arg(args, "from", 0) or None, int_arg(args, "to", 0) or None)
+    except (FileNotFoundError, ValueError) as e:
+        return {"error": str(e)}, 404
+
+    catalog = ranking_tool.catalog
+
+    def describe(film_id: int) -> str:
+        film = catalog.get(film_id)
+        return film.description if film is not None else ""
+
+    moves = diff.moves(limit=int_arg(args, "limit", RESULTS_PAGE_SIZE) or None)
+    return {
+        "status": "success",
+        "user": user_name,
+        "from": diff.old.version,
+        "to": diff.new.version,
+        "moves": [{**move, "description": describe(move["id"])} for move in moves],
+        "added": [{"id": film_id, "description": describe(film_id)} for film_id in diff.added.tolist()],
+        "removed": [{"id": film_id, "description": describe(film_id)} for film_id in diff.removed.tolist()],
+    }, 200
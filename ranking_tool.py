@@ -0,0 +1,643 @@
+"""
+Outil de pair ranking pour classer des films selon les préférences utilisateur.
+Utilise TrueSkill pour optimiser le nombre de comparaisons nécessaires.
+
+Bibliothèque de l'outil en ligne de commande (`pair_ranking.py`) : `questionary` (et prompt_toolkit
+derrière lui) n'est importé qu'au premier dialogue, les commandes non interactives ne le chargent pas.
+"""
+
+import csv
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple, Optional
+
+import numpy as np
+from trueskill import Rating, setup
+
+from comparison_log import ComparisonLog
+from convergence import DEFAULT_TARGET, ConvergenceTracker
+from film_catalog import Film, FilmCatalog
+from group_scheduler import GroupScheduler
+from metrics import SessionProfiler, registry, timed
+from pair_selection import DEFAULT_STRATEGY, GroupSelector, TopKSelector, create_selector
+from rank_uncertainty import RankReport, catalog_report
+from rating_backend import DEFAULT_BACKEND, create_ratings
+from refit import refit_ratings
+from snapshot_store import Snapshot, SnapshotStore, export_csv
+from top_k import DEFAULT_TOP_K
+
+# Import en masse : comparaisons appliquées (et journalisées) par lots de cette taille
+IMPORT_BATCH_SIZE = 10000
+
+# Codes de résultat acceptés à l'import (1 = film A gagne, 2 = film B gagne, 3 = égalité, 0 = passée)
+RESULT_CODES = {"1": 1, "a": 1, "2": 2, "b": 2, "3": 3, "=": 3, "égalité": 3, "0": 0, "passer": 0}
+
+
+def read_judgments(path: str, delimiter: Optional[str] = None) -> Iterator[Tuple[int, List[str]]]:
+    """Parcourt un fichier de jugements (film A, film B, résultat) ligne à ligne, sans le charger en mémoire."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if delimiter is None:
+            sample = f.read(64 * 1024)
+            f.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=";,\t").delimiter
+            except csv.Error:
+                delimiter = ";"
+        reader = csv.reader(f, delimiter=delimiter)
+        for row in reader:
+            yield reader.line_num, row
+
+
+class PairRankingTool:
+    def __init__(
+        self,
+        source_file: str = "ListeATrier.md",
+        strategy: str = DEFAULT_STRATEGY,
+        backend: str = DEFAULT_BACKEND,
+        fsync_every: int = 1,
+        target_confidence: float = DEFAULT_TARGET,
+        top_k: int = DEFAULT_TOP_K,
+        refit: bool = False,
+        report: bool = False,
+        genre: Optional[str] = None,
+        category: Optional[str] = None,
+    ):
+        # Configuration TrueSkill
+        setup(mu=25.0, sigma=8.333, beta=4.166, tau=0.0833, draw_probability=0.0)
+
+        self.source_file = source_file
+        self.backend = backend
+        self.catalog = FilmCatalog()
+        self.films = self.catalog.films
+        self.user_ratings = create_ratings(backend, [])  # {film_id: Rating}
+        self.comparisons_made = 0
+        self.user_name = ""
+        self.output_file = ""
+        self.selection = (genre, category)  # Facette des films comparés (None : tous)
+        self.top_k: Optional[int] = None  # Taille du top-K en mode classement partiel
+        self.selector = create_selector(strategy)
+        if strategy == TopKSelector.name:
+            self.set_top_k(top_k)
+        self.convergence = ConvergenceTracker(target_confidence)
+        self.auto_stop = False
+        self.fsync_every = fsync_every
+        self.log: Optional[ComparisonLog] = None
+        self.refit = refit  # Réajustement global des scores avant le classement final
+        self.report = report  # Intervalles de rangs et probabilité de top-K dans le CSV final
+        self.snapshots = SnapshotStore()  # Versions successives du classement (le CSV en est l'export)
+
+    @timed("load_films")
+    def load_films(self) -> None:
+        """Charge la liste de films depuis le fichier source."""
+        try:
+            self.use_catalog(FilmCatalog.from_file(self.source_file))
+            print(f"✓ {len(self.films)} films chargés depuis {self.source_file}")
+            if len(self.selection_films()) < 2:
+                print("❌ Moins de deux films pour ce genre et cette catégorie")
+                exit(1)
+
+        except FileNotFoundError:
+            print(f"❌ Fichier {self.source_file} non trouvé")
+            exit(1)
+        except Exception as e:
+            print(f"❌ Erreur lors du chargement: {e}")
+            exit(1)
+
+    def use_catalog(self, catalog: FilmCatalog) -> None:
+        """Classe les films d'un catalogue déjà chargé (ratings remis à zéro)."""
+        self.catalog = catalog
+        self.films = catalog.films
+        self.user_ratings = create_ratings(self.backend, catalog.ids)
+        self.selector.reset(self.selection_films(), self.user_ratings)
+        self.convergence.reset(self.selection_films(), self.user_ratings)
+
+    def selection_films(self) -> List[Film]:
+        """Films parmi lesquels les paires sont choisies (genre et/ou catégorie demandés, sinon tous)."""
+        return self.catalog.facet_films(*self.selection)
+
+    def detect_existing_csv(self) -> Optional[str]:
+        """Détecte s'il existe un fichier CSV pour reprendre le classement."""
+        import questionary
+
+        csv_files = []
+        for file in os.listdir("."):
+            if file.startswith("ListeATrier.") and file.endswith(".csv"):
+                # Extraire le nom d'utilisateur du fichier
+                user_name = file.replace("ListeATrier.", "").replace(".csv", "")
+                csv_files.append((file, user_name))
+
+        if not csv_files:
+            return None
+
+        print(f"\n📁 Fichiers CSV existants détectés:")
+        for i, (file, user) in enumerate(csv_files, 1):
+            print(f"  {i}. {file} (utilisateur: {user})")
+
+        choice = questionary.select(
+            "Voulez-vous reprendre un classement existant?",
+            choices=["Nouveau classement"] + [f"Reprendre {user}" for _, user in csv_files],
+        ).ask()
+
+        if choice == "Nouveau classement":
+            return None
+
+        # Trouver le fichier correspondant au choix
+        for i, (file, user) in enumerate(csv_files, 1):
+            if choice == f"Reprendre {user}":
+                return file
+
+        return None
+
+    def load_existing_ratings(self, csv_file: str) -> None:
+        """Charge les ratings existants : dernière version enregistrée, à défaut le fichier CSV."""
+        try:
+            user_name = os.path.basename(csv_file)[len("ListeATrier.") : -len(".csv")]
+            snapshot = self.latest_snapshot(user_name, csv_file)
+            if snapshot is not None:
+                self.load_snapshot(snapshot)
+                self.user_name = user_name
+                self.output_file = csv_file
+            else:
+                self.load_csv_ratings(csv_file)
+
+            # Le journal des comparaisons, s'il existe, est plus précis que le classement enregistré
+            self.log = ComparisonLog(self.user_name, fsync_every=self.fsync_every)
+            if self.log.exists():
+                # Sans point de contrôle ni `reset`, les réponses rejouées s'ajoutent à l'état chargé
+                loaded = 0 if self.log.has_baseline() else self.comparisons_made
+                self.comparisons_made = loaded + self.log.replay(self.user_ratings, self.catalog.resolve)
+                print(f"✓ Journal des comparaisons rejoué: {self.log.path}")
+
+            self.selector.reset(self.selection_films(), self.user_ratings)
+            self.convergence.reset(self.selection_films(), self.user_ratings)
+            print(f"✓ Classement existant chargé: {self.comparisons_made} comparaisons effectuées")
+            print(f"✓ Utilisateur: {self.user_name}")
+
+        except Exception as e:
+            print(f"❌ Erreur lors du chargement du CSV existant: {e}")
+            print("✓ Démarrage d'un nouveau classement...")
+            self.comparisons_made = 0
+
+    def latest_snapshot(self, user_name: str, csv_file: str) -> Optional[Snapshot]:
+        """Dernière version enregistrée de l'utilisateur, sauf si le CSV a été modifié depuis."""
+        version = self.snapshots.latest(user_name)
+        if version is None:
+            return None
+        snapshot = self.snapshots.load(user_name, version)
+        if os.path.getmtime(csv_file) > os.path.getmtime(snapshot.path) + 1:
+            return None  # CSV retouché à la main après la sauvegarde : il fait foi
+        return snapshot
+
+    def load_snapshot(self, snapshot: Snapshot) -> None:
+        """Reprend les ratings d'une version enregistrée (identifiants stables, sans analyse de texte)."""
+        for film_id, mu, sigma in zip(snapshot.ids.tolist(), snapshot.mu.tolist(), snapshot.sigma.tolist()):
+            film_id = self.catalog.resolve(film_id)
+            if film_id is not None:
+                self.user_ratings[film_id] = Rating(mu=mu, sigma=sigma)
+        self.comparisons_made = snapshot.comparisons
+        print(f"✓ Version {snapshot.version} du classement chargée: {snapshot.path}")
+
+    def load_csv_ratings(self, csv_file: str) -> None:
+        """Charge les ratings depuis un fichier CSV (classements sauvegardés sans version binaire)."""
+        with open(csv_file, "r", encoding="utf-8") as f:
+            reader = csv.reader(f, delimiter=";")
+
+            # Lire les métadonnées
+            metadata = {}
+            for row in reader:
+                if row and row[0].startswith("#"):
+                    if "Comparaisons effectuées:" in row[0]:
+                        metadata["comparisons"] = int(row[0].split(":")[1].strip())
+                    elif "Classement personnel de" in row[0]:
+                        metadata["user"] = row[0].split("Classement personnel de", 1)[1].strip()
+                elif row and row[0] == "Rang":  # En-tête des colonnes
+                    break
+
+            # Lire les données des films
+            for row in reader:
+                if len(row) >= 7 and row[0].isdigit():
+                    try:
+                        mu = float(row[4])  # Score_Mu
+                        sigma = float(row[5])  # Score_Sigma
+                    except (ValueError, IndexError):
+                        continue
+
+                    # Le rang change d'une sauvegarde à l'autre : on identifie le film par sa description
+                    film = self.catalog.find_description(row[1])
+                    if film is not None:
+                        self.user_ratings[film.id] = Rating(mu=mu, sigma=sigma)
+
+        # Mettre à jour les métadonnées
+        if "comparisons" in metadata:
+            self.comparisons_made = metadata["comparisons"]
+        if "user" in metadata:
+            self.user_name = metadata["user"]
+            self.output_file = csv_file
+
+    def find_film(self, reference: str) -> Optional[Film]:
+        """Film désigné par son identifiant (ou son ancien numéro de ligne) ou par sa description."""
+        return self.catalog.find(reference)
+
+    def authenticate_user(self) -> None:
+        """Authentification simple de l'utilisateur."""
+        import questionary
+
+        self.user_name = questionary.text("Entrez votre nom d'utilisateur:").ask()
+
+        if not self.user_name:
+            self.user_name = "Anonyme"
+
+        self.output_file = f"ListeATrier.{self.user_name}.csv"
+        self.log = ComparisonLog(self.user_name, fsync_every=self.fsync_every)
+        self.log.start_session()
+        print(f"✓ Utilisateur: {self.user_name}")
+        print(f"✓ Fichier de sortie: {self.output_file}")
+
+    def set_top_k(self, top_k: int) -> None:
+        """Passe en mode top-K : seules les positions du top comptent, les comparaisons s'y concentrent."""
+        self.top_k = top_k
+        self.selector = create_selector(TopKSelector.name, top_k=top_k)
+        self.selector.reset(self.selection_films(), self.user_ratings)
+
+    def use_group_ranking(self) -> None:
+        """Stratégie "group" : oriente les paires d'après les classements des autres utilisateurs (fichiers CSV)."""
+        scheduler = GroupScheduler()
+        scheduler.refresh([(self.user_name, self.user_ratings)], self.catalog)
+        self.selector.group = scheduler.view(self.user_name)
+        self.selector.reset(self.selection_films(), self.user_ratings)
+        print("👥 Paires choisies d'après le classement de groupe")
+
+    def select_ranking_mode(self) -> None:
+        """Permet à l'utilisateur de choisir entre un classement complet et un top-K."""
+        import questionary
+
+        choice = questionary.select(
+            "Que souhaitez-vous classer?",
+            choices=["Toute la liste", "Seulement les meilleurs films (top-K)"],
+        ).ask()
+
+        if choice == "Seulement les meilleurs films (top-K)":
+            top_k = questionary.text(
+                "Taille du top:", default=str(DEFAULT_TOP_K), validate=lambda x: x.isdigit() and int(x) > 0
+            ).ask()
+            self.set_top_k(min(int(top_k), len(self.films)))
+
+    def select_comparison_count(self) -> int:
+        """Permet à l'utilisateur de choisir le nombre de comparaisons."""
+        import questionary
+
+        choices = [
+            ("Rapide (20 comparaisons)", 20),
+            ("Standard (50 comparaisons)", 50),
+            ("Complet (100 comparaisons)", 100),
+            (f"Automatique (jusqu'à {self.convergence.target:.0%} de confiance)", 0),
+            ("Personnalisé", -1),
+        ]
+
+        choice = questionary.select(
+            "Combien de comparaisons souhaitez-vous faire?", choices=[c[0] for c in choices]
+        ).ask()
+
+        if choice == "Personnalisé":
+            count = questionary.text("Nombre de comparaisons:", validate=lambda x: x.isdigit() and int(x) > 0).ask()
+            return int(count)
+
+        for desc, count in choices:
+            if choice == desc:
+                if count == 0:
+                    # Arrêt à la convergence, borné par le nombre de paires distinctes
+                    self.auto_stop = True
+                    return len(self.films) * (len(self.films) - 1) // 2
+                return count
+
+        return 50  # Par défaut
+
+    @timed("get_random_pair")
+    def get_random_pair(self) -> Tuple[Optional[Film], Optional[Film]]:
+        """Sélectionne la prochaine paire de films selon la stratégie choisie."""
+        if len(self.films) < 2:
+            return None, None
+
+        return self.selector.next_pair()
+
+    def display_film(self, film: Film) -> str:
+        """Affiche un film de manière formatée."""
+        return f"{film.genre} | {film.category}\n\n  {film.description}\n"
+
+    def make_comparison(self, film1: Film, film2: Film) -> Optional[int]:
+        """Effectue une comparaison entre deux films."""
+        import questionary
+
+        print(f"\n{'='*60}")
+        print(f"Comparaison {self.comparisons_made + 1}")
+        print(f"{'='*60}")
+
+        print(f"\n🎬 FILM A: {self.display_film(film1)}")
+        print(f"\n🎬 FILM B: {self.display_film(film2)}")
+
+        choice = questionary.select(
+            "\nQuel film préférez-vous?",
+            choices=["Film A", "Film B", "Égalité", "Passer cette comparaison", "Arrêter le classement"],
+        ).ask()
+
+        if choice == "Arrêter le classement":
+            return None
+        elif choice == "Passer cette comparaison":
+            return 0
+        elif choice == "Film A":
+            return 1
+        elif choice == "Film B":
+            return 2
+        elif choice == "Égalité":
+            return 3
+
+        return 0
+
+    @timed("update_ratings")
+    def update_ratings(self, film1: Film, film2: Film, result: int) -> None:
+        """Met à jour les ratings TrueSkill selon le résultat de la comparaison."""
+        if result == 0:  # Passer
+            return
+
+        self.user_ratings.rate_1vs1(film1.id, film2.id, result)
+        self.selector.notify(film1, film2)
+        self.convergence.notify(film1, film2)
+
+    def update_ratings_batch(self, comparisons: List[Tuple[Film, Film, int]]) -> None:
+        """Applique un lot de comparaisons (film1, film2, résultat) en un seul appel au backend."""
+        self.user_ratings.rate_batch((film1.id, film2.id, result) for film1, film2, result in comparisons)
+
+        for film1, film2, result in comparisons:
+            if result > 0:
+                self.selector.notify(film1, film2)
+                self.convergence.notify(film1, film2)
+
+    @timed("import_comparisons")
+    def import_comparisons(self, comparisons: Iterable[Tuple[Film, Film, int]], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """Applique un flux de comparaisons par lots (journal puis ratings) et retourne le nombre appliqué.
+
+        Les paires candidates et le suivi de convergence ne sont recalculés qu'une fois, à la fin.
+        """
+        applied = 0
+        batch: List[Tuple[int, int, int]] = []
+        for film1, film2, result in comparisons:
+            batch.append((film1.id, film2.id, result))
+            if len(batch) >= batch_size:
+                applied += self._import_batch(batch)
+                batch = []
+        if batch:
+            applied += self._import_batch(batch)
+
+        self.selector.reset(self.selection_films(), self.user_ratings)
+        self.convergence.reset(self.selection_films(), self.user_ratings)
+        return applied
+
+    def _import_batch(self, batch: List[Tuple[int, int, int]]) -> int:
+        self.log.append_many(batch)
+        applied = self.user_ratings.rate_batch(batch)
+        self.comparisons_made += applied
+        if self.log.needs_checkpoint():
+            self.save_progress()
+        return applied
+
+    def run_import(
+        self,
+        path: str,
+        user_name: str,
+        fresh: bool = False,
+        delimiter: Optional[str] = None,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> None:
+        """Importe sans interaction un fichier de jugements pour un utilisateur et sauvegarde son classement."""
+        self.load_films()
+
+        # Les jugements s'ajoutent au classement existant de l'utilisateur, sauf --fresh
+        self.user_name = user_name
+        self.output_file = f"ListeATrier.{user_name}.csv"
+        if not fresh and os.path.exists(self.output_file):
+            self.load_existing_ratings(self.output_file)
+        if self.log is None:
+            self.log = ComparisonLog(self.user_name, fsync_every=self.fsync_every)
+            self.log.start_session()
+
+        rejected = 0
+
+        def judgments() -> Iterator[Tuple[Film, Film, int]]:
+            nonlocal rejected
+            for line_num, row in read_judgments(path, delimiter):
+                if not row or row[0].startswith("#"):
+                    continue
+                result = RESULT_CODES.get(row[2].strip().lower()) if len(row) >= 3 else None
+                film1 = self.find_film(row[0])
+                film2 = self.find_film(row[1]) if len(row) >= 2 else None
+                if result is None or film1 is None or film2 is None or film1 is film2:
+                    if line_num == 1 and result is None:
+                        continue  # Ligne d'en-tête
+                    rejected += 1
+                    if rejected <= 10:
+                        print(f"⚠️  Ligne {line_num} ignorée: {row}")
+                    continue
+                yield film1, film2, result
+
+        before = self.comparisons_made
+        applied = self.import_comparisons(judgments(), batch_size)
+        print(f"✓ {applied} comparaisons importées depuis {path} ({rejected} lignes ignorées)")
+
+        if self.comparisons_made > 0:
+            if self.refit:
+                self.refit_scores()
+            self.save_final_ranking(self.generate_ranking())
+            print(f"📁 Résultat sauvegardé: {self.output_file} ({before} + {applied} comparaisons)")
+        else:
+            print(f"⚠️  Aucune comparaison effectuée. Aucun classement généré.")
+        self.save_progress()
+        self.log.close()
+
+    @timed("refit")
+    def refit_scores(self) -> None:
+        """Réajuste les ratings sur tout l'historique du journal (Bradley–Terry), indépendamment de l'ordre des réponses."""
+        used = refit_ratings(self.user_ratings, self.log.history(self.catalog.resolve))
+        self.selector.reset(self.selection_films(), self.user_ratings)
+        self.convergence.reset(self.selection_films(), self.user_ratings)
+        print(f"✓ Scores réajustés sur {used} comparaisons (Bradley–Terry)")
+
+    def record_comparison(self, film1: Film, film2: Film, result: int) -> None:
+        """Ajoute la réponse au journal des comparaisons (O(1) par réponse)."""
+        self.log.append(film1.id, film2.id, result)
+        if self.log.needs_checkpoint():
+            self.save_progress()
+
+    @timed("save_progress")
+    def save_progress(self) -> None:
+        """Sauvegarde un point de contrôle des ratings pour borner le rejeu du journal."""
+        self.log.checkpoint(self.user_ratings, self.comparisons_made)
+
+    def generate_ranking(self) -> List[Film]:
+        """Génère la liste finale triée par rating."""
+        if self.top_k:
+            # Mode top-K : seuls les K films du tas du sélecteur sont triés
+            return [self.catalog.get(film_id) for film_id in self.selector.top.members()]
+
+        # Trier par mu (rating moyen) décroissant, directement sur le tableau des mu
+        mu, _ = self.user_ratings.as_arrays()
+        return [self.films[i] for i in np.argsort(-mu, kind="stable")]
+
+    def ranking_header(self) -> List[str]:
+        """Lignes de métadonnées en tête du CSV."""
+        header = [
+            f"# Classement personnel de {self.user_name}",
+            f"# Généré le: {datetime.now().strftime('%d/%m/%Y à %H:%M')}",
+            f"# Comparaisons effectuées: {self.comparisons_made}",
+            f"# Score de confiance moyen: {self.calculate_confidence():.2f}",
+        ]
+        if self.top_k:
+            header.append(f"# Top-{self.top_k} sur {len(self.films)} films")
+            header.append(f"# Confiance du top-{self.top_k}: {self.calculate_top_k_confidence():.2f}")
+        return header
+
+    @timed("rank_report")
+    def rank_report(self) -> RankReport:
+        """Incertitude des rangs par tirages dans la loi de chaque film (en mode top-K : parmi les films comparés)."""
+        mu, sigma = self.user_ratings.as_arrays()
+        films = self.selection_films() if self.top_k else self.films
+        return catalog_report(mu, sigma, [film.index for film in films], self.top_k or DEFAULT_TOP_K)
+
+    def save_final_ranking(self, ranked_films: List[Film]) -> None:
+        """Sauvegarde le classement final : nouvelle version binaire, puis son export CSV."""
+        mu, sigma = self.user_ratings.as_arrays()
+        positions = np.fromiter((film.index for film in ranked_films), dtype=np.int64, count=len(ranked_films))
+        header = self.ranking_header()
+        report = None
+        if self.report:
+            report = self.rank_report()
+            header.append(report.header())
+        snapshot = self.snapshots.save(
+            self.user_name,
+            np.fromiter((film.id for film in ranked_films), dtype=np.uint64, count=len(ranked_films)),
+            np.asarray(mu)[positions],
+            np.asarray(sigma)[positions],
+            self.comparisons_made,
+            {"header": header},
+        )
+        export_csv(snapshot, self.catalog, self.output_file, report.take(positions) if report else None)
+
+        print(f"✓ Classement sauvegardé dans {self.output_file} (version {snapshot.version}: {snapshot.path})")
+
+    def calculate_confidence(self) -> float:
+        """Calcule un score de confiance basé sur la variance des ratings."""
+        if not self.user_ratings:
+            return 0.0
+
+        # Score basé sur l'inverse de la variance moyenne
+        avg_sigma = self.user_ratings.mean_sigma()
+        return max(0, 1 - (avg_sigma / 8.333))  # Normalisé par rapport à sigma initial
+
+    def calculate_top_k_confidence(self) -> float:
+        """Probabilité moyenne que chaque film du top batte le meilleur film exclu."""
+        return self.selector.top.confidence() if self.top_k else 0.0
+
+    def run(self) -> None:
+        """Lance l'outil de pair ranking."""
+        print("🎬 Outil de Pair Ranking pour Films")
+        print("=" * 40)
+
+        # Chargement des données
+        self.load_films()
+
+        # Détection et chargement d'un classement existant
+        existing_csv = self.detect_existing_csv()
+        if existing_csv:
+            self.load_existing_ratings(existing_csv)
+        else:
+            self.authenticate_user()
+
+        # S'assurer qu'un fichier de sortie est défini
+        if not self.output_file:
+            self.output_file = f"ListeATrier.{self.user_name}.csv"
+        if self.log is None:
+            self.log = ComparisonLog(self.user_name, fsync_every=self.fsync_every)
+            self.log.start_session()
+
+        # Classement complet ou top-K, puis nombre de comparaisons
+        if self.top_k is None:
+            self.select_ranking_mode()
+        if isinstance(self.selector, GroupSelector):
+            self.use_group_ranking()
+        max_comparisons = self.select_comparison_count()
+
+        if self.auto_stop:
+            print(f"\n✓ Prêt à commencer! Arrêt automatique à {self.convergence.target:.0%} de confiance.")
+        else:
+            print(f"\n✓ Prêt à commencer! {max_comparisons} comparaisons maximum.")
+        if self.comparisons_made > 0:
+            print(f"✓ Reprise: {self.comparisons_made} comparaisons déjà effectuées")
+        print("Appuyez sur Entrée pour commencer...")
+        input()
+
+        # Profil optionnel de la session (RANKING_PROFILE=cprofile|tracemalloc)
+        profiler = SessionProfiler()
+        profiler.start(self.user_name)
+
+        with profiler.run(self.user_name):
+            while self.comparisons_made < max_comparisons:
+                film1, film2 = self.get_random_pair()
+                if not film1 or not film2:
+                    break
+
+                result = self.make_comparison(film1, film2)
+
+                if result is None:  # Arrêt demandé
+                    break
+
+                if result > 0:  # Comparaison valide
+                    self.update_ratings(film1, film2, result)
+                    self.comparisons_made += 1
+
+                # Sauvegarde après chaque réponse (y compris les comparaisons passées, pour l'historique)
+                self.record_comparison(film1, film2, result)
+
+                if result > 0:
+                    convergence = f"confiance d'ordre {self.convergence.confidence:.0%}/{self.convergence.target:.0%}"
+                    if self.auto_stop:
+                        print(f"✓ Comparaison {self.comparisons_made} terminée ({convergence})")
+                    else:
+                        print(f"✓ Comparaison {self.comparisons_made}/{max_comparisons} terminée ({convergence})")
+                    if self.top_k:
+                        print(f"  Confiance du top-{self.top_k}: {self.calculate_top_k_confidence():.0%}")
+
+                    if self.auto_stop and self.convergence.converged:
+                        print("\n🎯 Classement stabilisé: confiance cible atteinte")
+                        break
+
+        # Génération du classement final
+        if self.comparisons_made > 0:
+            print(f"\n🎯 Génération du classement final...")
+            if self.refit:
+                self.refit_scores()
+            ranked_films = self.generate_ranking()
+            self.save_final_ranking(ranked_films)
+        else:
+            print(f"\n⚠️  Aucune comparaison effectuée. Aucun classement généré.")
+            self.log.close()
+            self.report_metrics(profiler)
+            return
+
+        # Point de contrôle final : une reprise n'aura rien à rejouer
+        self.save_progress()
+        self.log.close()
+
+        print(f"\n✅ Classement terminé!")
+        print(f"📊 {self.comparisons_made} comparaisons effectuées")
+        if self.top_k:
+            print(f"🏆 Confiance du top-{self.top_k}: {self.calculate_top_k_confidence():.0%}")
+        print(f"📁 Résultat sauvegardé: {self.output_file}")
+        self.report_metrics(profiler)
+
+    def report_metrics(self, profiler: SessionProfiler) -> None:
+        """Écrit le profil de la session et affiche les mesures de temps si elles sont activées."""
+        profiler.stop(self.user_name)
+        if registry.enabled:
+            print(f"\n⏱️  Mesures de temps:")
+            for line in registry.summary():
+                print(f"  {line}")
@@ -0,0 +1,248 @@
+"""
+Backends de stockage et de mise à jour des ratings TrueSkill.
+
+- "numpy"     : (défaut) mu/sigma de tous les films dans deux tableaux contigus, mise à jour 1v1 en forme close
+                et application vectorisée de lots de comparaisons
+- "trueskill" : un objet `Rating` par film, mis à jour via `trueskill.rate` (comportement historique)
+
+Les deux backends se manipulent comme un dictionnaire {film_id: Rating}.
+Codes de résultat : 1 = film 1 gagne, 2 = film 2 gagne, 3 = égalité, 0 = comparaison passée.
+"""
+
+import math
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from trueskill import Rating, calc_draw_margin, global_env, rate
+
+DEFAULT_BACKEND = "numpy"
+
+Comparison = Tuple[int, int, int]  # (film1_id, film2_id, résultat)
+
+
+class TrueSkillRatings(dict):
+    """Ratings stockés objet par objet et mis à jour par le graphe de facteurs de `trueskill`."""
+
+    name = "trueskill"
+
+    def __init__(self, film_ids: Iterable[int] = ()):
+        super().__init__((film_id, Rating()) for film_id in film_ids)
+
+    def rate_1vs1(self, id1: int, id2: int, result: int) -> Tuple[Rating, Rating]:
+        """Applique une comparaison et retourne les nouveaux ratings des deux films."""
+        rating1, rating2 = self[id1], self[id2]
+
+        if result == 1:  # Film 1 gagne
+            (rating1,), (rating2,) = rate([(rating1,), (rating2,)])
+        elif result == 2:  # Film 2 gagne
+            (rating2,), (rating1,) = rate([(rating2,), (rating1,)])
+        elif result == 3:  # Égalité
+            (rating1,), (rating2,) = rate([(rating1,), (rating2,)], ranks=[0, 0])
+
+        self[id1], self[id2] = rating1, rating2
+        return rating1, rating2
+
+    def rate_batch(self, comparisons: Iterable[Comparison]) -> int:
+        """Applique une suite de comparaisons dans l'ordre et retourne le nombre appliqué."""
+        applied = 0
+        for id1, id2, result in comparisons:
+            if result in (1, 2, 3):
+                self.rate_1vs1(id1, id2, result)
+                applied += 1
+        return applied
+
+    def mean_sigma(self) -> float:
+        """Sigma moyen sur tous les films."""
+        return sum(rating.sigma for rating in self.values()) / len(self) if self else 0.0
+
+    def reindex(self, film_ids: Sequence[int]) -> None:
+        """Passe à une nouvelle liste de films : ratings conservés pour les films restants, défaut pour les nouveaux."""
+        ratings = {film_id: self.get(film_id) or Rating() for film_id in film_ids}
+        self.clear()
+        self.update(ratings)
+
+    def as_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Tableaux (mu, sigma) dans l'ordre d'insertion des films."""
+        mu = np.fromiter((rating.mu for rating in self.values()), dtype=np.float64, count=len(self))
+        sigma = np.fromiter((rating.sigma for rating in self.values()), dtype=np.float64, count=len(self))
+        return mu, sigma
+
+
+# --- Fonctions statistiques vectorisées (mêmes approximations que le backend interne de trueskill) ---
+
+
+_ERFC_COEFFS = (
+    1.00002368,
+    0.37409196,
+    0.09678418,
+    -0.18628806,
+    0.27886807,
+    -1.13520398,
+    1.48851587,
+    -0.82215223,
+    0.17087277,
+)
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    z = np.abs(x)
+    t = 1.0 / (1.0 + z / 2.0)
+    poly = np.zeros_like(t)
+    for coeff in reversed(_ERFC_COEFFS):
+        poly = coeff + t * poly
+    r = t * np.exp(-z * z - 1.26551223 + t * poly)
+    return np.where(x < 0, 2.0 - r, r)
+
+
+def _cdf(x: np.ndarray) -> np.ndarray:
+    return 0.5 * _erfc(-x / math.sqrt(2))
+
+
+def _pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-(x**2) / 2) / math.sqrt(2 * math.pi)
+
+
+def _v_w_win(t: np.ndarray, eps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    x = t - eps
+    denom = _cdf(x)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v = np.where(denom > 0, _pdf(x) / denom, -x)
+    return v, v * (v + x)
+
+
+def _v_w_draw(t: np.ndarray, eps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    abs_t = np.abs(t)
+    a, b = eps - abs_t, -eps - abs_t
+    denom = _cdf(a) - _cdf(b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v_abs = np.where(denom != 0, (_pdf(b) - _pdf(a)) / denom, a)
+        w = v_abs**2 + np.where(denom != 0, (a * _pdf(a) - b * _pdf(b)) / denom, 0.0)
+    return np.where(t < 0, -v_abs, v_abs), w
+
+
+class NumpyRatings(MutableMapping):
+    """Ratings de tous les films dans deux tableaux NumPy contigus (mu, sigma)."""
+
+    name = "numpy"
+
+    def __init__(self, film_ids: Iterable[int] = ()):
+        env = global_env()
+        self.ids: List[int] = list(film_ids)
+        self.positions: Dict[int, int] = {film_id: pos for pos, film_id in enumerate(self.ids)}
+        self.mu = np.full(len(self.ids), env.mu, dtype=np.float64)
+        self.sigma = np.full(len(self.ids), env.sigma, dtype=np.float64)
+
+        # Paramètres figés à la création pour rester cohérent avec `setup(...)`
+        self.beta = env.beta
+        self.tau = env.tau
+        self.draw_margin = calc_draw_margin(env.draw_probability, 2, env)
+
+    def __getitem__(self, film_id: int) -> Rating:
+        pos = self.positions[film_id]
+        return Rating(mu=float(self.mu[pos]), sigma=float(self.sigma[pos]))
+
+    def __setitem__(self, film_id: int, rating: Rating) -> None:
+        pos = self.positions[film_id]
+        self.mu[pos] = rating.mu
+        self.sigma[pos] = rating.sigma
+
+    def __delitem__(self, film_id: int) -> None:
+        raise TypeError("Impossible de retirer un film d'un stockage NumPy")
+
+    def reindex(self, film_ids: Sequence[int]) -> None:
+        """Passe à une nouvelle liste de films : ratings conservés pour les films restants, défaut pour les nouveaux."""
+        env = global_env()
+        ids = list(film_ids)
+        old = np.fromiter((self.positions.get(film_id, -1) for film_id in ids), dtype=np.int64, count=len(ids))
+        kept = old >= 0
+        mu = np.full(len(ids), env.mu, dtype=np.float64)
+        sigma = np.full(len(ids), env.sigma, dtype=np.float64)
+        mu[kept] = self.mu[old[kept]]
+        sigma[kept] = self.sigma[old[kept]]
+        self.ids = ids
+        self.positions = {film_id: pos for pos, film_id in enumerate(ids)}
+        self.mu, self.sigma = mu, sigma
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _apply(self, first: np.ndarray, second: np.ndarray, drawn: np.ndarray) -> None:
+        """Met à jour en forme close des paires disjointes (`first` bat `second` sauf si `drawn`)."""
+        var1 = self.sigma[first] ** 2 + self.tau**2
+        var2 = self.sigma[second] ** 2 + self.tau**2
+        c2 = 2 * self.beta**2 + var1 + var2
+        c = np.sqrt(c2)
+        t = (self.mu[first] - self.mu[second]) / c
+        eps = np.full_like(t, self.draw_margin) / c
+
+        v_win, w_win = _v_w_win(t, eps)
+        v_draw, w_draw = _v_w_draw(t, eps)
+        v = np.where(drawn, v_draw, v_win)
+        # Même calcul que trueskill pour les égalités (pas de borne), borne seulement pour les victoires
+        w = np.where(drawn, w_draw, np.clip(w_win, 0.0, 1.0))
+
+        self.mu[first] += var1 / c * v
+        self.mu[second] -= var2 / c * v
+        self.sigma[first] = np.sqrt(var1 * (1 - var1 / c2 * w))
+        self.sigma[second] = np.sqrt(var2 * (1 - var2 / c2 * w))
+
+    def rate_1vs1(self, id1: int, id2: int, result: int) -> Tuple[Rating, Rating]:
+        """Applique une comparaison et retourne les nouveaux ratings des deux films."""
+        self.rate_batch([(id1, id2, result)])
+        return self[id1], self[id2]
+
+    def rate_batch(self, comparisons: Iterable[Comparison]) -> int:
+        """Applique un lot de comparaisons et retourne le nombre appliqué.
+
+        Le lot est découpé en tranches consécutives sans film répété : chaque tranche est
+        appliquée d'un seul coup, ce qui donne le même résultat qu'une application séquentielle.
+        """
+        applied = 0
+        first: List[int] = []
+        second: List[int] = []
+        drawn: List[bool] = []
+        touched = set()
+
+        for id1, id2, result in comparisons:
+            if result not in (1, 2, 3):
+                continue
+            pos1, pos2 = self.positions[id1], self.positions[id2]
+            if result == 2:
+                pos1, pos2 = pos2, pos1
+            if pos1 in touched or pos2 in touched:
+                self._apply(np.array(first), np.array(second), np.array(drawn))
+                applied += len(first)
+                first, second, drawn = [], [], []
+                touched.clear()
+            first.append(pos1)
+            second.append(pos2)
+            drawn.append(result == 3)
+            touched.update((pos1, pos2))
+
+        if first:
+            self._apply(np.array(first), np.array(second), np.array(drawn))
+            applied += len(first)
+        return applied
+
+    def mean_sigma(self) -> float:
+        """Sigma moyen sur tous les films."""
+        return float(self.sigma.mean()) if len(self.ids) else 0.0
+
+    def as_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Tableaux (mu, sigma) dans l'ordre de création des films (sans copie)."""
+        return self.mu, self.sigma
+
+
+BACKENDS = {cls.name: cls for cls in (TrueSkillRatings, NumpyRatings)}
+
+
+def create_ratings(name: str, film_ids: Sequence[int]):
+    """Crée un stockage de ratings initialisé au rating par défaut pour chaque film."""
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Backend de rating inconnu: {name} (disponibles: {', '.join(BACKENDS)})")
+    return backend(film_ids)
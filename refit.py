@@ -0,0 +1,99 @@
+"""
+Réajustement global des scores sur tout l'historique des comparaisons (Bradley–Terry).
+
+Les mises à jour TrueSkill en ligne dépendent de l'ordre des réponses : une réponse bruitée du
+début déplace durablement les scores. Le réajustement résout à la place le modèle de Bradley–Terry
+sur l'ensemble des comparaisons du classement en cours (algorithme MM de Hunter, itérations
+vectorisées par `np.bincount`, une égalité comptant pour une demi-victoire de chaque côté).
+
+Chaque film joue en plus des parties fictives contre un film moyen, en nombre choisi pour
+reproduire l'a priori TrueSkill (mu=25, sigma=8.333) : les scores restent finis pour un film toujours
+gagnant ou jamais comparé. Les forces obtenues sont ramenées à l'échelle TrueSkill (mu, sigma),
+sigma venant de l'information de Fisher de chaque film.
+"""
+
+import math
+from typing import Iterable, MutableMapping, Sequence, Tuple
+
+import numpy as np
+from trueskill import Rating, global_env
+
+PRIOR_GAMES = 2.0
+TOLERANCE = 1e-4  # En force logistique, soit ~0.0004 en mu (scores affichés au centième)
+MAX_ITERATIONS = 1000
+
+# Loi logistique ≈ loi normale de pente 1.702 : écart de force -> écart de mu TrueSkill
+LOGIT_TO_PROBIT = 1.702
+
+Comparison = Tuple[int, int, int]
+
+
+def fit_bradley_terry(
+    first: np.ndarray,
+    second: np.ndarray,
+    result: np.ndarray,
+    count: int,
+    prior_games: float = PRIOR_GAMES,
+    tolerance: float = TOLERANCE,
+    max_iterations: int = MAX_ITERATIONS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Forces (log-gamma, moyenne nulle) et leurs variances pour `count` films.
+
+    `first`, `second` sont les indices des films comparés, `result` le résultat (1, 2 ou 3).
+    """
+    first_score = np.where(result == 1, 1.0, np.where(result == 3, 0.5, 0.0))
+    wins = (
+        np.bincount(first, weights=first_score, minlength=count)
+        + np.bincount(second, weights=1.0 - first_score, minlength=count)
+        + prior_games / 2
+    )
+
+    gamma = np.ones(count)
+    for _ in range(max_iterations):
+        inverse = 1.0 / (gamma[first] + gamma[second])
+        games = np.bincount(first, weights=inverse, minlength=count) + np.bincount(
+            second, weights=inverse, minlength=count
+        )
+        updated = wins / (games + prior_games / (gamma + 1.0))
+        change = np.max(np.abs(np.log(updated / gamma))) if count else 0.0
+        gamma = updated
+        if change < tolerance:
+            break
+
+    strength = np.log(gamma)
+    strength -= strength.mean() if count else 0.0
+
+    # Information de Fisher (diagonale) : somme des p(1 - p) des parties de chaque film
+    p = 1.0 / (1.0 + np.exp(strength[second] - strength[first]))
+    information = np.bincount(first, weights=p * (1 - p), minlength=count) + np.bincount(
+        second, weights=p * (1 - p), minlength=count
+    )
+    p_prior = 1.0 / (1.0 + np.exp(-strength))
+    # Pas en place : sans comparaison, `np.bincount` retourne des entiers
+    information = information + prior_games * p_prior * (1 - p_prior)
+    return strength, 1.0 / information
+
+
+def refit_ratings(ratings: MutableMapping[int, Rating], comparisons: Iterable[Comparison]) -> int:
+    """Remplace les ratings par l'ajustement global sur `comparisons` ; retourne le nombre de comparaisons utilisées."""
+    env = global_env()
+    film_ids: Sequence[int] = list(ratings)
+    positions = {film_id: pos for pos, film_id in enumerate(film_ids)}
+
+    games = [
+        (positions[id1], positions[id2], result)
+        for id1, id2, result in comparisons
+        if result in (1, 2, 3) and id1 in positions and id2 in positions
+    ]
+    scale = math.sqrt(2) * env.beta / LOGIT_TO_PROBIT
+    # Une partie contre un film de même force apporte une information de 1/4 : a priori de variance (sigma/scale)²
+    prior_games = 4 * (scale / env.sigma) ** 2
+
+    data = np.array(games, dtype=np.int64).reshape(-1, 3)
+    strength, variance = fit_bradley_terry(data[:, 0], data[:, 1], data[:, 2], len(film_ids), prior_games)
+
+    mu = env.mu + strength * scale
+    sigma = np.minimum(np.sqrt(variance) * scale, env.sigma)
+    for film_id, m, s in zip(film_ids, mu.tolist(), sigma.tolist()):
+        ratings[film_id] = Rating(mu=m, sigma=s)
+    return len(games)
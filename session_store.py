@@ -0,0 +1,120 @@
+"""
+Stockage en mémoire des sessions web, une entrée par clé (le nom d'utilisateur côté service web :
+deux navigateurs qui donnent le même nom travaillent sur le même classement).
+
+Éviction LRU avec durée de vie (TTL) et plafond mémoire global : les sessions les moins
+récemment utilisées sont retirées en premier quand l'une des limites est dépassée.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class SessionStore:
+    """Sessions LRU avec TTL et plafond mémoire (taille estimée par `sizeof`)."""
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl: float = 4 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        sizeof: Callable[[Any], int] = lambda value: value.memory_size(),
+        on_evict: Optional[Callable[[str, Any], None]] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()  # {sid: (valeur, dernier accès, taille)}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def memory_used(self) -> int:
+        """Mémoire estimée occupée par toutes les sessions."""
+        return self._bytes
+
+    def get(self, sid: str) -> Optional[Any]:
+        """Retourne la session (et la marque comme récemment utilisée), ou None si absente/expirée."""
+        evicted: List[Tuple[str, Any]] = []
+        try:
+            with self._lock:
+                entry = self._entries.get(sid)
+                if entry is None:
+                    return None
+                value, last_access, size = entry
+                now = time.monotonic()
+                if now - last_access > self.ttl:
+                    evicted.append(self._remove(sid))
+                    return None
+
+                # La taille évolue avec la session (tas de paires candidates, etc.)
+                new_size = self.sizeof(value)
+                self._bytes += new_size - size
+                self._entries[sid] = (value, now, new_size)
+                self._entries.move_to_end(sid)
+                self._evict(sid, evicted)
+                return value
+        finally:
+            self._notify(evicted)
+
+    def put(self, sid: str, value: Any) -> None:
+        """Ajoute ou remplace une session."""
+        evicted: List[Tuple[str, Any]] = []
+        try:
+            with self._lock:
+                if sid in self._entries:
+                    evicted.append(self._remove(sid))
+                size = self.sizeof(value)
+                self._entries[sid] = (value, time.monotonic(), size)
+                self._bytes += size
+                self._evict(sid, evicted)
+        finally:
+            self._notify(evicted)
+
+    def pop(self, sid: str) -> Optional[Any]:
+        """Retire une session et la retourne."""
+        with self._lock:
+            if sid not in self._entries:
+                return None
+            evicted = self._remove(sid)
+        self._notify([evicted])
+        return evicted[1]
+
+    def values(self) -> List[Any]:
+        """Copie de la liste des sessions présentes (sans mise à jour de l'ordre LRU)."""
+        with self._lock:
+            return [value for value, _, _ in self._entries.values()]
+
+    def stats(self) -> Dict[str, int]:
+        """Nombre de sessions et mémoire estimée."""
+        return {"sessions": len(self._entries), "memory_bytes": self._bytes}
+
+    def _remove(self, sid: str) -> Tuple[str, Any]:
+        value, _, size = self._entries.pop(sid)
+        self._bytes -= size
+        return sid, value
+
+    def _notify(self, evicted: List[Tuple[str, Any]]) -> None:
+        """Appelle `on_evict` pour les sessions retirées, verrou relâché (l'enregistrement peut attendre le disque)."""
+        if self.on_evict is not None:
+            for sid, value in evicted:
+                self.on_evict(sid, value)
+
+    def _evict(self, keep: str, evicted: List[Tuple[str, Any]]) -> None:
+        """Retire les sessions expirées puis les plus anciennes tant qu'une limite est dépassée."""
+        now = time.monotonic()
+        while self._entries:
+            sid, (_, last_access, _) = next(iter(self._entries.items()))
+            if sid == keep:
+                break
+            over_limit = len(self._entries) > self.max_sessions or self._bytes > self.max_bytes
+            if not over_limit and now - last_access <= self.ttl:
+                break
+            evicted.append(self._remove(sid))
@@ -0,0 +1,279 @@
+"""
+Historique des classements : un instantané binaire par sauvegarde, comparable aux précédents.
+
+Chaque sauvegarde d'un classement crée `classements/<utilisateur>/<version>.rank` (les versions
+précédentes sont gardées). Le fichier contient un en-tête fixe, les métadonnées en JSON (lignes
+d'en-tête du CSV, top-K...) puis les films dans l'ordre du classement, en enregistrements de 16
+octets (identifiant stable, mu et sigma en float32). La lecture projette ces enregistrements en
+mémoire (`np.memmap`) sans les copier ni les analyser.
+
+Le CSV `ListeATrier.<utilisateur>.csv` reste produit à chaque sauvegarde, comme vue exportée du
+dernier instantané (`export_csv`), pour les outils qui le lisent. Un rapport d'incertitude des rangs
+(`rank_uncertainty`) y ajoute ses colonnes après les colonnes habituelles.
+"""
+
+import csv
+import json
+import os
+import struct
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from film_catalog import Film, FilmCatalog
+from metrics import timed
+from rank_uncertainty import REPORT_COLUMNS, RankReport
+
+SNAPSHOT_DIR = "classements"
+SNAPSHOT_SUFFIX = ".rank"
+
+MAGIC = b"FLRK"
+FORMAT_VERSION = 1
+# magic, version du format, nombre de films, comparaisons, date (epoch), taille des métadonnées
+HEADER = struct.Struct("<4sHxxIIdI")
+ALIGNMENT = 16
+RECORD = np.dtype([("id", "<u8"), ("mu", "<f4"), ("sigma", "<f4")])
+
+CSV_COLUMNS = ["Rang", "Description", "Genre", "Catégorie", "Score_Mu", "Score_Sigma", "Score_Confiance"]
+
+
+def csv_row(rank: int, film: Film, mu: float, sigma: float, extra: Sequence = ()) -> List:
+    """Ligne du classement au format CSV (colonnes du rapport d'incertitude éventuelles à la suite)."""
+    confidence = max(0, 1 - (sigma / 8.333))
+    return [rank, film.description, film.genre, film.category, f"{mu:.2f}", f"{sigma:.2f}", f"{confidence:.2f}", *extra]
+
+
+def csv_columns(report: Optional[RankReport] = None) -> List[str]:
+    """En-tête des colonnes du CSV."""
+    return CSV_COLUMNS + REPORT_COLUMNS if report is not None else CSV_COLUMNS
+
+
+class Snapshot:
+    """Classement enregistré, en lecture seule (enregistrements projetés en mémoire)."""
+
+    __slots__ = ("path", "version", "created", "comparisons", "meta", "records")
+
+    def __init__(self, path: str, version: int, created: float, comparisons: int, meta: Dict, records: np.ndarray):
+        self.path = path
+        self.version = version
+        self.created = created
+        self.comparisons = comparisons
+        self.meta = meta
+        self.records = records  # Tableau structuré RECORD, dans l'ordre du classement
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.records["id"]
+
+    @property
+    def mu(self) -> np.ndarray:
+        return self.records["mu"]
+
+    @property
+    def sigma(self) -> np.ndarray:
+        return self.records["sigma"]
+
+    @property
+    def header(self) -> List[str]:
+        return self.meta.get("header", [])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def summary(self) -> Dict:
+        """Champs exposés par la liste des versions."""
+        return {
+            "version": self.version,
+            "created": datetime.fromtimestamp(self.created).isoformat(timespec="seconds"),
+            "comparisons": self.comparisons,
+            "films": len(self),
+        }
+
+
+def read_snapshot(path: str, version: int = 0) -> Snapshot:
+    """Ouvre un instantané ; lève ValueError si le fichier n'en est pas un."""
+    with open(path, "rb") as f:
+        head = f.read(HEADER.size)
+        if len(head) < HEADER.size:
+            raise ValueError(f"Instantané tronqué: {path}")
+        magic, format_version, count, comparisons, created, meta_size = HEADER.unpack(head)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"Format d'instantané inconnu: {path}")
+        meta = json.loads(f.read(meta_size).decode("utf-8"))
+
+    offset = _records_offset(meta_size)
+    if count:
+        records = np.memmap(path, dtype=RECORD, mode="r", offset=offset, shape=(count,))
+    else:
+        records = np.empty(0, dtype=RECORD)  # np.memmap refuse une projection vide
+    return Snapshot(path, version, created, comparisons, meta, records)
+
+
+def _records_offset(meta_size: int) -> int:
+    return -(-(HEADER.size + meta_size) // ALIGNMENT) * ALIGNMENT
+
+
+class SnapshotDiff:
+    """Écart entre deux instantanés : déplacement des films communs, films ajoutés et retirés."""
+
+    __slots__ = ("old", "new", "ids", "old_rank", "new_rank", "mu_change", "added", "removed")
+
+    def __init__(self, old: Snapshot, new: Snapshot):
+        self.old = old
+        self.new = new
+        common, old_pos, new_pos = np.intersect1d(old.ids, new.ids, assume_unique=True, return_indices=True)
+        # Films communs dans l'ordre du nouveau classement
+        order = np.argsort(new_pos, kind="stable")
+        self.ids = common[order]
+        self.old_rank = old_pos[order] + 1
+        self.new_rank = new_pos[order] + 1
+        self.mu_change = new.mu[new_pos[order]].astype(np.float64) - old.mu[old_pos[order]]
+        self.added = np.setdiff1d(new.ids, old.ids, assume_unique=True)
+        self.removed = np.setdiff1d(old.ids, new.ids, assume_unique=True)
+
+    @property
+    def shift(self) -> np.ndarray:
+        """Places gagnées par chaque film commun (positif : monte dans le classement)."""
+        return self.old_rank - self.new_rank
+
+    def moves(self, limit: Optional[int] = None, min_shift: int = 1) -> List[Dict]:
+        """Films déplacés d'au moins `min_shift` places, les plus grands déplacements d'abord."""
+        shift = self.shift
+        moved = np.flatnonzero(np.abs(shift) >= min_shift)
+        moved = moved[np.argsort(-np.abs(shift[moved]), kind="stable")][:limit]
+        return [
+            {
+                "id": int(self.ids[i]),
+                "old_rank": int(self.old_rank[i]),
+                "new_rank": int(self.new_rank[i]),
+                "shift": int(shift[i]),
+                "mu_change": round(float(self.mu_change[i]), 2),
+            }
+            for i in moved
+        ]
+
+
+def check_user_name(user_name: str) -> None:
+    """Refuse un nom d'utilisateur qui ne désigne pas un seul dossier de `classements/` (ValueError)."""
+    if user_name in ("", ".", "..") or any(separator in user_name for separator in "/\\\0"):
+        raise ValueError(f"Nom d'utilisateur invalide: {user_name!r}")
+
+
+class SnapshotStore:
+    """Instantanés versionnés des classements, un dossier par utilisateur."""
+
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        self.directory = directory
+
+    def user_directory(self, user_name: str) -> str:
+        check_user_name(user_name)
+        return os.path.join(self.directory, user_name)
+
+    def path(self, user_name: str, version: int) -> str:
+        return os.path.join(self.user_directory(user_name), f"{version:06d}{SNAPSHOT_SUFFIX}")
+
+    def versions(self, user_name: str) -> List[int]:
+        """Versions enregistrées pour un utilisateur, de la plus ancienne à la plus récente."""
+        try:
+            names = os.listdir(self.user_directory(user_name))
+        except FileNotFoundError:
+            return []
+        return sorted(
+            int(name[: -len(SNAPSHOT_SUFFIX)])
+            for name in names
+            if name.endswith(SNAPSHOT_SUFFIX) and name[: -len(SNAPSHOT_SUFFIX)].isdigit()
+        )
+
+    def latest(self, user_name: str) -> Optional[int]:
+        versions = self.versions(user_name)
+        return versions[-1] if versions else None
+
+    @timed("save_snapshot")
+    def save(
+        self,
+        user_name: str,
+        ids: Sequence[int],
+        mu: Sequence[float],
+        sigma: Sequence[float],
+        comparisons: int = 0,
+        meta: Optional[Dict] = None,
+    ) -> Snapshot:
+        """Enregistre un classement (films dans l'ordre du classement) comme nouvelle version."""
+        records = np.empty(len(ids), dtype=RECORD)
+        records["id"], records["mu"], records["sigma"] = ids, mu, sigma
+        meta_bytes = json.dumps(meta or {}, ensure_ascii=False).encode("utf-8")
+        offset = _records_offset(len(meta_bytes))
+        created = time.time()
+
+        os.makedirs(self.user_directory(user_name), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.user_directory(user_name))
+        os.chmod(tmp_path, 0o644)  # mkstemp crée le fichier en 0600
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(records), comparisons, created, len(meta_bytes)))
+            f.write(meta_bytes)
+            f.write(b"\0" * (offset - HEADER.size - len(meta_bytes)))
+            f.write(records.tobytes())
+
+        # Le lien échoue si un autre processus a pris ce numéro de version entre-temps : essayer le suivant
+        version = (self.latest(user_name) or 0) + 1
+        while True:
+            try:
+                os.link(tmp_path, self.path(user_name, version))
+                break
+            except FileExistsError:
+                version += 1
+        os.remove(tmp_path)
+        return read_snapshot(self.path(user_name, version), version)
+
+    def load(self, user_name: str, version: Optional[int] = None) -> Snapshot:
+        """Instantané d'une version (la dernière par défaut) ; FileNotFoundError s'il n'existe pas."""
+        if version is None:
+            version = self.latest(user_name)
+            if version is None:
+                raise FileNotFoundError(f"Aucun instantané pour {user_name}")
+        return read_snapshot(self.path(user_name, version), version)
+
+    def history(self, user_name: str) -> List[Dict]:
+        """Résumé de chaque version enregistrée."""
+        return [self.load(user_name, version).summary() for version in self.versions(user_name)]
+
+    def diff(self, user_name: str, old: Optional[int] = None, new: Optional[int] = None) -> SnapshotDiff:
+        """Écart entre deux versions (par défaut : l'avant-dernière et la dernière)."""
+        versions = self.versions(user_name)
+        if not versions:
+            raise FileNotFoundError(f"Aucun instantané pour {user_name}")
+        new = versions[-1] if new is None else new
+        if old is None:
+            older = [version for version in versions if version < new]
+            old = older[-1] if older else new
+        return SnapshotDiff(self.load(user_name, old), self.load(user_name, new))
+
+
+def csv_rows(snapshot: Snapshot, catalog: FilmCatalog, report: Optional[RankReport] = None) -> Iterator[List]:
+    """Lignes CSV d'un instantané (les films retirés du catalogue depuis sont omis).
+
+    `report`, s'il est donné, suit l'ordre des films de l'instantané.
+    """
+    rank = 0
+    for i, (film_id, mu, sigma) in enumerate(zip(snapshot.ids.tolist(), snapshot.mu.tolist(), snapshot.sigma.tolist())):
+        film = catalog.get(film_id)
+        if film is not None:
+            rank += 1
+            yield csv_row(rank, film, mu, sigma, report.csv_columns(i) if report is not None else ())
+
+
+@timed("save_final_ranking")
+def export_csv(snapshot: Snapshot, catalog: FilmCatalog, path: str, report: Optional[RankReport] = None) -> None:
+    """Écrit le CSV d'un instantané (fichier temporaire puis renommage : jamais de fichier partiel)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        for line in snapshot.header:
+            writer.writerow([line])
+        writer.writerow([])
+        writer.writerow(csv_columns(report))
+        writer.writerows(csv_rows(snapshot, catalog, report))
+    os.replace(tmp_path, path)
@@ -0,0 +1,179 @@
+"""
+Index trié par seaux (bucketed sorted list) pour maintenir des films ordonnés par score.
+Les insertions/suppressions ne touchent qu'un seau, la liste complète n'est jamais retriée.
+Un arbre de Fenwick sur la taille des seaux donne le rang d'un élément et l'élément d'un rang
+en O(log n) ; il est reconstruit (en O(nombre de seaux)) seulement quand un seau est créé ou retiré.
+"""
+
+from bisect import bisect_left, insort
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+
+class SortedIndex:
+    """Liste triée de couples (clé, élément) découpée en seaux de taille bornée."""
+
+    def __init__(self, load: int = 256):
+        self._load = load
+        self._buckets: List[List[Tuple[float, Hashable]]] = []
+        self._maxes: List[Tuple[float, Hashable]] = []
+        self._keys: Dict[Hashable, float] = {}
+        self._tree: Optional[List[int]] = None  # Fenwick des tailles de seaux (1-indexé), None : à reconstruire
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._keys
+
+    def __iter__(self) -> Iterator[Tuple[float, Hashable]]:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def key_of(self, item: Hashable) -> float:
+        """Retourne la clé courante d'un élément."""
+        return self._keys[item]
+
+    def add(self, key: float, item: Hashable) -> None:
+        """Insère un élément (ou le déplace s'il est déjà présent)."""
+        if item in self._keys:
+            self.discard(item)
+        self._keys[item] = key
+        entry = (key, item)
+
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            self._tree = None
+            return
+
+        b = bisect_left(self._maxes, entry)
+        if b == len(self._buckets):
+            b -= 1
+        bucket = self._buckets[b]
+        insort(bucket, entry)
+        self._maxes[b] = bucket[-1]
+
+        # Découper les seaux trop gros pour garder des insertions bon marché
+        if len(bucket) > 2 * self._load:
+            half = len(bucket) // 2
+            self._buckets[b : b + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[b : b + 1] = [bucket[half - 1], bucket[-1]]
+            self._tree = None
+        else:
+            self._resize(b, 1)
+
+    def update(self, entries: Iterable[Tuple[float, Hashable]]) -> None:
+        """Insère plusieurs éléments ; un index vide est construit d'un coup (un seul tri)."""
+        if self._keys:
+            for key, item in entries:
+                self.add(key, item)
+            return
+        ordered = sorted(entries)
+        self._keys = {item: key for key, item in ordered}
+        self._buckets = [ordered[i : i + self._load] for i in range(0, len(ordered), self._load)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._tree = None
+
+    def discard(self, item: Hashable) -> None:
+        """Retire un élément s'il est présent."""
+        key = self._keys.pop(item, None)
+        if key is None:
+            return
+        entry = (key, item)
+        b = bisect_left(self._maxes, entry)
+        bucket = self._buckets[b]
+        del bucket[bisect_left(bucket, entry)]
+        if bucket:
+            self._maxes[b] = bucket[-1]
+            self._resize(b, -1)
+        else:
+            del self._buckets[b]
+            del self._maxes[b]
+            self._tree = None
+
+    def _fenwick(self) -> List[int]:
+        """Arbre de Fenwick des tailles de seaux, reconstruit en O(nombre de seaux) si besoin."""
+        tree = self._tree
+        if tree is None:
+            tree = [0] + [len(bucket) for bucket in self._buckets]
+            size = len(tree)
+            for i in range(1, size):
+                parent = i + (i & -i)
+                if parent < size:
+                    tree[parent] += tree[i]
+            self._tree = tree
+        return tree
+
+    def _resize(self, b: int, delta: int) -> None:
+        """Répercute dans l'arbre le changement de taille du seau `b` (s'il est construit)."""
+        tree = self._tree
+        if tree is None:
+            return
+        i = b + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _offset(self, b: int) -> int:
+        """Nombre d'éléments dans les seaux avant le seau `b`."""
+        tree = self._fenwick()
+        total = 0
+        while b > 0:
+            total += tree[b]
+            b -= b & -b
+        return total
+
+    def _locate(self, pos: int) -> Tuple[int, int]:
+        """Seau contenant le rang `pos` (0 <= pos < len) et rang dans ce seau (descente dans l'arbre)."""
+        tree = self._fenwick()
+        b = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            nxt = b + step
+            if nxt < len(tree) and tree[nxt] <= pos:
+                b = nxt
+                pos -= tree[nxt]
+            step >>= 1
+        return b, pos
+
+    def position(self, item: Hashable) -> int:
+        """Retourne le rang (0 = plus petite clé) d'un élément."""
+        entry = (self._keys[item], item)
+        b = bisect_left(self._maxes, entry)
+        return self._offset(b) + bisect_left(self._buckets[b], entry)
+
+    def count_below(self, key: float) -> int:
+        """Nombre d'éléments dont la clé est strictement inférieure à `key`."""
+        b = bisect_left(self._maxes, (key,))
+        if b == len(self._buckets):
+            return len(self)
+        return self._offset(b) + bisect_left(self._buckets[b], (key,))
+
+    def __getitem__(self, pos: int) -> Tuple[float, Hashable]:
+        if pos < 0:
+            pos += len(self)
+        if pos < 0 or pos >= len(self):
+            raise IndexError("position hors de l'index")
+        b, pos = self._locate(pos)
+        return self._buckets[b][pos]
+
+    def slice(self, start: int, stop: int) -> List[Tuple[float, Hashable]]:
+        """Retourne les entrées de rang [start, stop[ sans parcourir tout l'index."""
+        start, stop = max(0, start), min(len(self), stop)
+        result: List[Tuple[float, Hashable]] = []
+        if start >= stop:
+            return result
+        b, offset = self._locate(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = self._buckets[b][offset : offset + remaining]
+            result.extend(chunk)
+            remaining -= len(chunk)
+            b += 1
+            offset = 0
+        return result
+
+    def neighbors(self, item: Hashable, window: int) -> List[Hashable]:
+        """Éléments situés à au plus `window` rangs de `item` (hors `item` lui-même)."""
+        pos = self.position(item)
+        return [other for _, other in self.slice(pos - window, pos + window + 1) if other != item]
@@ -0,0 +1,297 @@
+"""
+État de classement des utilisateurs web, persistant et partagé entre processus, dans SQLite.
+
+Une ligne par utilisateur (métadonnées, numéro de version, position dans son journal des
+comparaisons) et une ligne par (utilisateur, film) pour les ratings : une écriture ne touche que
+les films modifiés depuis la précédente. Les ratings stockés sont à jour jusqu'à `log_offset` ;
+les réponses écrites dans le journal après cette position sont rejouées au rechargement, ce qui
+permet de regrouper les écritures sans rien perdre en cas d'arrêt brutal.
+
+Chaque processus garde sa copie en mémoire et ne la recharge que si la version stockée a changé
+(un autre worker a traité une requête du même utilisateur). Le mode WAL permet les lectures
+pendant une écriture.
+
+Les requêtes qui modifient l'état d'un utilisateur passent une à une (`UserLocks`) : un verrou par
+utilisateur entre les threads d'un processus, et un bail dans la base entre processus, prolongé
+tant que la requête dure (un `/finish` avec réajustement et rapport peut dépasser sa durée). Une écriture
+n'aboutit que si la version stockée est celle sur laquelle la copie en mémoire est fondée
+(compare-and-swap) : une copie périmée, écrite hors bail (éviction, arrêt), ne peut pas effacer
+les réponses enregistrées entre-temps par un autre worker.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_name TEXT PRIMARY KEY,
+    strategy TEXT NOT NULL,
+    top_k INTEGER,
+    comparisons_made INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0,
+    log_offset INTEGER,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    user_name TEXT NOT NULL,
+    film_id INTEGER NOT NULL,
+    mu REAL NOT NULL,
+    sigma REAL NOT NULL,
+    PRIMARY KEY (user_name, film_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS leases (
+    user_name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Durée d'un bail (un processus arrêté en plein traitement ne bloque l'utilisateur que ce temps-là),
+# prolongé tous les LEASE_TTL / 3 tant que sa requête dure
+LEASE_TTL = 30.0
+# Attente maximale d'un bail tenu par une autre requête
+LOCK_TIMEOUT = 10.0
+
+META_COLUMNS = ("user_name", "strategy", "top_k", "comparisons_made", "version", "log_offset", "updated_at")
+
+
+class StateStore:
+    """Ratings et métadonnées par utilisateur, versionnés, dans une base SQLite locale."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connexion propre au thread courant (sqlite3 ne partage pas une connexion entre threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(
+        self,
+        user_name: str,
+        strategy: str,
+        top_k: Optional[int],
+        ratings: Iterable[Tuple[int, float, float]],
+        log_offset: Optional[int] = None,
+    ) -> int:
+        """Enregistre (ou remplace) l'état d'un utilisateur et retourne sa nouvelle version."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT version FROM users WHERE user_name = ?", (user_name,)).fetchone()
+            # La version continue d'augmenter : un autre processus ne confond pas l'ancien état et le nouveau
+            version = row[0] + 1 if row else 0
+            conn.execute("DELETE FROM ratings WHERE user_name = ?", (user_name,))
+            conn.execute(
+                "INSERT OR REPLACE INTO users (user_name, strategy, top_k, comparisons_made, version, log_offset, updated_at)"
+                " VALUES (?, ?, ?, 0, ?, ?, ?)",
+                (user_name, strategy, top_k, version, log_offset, time.time()),
+            )
+            conn.executemany(
+                "INSERT INTO ratings (user_name, film_id, mu, sigma) VALUES (?, ?, ?, ?)",
+                ((user_name, film_id, mu, sigma) for film_id, mu, sigma in ratings),
+            )
+        return version
+
+    def version(self, user_name: str) -> Optional[int]:
+        """Version courante de l'état d'un utilisateur, ou None s'il n'existe pas."""
+        row = self._connection().execute("SELECT version FROM users WHERE user_name = ?", (user_name,)).fetchone()
+        return row[0] if row else None
+
+    def meta(self, user_name: str) -> Optional[Dict]:
+        """Métadonnées d'un utilisateur (sans les ratings), ou None."""
+        row = self._connection().execute(
+            f"SELECT {', '.join(META_COLUMNS)} FROM users WHERE user_name = ?", (user_name,)
+        ).fetchone()
+        return dict(zip(META_COLUMNS, row)) if row else None
+
+    def load(self, user_name: str) -> Optional[Tuple[Dict, List[Tuple[int, float, float]]]]:
+        """Métadonnées et ratings (film_id, mu, sigma) d'un utilisateur, lus dans une même transaction."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN")
+            meta = self.meta(user_name)
+            if meta is None:
+                return None
+            ratings = conn.execute(
+                "SELECT film_id, mu, sigma FROM ratings WHERE user_name = ?", (user_name,)
+            ).fetchall()
+        return meta, ratings
+
+    def update(
+        self,
+        user_name: str,
+        changes: Iterable[Tuple[int, float, float]],
+        comparisons_made: int,
+        log_offset: Optional[int] = None,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Écrit les ratings modifiés (film_id, mu, sigma) en une transaction et retourne la nouvelle version.
+
+        Avec `expected_version`, rien n'est écrit (retour None) si la version stockée a changé depuis.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT version FROM users WHERE user_name = ?", (user_name,)).fetchone()
+            if row is None or (expected_version is not None and row[0] != expected_version):
+                return None
+            conn.execute(
+                "UPDATE users SET comparisons_made = ?, version = ?, log_offset = ?, updated_at = ? WHERE user_name = ?",
+                (comparisons_made, row[0] + 1, log_offset, time.time(), user_name),
+            )
+            # Insertion si besoin : un film ajouté à la liste source n'a pas encore de ligne
+            conn.executemany(
+                "INSERT OR REPLACE INTO ratings (user_name, film_id, mu, sigma) VALUES (?, ?, ?, ?)",
+                ((user_name, film_id, mu, sigma) for film_id, mu, sigma in changes),
+            )
+        return row[0] + 1
+
+    def acquire(self, user_name: str, owner: str, ttl: float = LEASE_TTL) -> bool:
+        """Prend (ou prolonge) le bail d'un utilisateur ; False s'il est tenu par un autre propriétaire."""
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT INTO leases (user_name, owner, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT (user_name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+            " WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+            (user_name, owner, now + ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    def renew(self, user_name: str, owner: str, ttl: float = LEASE_TTL) -> bool:
+        """Prolonge un bail encore tenu ; False s'il a été rendu ou repris par un autre propriétaire."""
+        cursor = self._connection().execute(
+            "UPDATE leases SET expires_at = ? WHERE user_name = ? AND owner = ?", (time.time() + ttl, user_name, owner)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, user_name: str, owner: str) -> None:
+        """Rend le bail d'un utilisateur (sans effet s'il a expiré et été repris par un autre)."""
+        self._connection().execute("DELETE FROM leases WHERE user_name = ? AND owner = ?", (user_name, owner))
+
+    def delete(self, user_name: str) -> None:
+        """Supprime l'état d'un utilisateur."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM ratings WHERE user_name = ?", (user_name,))
+            conn.execute("DELETE FROM users WHERE user_name = ?", (user_name,))
+            conn.execute("DELETE FROM leases WHERE user_name = ?", (user_name,))
+
+    def purge(self, ttl: float) -> int:
+        """Supprime les utilisateurs inactifs depuis plus de `ttl` secondes ; retourne leur nombre."""
+        cutoff = time.time() - ttl
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM ratings WHERE user_name IN (SELECT user_name FROM users WHERE updated_at < ?)", (cutoff,)
+            )
+            count = conn.execute("DELETE FROM users WHERE updated_at < ?", (cutoff,)).rowcount
+            conn.execute("DELETE FROM leases WHERE expires_at < ?", (time.time(),))
+        return count
+
+
+class LockTimeout(Exception):
+    """Le bail d'un utilisateur n'a pas pu être obtenu dans le délai imparti."""
+
+
+class UserLocks:
+    """Exclusion mutuelle par utilisateur : verrou entre threads du processus, puis bail dans la base entre processus."""
+
+    def __init__(self, store: StateStore, ttl: float = LEASE_TTL, timeout: float = LOCK_TIMEOUT):
+        self.store = store
+        self.ttl = ttl
+        self.timeout = timeout
+        self._token = uuid.uuid4().hex[:12]
+        self._locks: Dict[str, List] = {}  # {utilisateur: [verrou, requêtes qui l'utilisent, thread qui le tient]}
+        self._guard = threading.Lock()
+        self._held: Dict[str, str] = {}  # {utilisateur: propriétaire} des baux tenus par ce processus
+        self._renewer: Optional[threading.Thread] = None
+
+    @property
+    def owner(self) -> str:
+        # Le pid distingue les workers créés par fork après l'import du module
+        return f"{self._token}:{os.getpid()}"
+
+    @contextmanager
+    def hold(self, user_name: str, timeout: Optional[float] = None) -> Iterator[None]:
+        """Exécute le bloc seul à modifier l'utilisateur ; lève LockTimeout après `timeout` secondes d'attente
+        (`self.timeout` par défaut, 0 : sans attendre).
+
+        Réentrant : un thread qui tient déjà l'utilisateur (fermeture d'une session retirée du cache
+        pendant sa propre requête) exécute le bloc directement.
+        """
+        thread = threading.get_ident()
+        with self._guard:
+            entry = self._locks.setdefault(user_name, [threading.Lock(), 0, None])
+            if entry[2] == thread:
+                reentrant = True
+            else:
+                reentrant = False
+                entry[1] += 1
+        if reentrant:
+            yield
+            return
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            deadline = time.monotonic() + timeout
+            if not entry[0].acquire(timeout=timeout):
+                raise LockTimeout(user_name)
+            entry[2] = thread
+            try:
+                owner = self.owner
+                delay = 0.001
+                while not self.store.acquire(user_name, owner, self.ttl):
+                    if time.monotonic() >= deadline:
+                        raise LockTimeout(user_name)
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.05)
+                self._hold_lease(user_name, owner)
+                try:
+                    yield
+                finally:
+                    with self._guard:
+                        del self._held[user_name]
+                    self.store.release(user_name, owner)
+            finally:
+                entry[2] = None
+                entry[0].release()
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[user_name]
+
+    def _hold_lease(self, user_name: str, owner: str) -> None:
+        with self._guard:
+            self._held[user_name] = owner
+            # Thread de prolongation démarré au premier bail (et à nouveau dans un worker créé par fork)
+            if self._renewer is None or not self._renewer.is_alive():
+                self._renewer = threading.Thread(target=self._renew, name="lease-renewer", daemon=True)
+                self._renewer.start()
+
+    def _renew(self) -> None:
+        """Prolonge régulièrement les baux tenus par ce processus, tant que leurs requêtes durent."""
+        while True:
+            time.sleep(self.ttl / 3)
+            with self._guard:
+                held = list(self._held.items())
+            for user_name, owner in held:
+                if not self.store.renew(user_name, owner, self.ttl):
+                    with self._guard:
+                        still_held = self._held.get(user_name) == owner
+                    if still_held:
+                        print(f"⚠️  Bail de {user_name} perdu: une autre requête peut modifier l'utilisateur")
@@ -1,7 +1,14 @@
 // État de l'application
 var currentPair = null;
+var upcomingPair = null;
+var answerInFlight = false;
 var comparisonsMade = 0;
 var maxComparisons = 50;
+var autoStop = false;
+var convergence = 0;
+var targetConvergence = 0;
+var nextResultsCursor = null;
+var RESULTS_PAGE_SIZE = 100;
 
 // Fonctions utilitaires
 function showScreen(screenId) {
@@ -31,13 +38,23 @@ function updateProgress() {
     var progressFill = document.getElementById('progress-fill');
     if (progressFill) {
         var percentage = (comparisonsMade / maxComparisons) * 100;
+        if (autoStop) {
+            // La confiance part de 50% (aucune information) et monte vers la cible
+            percentage = targetConvergence > 0.5
+                ? Math.max(0, Math.min(1, (convergence - 0.5) / (targetConvergence - 0.5))) * 100
+                : 0;
+        }
         progressFill.style.width = percentage + '%';
     }
 
     var comparisonCount = document.getElementById('comparison-count');
     var maxComparisonsDisplay = document.getElementById('max-comparisons-display');
     if (comparisonCount) comparisonCount.textContent = comparisonsMade;
-    if (maxComparisonsDisplay) maxComparisonsDisplay.textContent = maxComparisons;
+    if (maxComparisonsDisplay) {
+        maxComparisonsDisplay.textContent = autoStop
+            ? 'auto (confiance ' + Math.round(convergence * 100) + '%)'
+            : maxComparisons;
+    }
 }
 
 // Fonction pour faire des requêtes HTTP
@@ -78,6 +95,25 @@ function makeRequest(url, options) {
     });
 }
 
+// Catégories proposées dans le formulaire (facettes de la liste)
+function loadFacets() {
+    var select = document.getElementById('category');
+    if (!select) return;
+    makeRequest('/facets')
+        .then(function (result) {
+            var categories = result.categories || {};
+            Object.keys(categories).forEach(function (name) {
+                var option = document.createElement('option');
+                option.value = name;
+                option.textContent = name + ' (' + categories[name] + ')';
+                select.appendChild(option);
+            });
+        })
+        .catch(function (error) {
+            console.error('Erreur lors du chargement des catégories:', error);
+        });
+}
+
 // Gestion du formulaire de démarrage
 function initForm() {
     var form = document.getElementById('start-form');
@@ -86,9 +122,14 @@ function initForm() {
             e.preventDefault();
 
             var formData = new FormData(e.target);
+            var maxChoice = formData.get('max_comparisons');
             var userData = {
                 user_name: formData.get('user_name'),
-                max_comparisons: parseInt(formData.get('max_comparisons'))
+                max_comparisons: maxChoice === 'auto' ? 'auto' : parseInt(maxChoice),
+                strategy: formData.get('strategy'),
+                top_k: parseInt(formData.get('top_k')) || 10,
+                category: formData.get('category') || null,
+                resume: formData.get('resume') === 'on'
             };
 
             showLoading(true);
@@ -102,8 +143,11 @@ function initForm() {
             })
                 .then(function (result) {
                     if (result.status === 'success') {
-                        maxComparisons = userData.max_comparisons;
-                        comparisonsMade = 0;
+                        autoStop = userData.max_comparisons === 'auto';
+                        maxComparisons = autoStop ? 0 : result.max_comparisons;
+                        convergence = 0;
+                        // Un classement repris continue son compteur
+                        comparisonsMade = result.comparisons_made || 0;
                         showScreen('comparison-screen');
                         loadNextPair();
                     } else {
@@ -131,8 +175,9 @@ function loadNextPair() {
                 return;
             }
 
-            currentPair = result;
-            displayPair(result);
+            currentPair = { film1: result.film1, film2: result.film2 };
+            upcomingPair = result.upcoming;
+            displayPair(currentPair);
             updateProgress();
             showLoading(false);
         })
@@ -161,41 +206,80 @@ function displayPair(pair) {
     if (filmBDescription) filmBDescription.textContent = pair.film2.description;
 }
 
-// Gestion des choix
-function makeChoice(choice) {
-    if (!currentPair) return;
+function samePair(a, b) {
+    return a && b && a.film1.id === b.film1.id && a.film2.id === b.film2.id;
+}
 
-    showLoading(true);
+function setChoicesEnabled(enabled) {
+    var buttons = document.querySelectorAll('.btn-film, #equal-btn, #skip-btn');
+    for (var i = 0; i < buttons.length; i++) {
+        buttons[i].disabled = !enabled;
+    }
+}
+
+// Gestion des choix : une seule requête par réponse, la paire suivante est déjà connue
+function makeChoice(choice) {
+    if (!currentPair || answerInFlight) return;
+
+    var answered = currentPair;
+    if (upcomingPair) {
+        // Affichage immédiat de la paire précalculée, confirmée par la réponse du serveur
+        currentPair = upcomingPair;
+        upcomingPair = null;
+        displayPair(currentPair);
+    } else {
+        currentPair = null;
+        showLoading(true);
+    }
+    answerInFlight = true;
+    setChoicesEnabled(false);
 
-    makeRequest('/compare', {
+    makeRequest('/compare_next', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json'
         },
         body: JSON.stringify({
-            film1_id: currentPair.film1.id,
-            film2_id: currentPair.film2.id,
+            film1_id: answered.film1.id,
+            film2_id: answered.film2.id,
             result: choice
         })
     })
         .then(function (result) {
+            answerInFlight = false;
+            setChoicesEnabled(true);
+
             if (result.status === 'success') {
                 comparisonsMade = result.comparisons_made;
+                maxComparisons = result.max_comparisons;
+                convergence = result.convergence;
+                targetConvergence = result.target;
                 updateProgress();
 
-                if (comparisonsMade >= maxComparisons) {
+                if (comparisonsMade >= maxComparisons || (autoStop && result.converged)) {
                     finishRanking();
-                } else {
-                    loadNextPair();
+                    return;
                 }
-            } else if (result.status === 'skipped') {
-                loadNextPair();
-            } else {
+            } else if (result.status !== 'skipped') {
                 alert('Erreur: ' + result.error);
                 showLoading(false);
+                return;
+            }
+
+            if (!result.next_pair) {
+                finishRanking();
+                return;
             }
+            if (!samePair(currentPair, result.next_pair)) {
+                currentPair = result.next_pair;
+                displayPair(currentPair);
+            }
+            upcomingPair = result.upcoming;
+            showLoading(false);
         })
         .catch(function (error) {
+            answerInFlight = false;
+            setChoicesEnabled(true);
             alert('Erreur de connexion: ' + error.message);
             showLoading(false);
         });
@@ -205,7 +289,7 @@ function makeChoice(choice) {
 function finishRanking() {
     showLoading(true);
 
-    makeRequest('/finish')
+    makeRequest('/finish?limit=' + RESULTS_PAGE_SIZE)
         .then(function (result) {
             if (result.status === 'success') {
                 displayResults(result);
@@ -229,10 +313,26 @@ function displayResults(data) {
     if (finalComparisons) finalComparisons.textContent = data.comparisons_made;
     if (finalConfidence) finalConfidence.textContent = Math.round(data.confidence * 100) + '%';
 
+    var finalTopK = document.getElementById('final-top-k');
+    if (finalTopK) {
+        if (data.top_k) {
+            document.getElementById('final-top-k-size').textContent = data.top_k;
+            document.getElementById('final-top-k-confidence').textContent = Math.round(data.top_k_confidence * 100) + '%';
+            finalTopK.classList.remove('hidden');
+        } else {
+            finalTopK.classList.add('hidden');
+        }
+    }
+
     var tbody = document.getElementById('results-tbody');
-    if (tbody) {
-        tbody.innerHTML = '';
+    if (tbody) tbody.innerHTML = '';
+    appendResults(data);
+}
 
+// Ajout d'une page de résultats au tableau
+function appendResults(data) {
+    var tbody = document.getElementById('results-tbody');
+    if (tbody) {
         for (var i = 0; i < data.results.length; i++) {
             var film = data.results[i];
             var row = document.createElement('tr');
@@ -246,6 +346,37 @@ function displayResults(data) {
             tbody.appendChild(row);
         }
     }
+
+    nextResultsCursor = data.next_cursor;
+    var moreBtn = document.getElementById('more-results-btn');
+    if (moreBtn) {
+        if (nextResultsCursor === null || typeof nextResultsCursor === 'undefined') {
+            moreBtn.classList.add('hidden');
+        } else {
+            moreBtn.classList.remove('hidden');
+        }
+    }
+}
+
+// Chargement de la page de résultats suivante
+function loadMoreResults() {
+    if (nextResultsCursor === null) return;
+
+    showLoading(true);
+
+    makeRequest('/results?cursor=' + nextResultsCursor + '&limit=' + RESULTS_PAGE_SIZE)
+        .then(function (result) {
+            if (result.status === 'success') {
+                appendResults(result);
+            } else {
+                alert('Erreur: ' + result.error);
+            }
+            showLoading(false);
+        })
+        .catch(function (error) {
+            alert('Erreur de connexion: ' + error.message);
+            showLoading(false);
+        });
 }
 
 // Initialisation des event listeners
@@ -275,6 +406,12 @@ function initEventListeners() {
         });
     }
 
+    // Bouton suite des résultats
+    var moreBtn = document.getElementById('more-results-btn');
+    if (moreBtn) {
+        moreBtn.addEventListener('click', loadMoreResults);
+    }
+
     // Bouton arrêter
     var stopBtn = document.getElementById('stop-btn');
     if (stopBtn) {
@@ -292,6 +429,7 @@ function init() {
     showScreen('start-screen');
     showLoading(false);
     initForm();
+    loadFacets();
     initEventListeners();
     console.log('Script initialisé');
 }
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Test de concurrence de l'état partagé : des réponses simultanées pour les mêmes utilisateurs, aucune perdue.
+
+Plusieurs processus (des workers) et plusieurs threads par processus répondent en même temps pour
+quelques utilisateurs communs. À la fin, le nombre de comparaisons enregistré doit être exactement
+le nombre de réponses acceptées ; en mode local, les ratings enregistrés doivent aussi être ceux
+qu'on obtient en rejouant le journal dans l'ordre.
+
+    python stress_test.py --processes 4 --threads 4 --users 2 --compares 100
+    python stress_test.py --url http://127.0.0.1:8000 --url http://127.0.0.1:8001 --threads 8
+
+Le mode local appelle directement la couche de service dans des processus séparés, sur une base
+SQLite et des journaux créés dans un dossier temporaire ; le mode `--url` passe par des serveurs
+déjà lancés (par exemple deux instances partageant `RANKING_STATE_DB`).
+"""
+
+import argparse
+import http.cookiejar
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+# Variables d'environnement du mode local, fixées avant le chargement de la couche de service
+LOCAL_ENV = {
+    "RANKING_STATE_BATCH": "1",
+    "RANKING_BACKGROUND_LOG": "0",
+    "RANKING_RELOAD_INTERVAL": "0",
+    "RANKING_METRICS": "0",
+    "RANKING_FSYNC_EVERY": "0",
+}
+
+
+def user_names(count: int) -> List[str]:
+    return [f"stress_{i}" for i in range(count)]
+
+
+def local_answers(workdir: str, users: List[str], threads: int, compares: int, index: int) -> Dict[str, int]:
+    """Worker du mode local : `threads` threads répondent `compares` fois chacun ; retourne les réponses acceptées."""
+    os.chdir(workdir)
+    os.environ.update(LOCAL_ENV)
+    import ranking_service as service
+
+    accepted: Dict[str, int] = {user_name: 0 for user_name in users}
+    lock = threading.Lock()
+
+    def answer(number: int) -> None:
+        user_name = users[number % len(users)]
+        sess: Dict = {}
+        service.handle_start(sess, {"user_name": user_name, "resume": True, "max_comparisons": 1000000})
+        for i in range(compares):
+            pair, status = service.handle_get_pair(sess)
+            if status != 200:
+                continue
+            body, status = service.handle_compare(
+                sess,
+                {"film1_id": pair["film1"]["id"], "film2_id": pair["film2"]["id"], "result": 1 + (i + number) % 3},
+            )
+            if status == 200 and body.get("status") == "success":
+                with lock:
+                    accepted[user_name] += 1
+
+    workers = [threading.Thread(target=answer, args=(index * threads + i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    service.flush_all()
+    return accepted
+
+
+def run_local(args: argparse.Namespace) -> bool:
+    users = user_names(args.users)
+    workdir = tempfile.mkdtemp(prefix="ranking_stress_")
+    try:
+        shutil.copy(args.source, os.path.join(workdir, "ListeATrier.md"))
+        # Modules du projet importables depuis le dossier temporaire (les workers héritent de sys.path)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        os.chdir(workdir)
+        os.environ.update(LOCAL_ENV)
+        import ranking_service as service
+        from comparison_log import ComparisonLog
+        from rating_backend import create_ratings
+
+        # Nouveau classement pour chaque utilisateur, puis réponses concurrentes depuis les workers
+        for user_name in users:
+            service.handle_start({}, {"user_name": user_name, "resume": False, "max_comparisons": 1000000})
+        service.flush_all()
+
+        start = time.time()
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.processes) as pool:
+            results = pool.starmap(
+                local_answers, [(workdir, users, args.threads, args.compares, i) for i in range(args.processes)]
+            )
+        elapsed = time.time() - start
+
+        ok = True
+        total = 0
+        for user_name in users:
+            accepted = sum(result[user_name] for result in results)
+            total += accepted
+            meta, stored = service.state_store.load(user_name)
+
+            # Le journal est écrit sous le verrou de l'utilisateur : le rejouer dans l'ordre redonne l'état enregistré
+            expected = create_ratings(service.ranking_tool.backend, service.ranking_tool.catalog.ids)
+            replayed = ComparisonLog(user_name).replay_from(expected, 0)
+            drift = max(
+                max(abs(expected[film_id].mu - mu), abs(expected[film_id].sigma - sigma))
+                for film_id, mu, sigma in stored
+            )
+            valid = meta["comparisons_made"] == accepted == replayed and drift < 1e-6
+            ok = ok and valid
+            print(
+                f"{'✓' if valid else '❌'} {user_name}: {accepted} réponses acceptées, {meta['comparisons_made']} enregistrées,"
+                f" {replayed} dans le journal, écart des ratings {drift:.1e} (version {meta['version']})"
+            )
+        print(
+            f"🚀 {args.processes} processus × {args.threads} threads, {total} réponses en {elapsed:.1f} s"
+            f" ({total / elapsed:.0f} réponses/s)"
+        )
+        return ok
+    finally:
+        os.chdir("/")
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+class Client:
+    """Navigateur simulé (ses propres cookies) sur l'un des serveurs."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, route: str, payload: Optional[Dict] = None) -> Tuple[Optional[Dict], int]:
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + route, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                return json.loads(response.read()), response.status
+        except urllib.error.HTTPError as e:
+            return None, e.code
+        except OSError:
+            return None, 0
+
+
+def run_http(args: argparse.Namespace) -> bool:
+    users = user_names(args.users)
+    for user_name in users:
+        Client(args.url[0]).request("/start", {"user_name": user_name, "resume": False, "max_comparisons": 1000000})
+
+    accepted = {user_name: 0 for user_name in users}
+    lock = threading.Lock()
+
+    def answer(number: int) -> None:
+        user_name = users[number % len(users)]
+        client = Client(args.url[number % len(args.url)])
+        client.request("/start", {"user_name": user_name, "resume": True, "max_comparisons": 1000000})
+        for i in range(args.compares):
+            pair, status = client.request("/get_pair")
+            if status != 200:
+                continue
+            body, status = client.request(
+                "/compare",
+                {"film1_id": pair["film1"]["id"], "film2_id": pair["film2"]["id"], "result": 1 + (i + number) % 3},
+            )
+            if status == 200 and body.get("status") == "success":
+                with lock:
+                    accepted[user_name] += 1
+
+    start = time.time()
+    workers = [threading.Thread(target=answer, args=(i,)) for i in range(args.threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.time() - start
+
+    ok = True
+    for user_name in users:
+        # Reprise depuis un autre serveur : le nombre renvoyé est celui de l'état enregistré
+        body, _ = Client(args.url[-1]).request("/start", {"user_name": user_name, "resume": True, "max_comparisons": 1})
+        stored = body.get("comparisons_made") if body else None
+        valid = stored == accepted[user_name]
+        ok = ok and valid
+        print(f"{'✓' if valid else '❌'} {user_name}: {accepted[user_name]} réponses acceptées, {stored} enregistrées")
+    total = sum(accepted.values())
+    print(f"🚀 {args.threads} clients sur {len(args.url)} serveur(s), {total} réponses en {elapsed:.1f} s")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Test de concurrence : aucune réponse perdue entre threads et workers")
+    parser.add_argument("--url", action="append", help="Serveur à tester (répétable : un par worker) ; mode local sinon")
+    parser.add_argument("--processes", type=int, default=4, help="Processus du mode local (défaut: %(default)s)")
+    parser.add_argument("--threads", type=int, default=4, help="Threads par processus, ou clients HTTP (défaut: %(default)s)")
+    parser.add_argument("--users", type=int, default=2, help="Utilisateurs partagés par les clients (défaut: %(default)s)")
+    parser.add_argument("--compares", type=int, default=100, help="Réponses par thread (défaut: %(default)s)")
+    parser.add_argument("--source", default="ListeATrier.md", help="Liste de films du mode local (défaut: %(default)s)")
+    args = parser.parse_args()
+
+    ok = run_http(args) if args.url else run_local(args)
+    print("✅ Aucune réponse perdue" if ok else "❌ Réponses perdues ou état incohérent")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
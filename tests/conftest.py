@@ -0,0 +1,57 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# Modules du projet à plat à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Petite liste source des tests web : quatre films de SF (sous-catégories incluses), quatre autres
+SERVICE_FILMS = [
+    ("Un astronaute survit seul sur Mars.", "Ingénieux", "SF-Réaliste"),
+    ("Une linguiste comprend d'étranges visiteurs.", "Méditatif", "SF-Introspectif"),
+    ("Des explorateurs traversent l'espace et le temps.", "Sidérant", "SF-Épopée"),
+    ("La planète des sables et ses luttes.", "Épique", "SF"),
+    ("Deux magiciens rivaux.", "Obsessif", "Mystère"),
+    ("Des pilotes en combats aériens.", "Adrénaliné", "Action"),
+    ("L'amitié face à l'enfermement.", "Rédempteur", "Drame"),
+    ("Une romance à bord d'un paquebot.", "Tragique", "Romantique"),
+]
+
+
+@pytest.fixture(scope="session")
+def service_dir(tmp_path_factory):
+    """Dossier de travail du service web des tests (liste source, base d'état, journaux, CSV)."""
+    directory = tmp_path_factory.mktemp("service")
+    with open(directory / "ListeATrier.md", "w", encoding="utf-8") as f:
+        f.writelines("\t".join(film) + "\n" for film in SERVICE_FILMS)
+    return directory
+
+
+@pytest.fixture(scope="session")
+def service_module(service_dir):
+    """`ranking_service` importé une seule fois, configuré (variables d'environnement) sur `service_dir`."""
+    environ = {
+        "RANKING_STATE_DB": str(service_dir / "ranking_state.db"),
+        "RANKING_SNAPSHOT_DIR": str(service_dir / "classements"),
+        "RANKING_WATCHED_FILE": str(service_dir / "watched.json"),
+        "RANKING_RELOAD_INTERVAL": "0",
+        "RANKING_METRICS": "0",
+        "RANKING_STATE_BATCH": "1",
+    }
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in environ.items():
+            patch.setenv(name, value)
+        patch.chdir(service_dir)
+        module = importlib.import_module("ranking_service")
+    yield module
+    module.writer.flush()
+
+
+@pytest.fixture
+def service(service_module, service_dir, monkeypatch):
+    """Service web, exécuté dans son dossier (journaux et CSV y sont écrits) ; écritures en attente terminées à la fin."""
+    monkeypatch.chdir(service_dir)
+    yield service_module
+    service_module.writer.flush()
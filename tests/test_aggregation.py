@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from aggregation import GroupMatrix, aggregate, load_user_rankings, parse_ranking_csv, save_group_ranking
+
+
+def write_ranking(directory, user, films):
+    """Classement individuel au format de `save_final_ranking` ; `films` : [(description, mu, sigma)]."""
+    path = os.path.join(directory, f"ListeATrier.{user}.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# Classement personnel de {user}\n# Comparaisons effectuées: 3\n\n")
+        f.write("Rang;Description;Genre;Catégorie;Score_Mu;Score_Sigma;Score_Conservateur\n")
+        for rank, (description, mu, sigma) in enumerate(films, 1):
+            f.write(f"{rank};{description};Drame;SF;{mu};{sigma};{mu - 3 * sigma}\n")
+    return path
+
+
+def test_parse_ranking_csv(tmp_path):
+    path = write_ranking(tmp_path, "alice", [("Film A", 30.0, 2.0), ("Film B", 20.0, 3.0)])
+    ranking = parse_ranking_csv(path)
+    assert ranking.user_name == "alice"
+    assert ranking.descriptions == ["Film A", "Film B"]
+    assert ranking.mu.tolist() == [30.0, 20.0]
+    assert ranking.sigma.tolist() == [2.0, 3.0]
+
+
+def test_group_matrix_aligns_films_across_users(tmp_path):
+    write_ranking(tmp_path, "alice", [("Film A", 30.0, 2.0), ("Film B", 20.0, 3.0)])
+    write_ranking(tmp_path, "bob", [("Film C", 25.0, 1.0), ("Film A", 10.0, 1.0)])
+    matrix = GroupMatrix(load_user_rankings(str(tmp_path)))
+
+    assert matrix.users == ["alice", "bob"]
+    assert matrix.descriptions == ["Film A", "Film B", "Film C"]
+    assert matrix.mu[1, 0] == 10.0
+    assert matrix.mu[0, 2] != matrix.mu[0, 2]  # NaN : film non classé par alice
+
+
+def test_weighted_method_trusts_precise_users(tmp_path):
+    write_ranking(tmp_path, "alice", [("Film A", 30.0, 1.0), ("Film B", 20.0, 1.0)])
+    write_ranking(tmp_path, "bob", [("Film B", 40.0, 8.0), ("Film A", 10.0, 8.0)])
+    results = aggregate(str(tmp_path), "weighted")
+
+    assert [film["description"] for film in results] == ["Film A", "Film B"]
+    expected = (30.0 / 1.0 + 10.0 / 64.0) / (1.0 + 1.0 / 64.0)
+    assert results[0]["score"] == pytest.approx(expected, abs=1e-4)
+    assert results[0]["voters"] == 2
+
+
+def test_borda_method_uses_ranks_only(tmp_path):
+    write_ranking(tmp_path, "alice", [("Film A", 30.0, 1.0), ("Film B", 20.0, 1.0), ("Film C", 10.0, 1.0)])
+    write_ranking(tmp_path, "bob", [("Film B", 900.0, 8.0), ("Film A", 899.0, 8.0), ("Film C", 0.0, 8.0)])
+    write_ranking(tmp_path, "carol", [("Film A", 1.0, 1.0), ("Film C", 0.5, 1.0)])
+    results = aggregate(str(tmp_path), "borda", top=2)
+
+    assert [(film["description"], film["score"]) for film in results] == [("Film A", 0.8333), ("Film B", 0.75)]
+    assert results[0]["score_sigma"] is None
+
+
+def test_aggregate_rejects_unknown_method(tmp_path):
+    with pytest.raises(ValueError, match="inconnue"):
+        aggregate(str(tmp_path), "median")
+
+
+def test_modified_file_is_parsed_again(tmp_path):
+    path = write_ranking(tmp_path, "alice", [("Film A", 30.0, 2.0)])
+    assert load_user_rankings(str(tmp_path))[0].mu.tolist() == [30.0]
+
+    write_ranking(tmp_path, "alice", [("Film A", 12.0, 2.0)])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_user_rankings(str(tmp_path))[0].mu.tolist() == [12.0]
+
+    os.remove(path)
+    assert load_user_rankings(str(tmp_path)) == []
+
+
+def test_save_group_ranking_round_trip(tmp_path):
+    write_ranking(tmp_path, "alice", [("Film A", 30.0, 2.0), ("Film B", 20.0, 3.0)])
+    output = tmp_path / "groupe.csv"
+    save_group_ranking(aggregate(str(tmp_path)), ["alice"], "weighted", str(output))
+
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "# Classement de groupe (weighted)"
+    assert lines[5].startswith("1;Film A;Drame;SF;30.0000;2.0000;1")
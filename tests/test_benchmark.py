@@ -0,0 +1,57 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from benchmark import SimulatedRater, count_inversions, kendall_tau, latency_stats, synthetic_catalog
+
+
+def brute_inversions(values):
+    return sum(1 for i, j in itertools.combinations(range(len(values)), 2) if values[i] > values[j])
+
+
+def brute_tau_b(truth, estimate):
+    concordant = discordant = tied = 0
+    for i, j in itertools.combinations(range(len(truth)), 2):
+        product = np.sign(truth[i] - truth[j]) * np.sign(estimate[i] - estimate[j])
+        if product > 0:
+            concordant += 1
+        elif product < 0:
+            discordant += 1
+        else:
+            tied += 1
+    pairs = concordant + discordant + tied
+    return (concordant - discordant) / np.sqrt(pairs * (pairs - tied))
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 7, 64, 101])
+def test_count_inversions_matches_brute_force(size):
+    values = np.random.default_rng(size).integers(0, 10, size)  # Ex aequo inclus
+    assert count_inversions(values) == brute_inversions(values)
+
+
+def test_kendall_tau_bounds_and_ties():
+    truth = np.arange(20, dtype=float)
+    assert kendall_tau(truth, truth * 3) == pytest.approx(1.0)
+    assert kendall_tau(truth, -truth) == pytest.approx(-1.0)
+    assert kendall_tau(truth, np.zeros(20)) == 0.0
+
+    estimate = np.random.default_rng(0).integers(0, 6, 20).astype(float)
+    assert kendall_tau(truth, estimate) == pytest.approx(brute_tau_b(truth, estimate))
+
+
+def test_simulated_rater_follows_truth_without_noise():
+    catalog = synthetic_catalog(3)
+    truth = np.array([0.0, 2.0, 1.0])
+    rater = SimulatedRater(truth, noise=0.0, draw_rate=0.0, rng=np.random.default_rng(0))
+    assert rater(catalog[1], catalog[2]) == 1
+    assert rater(catalog[0], catalog[2]) == 2
+    assert SimulatedRater(truth, 0.0, 1.0, np.random.default_rng(0))(catalog[0], catalog[1]) == 3
+
+
+def test_latency_stats():
+    assert latency_stats(np.array([]))["calls"] == 0
+    stats = latency_stats(np.array([1e-6, 2e-6, 3e-6]))
+    assert stats["calls"] == 3
+    assert stats["mean_us"] == pytest.approx(2.0)
+    assert stats["p50_us"] == pytest.approx(2.0)
@@ -0,0 +1,137 @@
+import pytest
+from trueskill import Rating
+
+from comparison_log import ComparisonLog
+from film_catalog import FilmCatalog, parse_rows
+from ranking_tool import PairRankingTool
+from rating_backend import create_ratings
+
+IDS = [1, 2, 3, 4]
+
+
+def fresh_ratings():
+    return create_ratings("numpy", IDS)
+
+
+def test_replay_matches_direct_updates(tmp_path):
+    log = ComparisonLog("alice", str(tmp_path))
+    expected = fresh_ratings()
+    for film1, film2, result in [(1, 2, 1), (2, 3, 2), (3, 4, 0), (1, 4, 3)]:
+        log.append(film1, film2, result)
+        if result:
+            expected.rate_1vs1(film1, film2, result)
+    log.close()
+
+    replayed = fresh_ratings()
+    # Les comparaisons passées (0) sont journalisées mais ne comptent pas
+    assert log.replay(replayed) == 3
+    for film_id in IDS:
+        assert replayed[film_id].mu == pytest.approx(expected[film_id].mu)
+        assert replayed[film_id].sigma == pytest.approx(expected[film_id].sigma)
+
+
+def test_replay_starts_from_checkpoint(tmp_path):
+    log = ComparisonLog("alice", str(tmp_path))
+    ratings = fresh_ratings()
+    log.append(1, 2, 1)
+    ratings.rate_1vs1(1, 2, 1)
+    log.checkpoint(ratings, 1)
+    log.append(3, 4, 2)
+    ratings.rate_1vs1(3, 4, 2)
+    log.close()
+
+    replayed = fresh_ratings()
+    assert log.replay(replayed) == 2
+    assert replayed[3].mu == pytest.approx(ratings[3].mu)
+    assert replayed[1].mu == pytest.approx(ratings[1].mu)
+
+
+def test_reset_discards_previous_answers(tmp_path):
+    log = ComparisonLog("alice", str(tmp_path))
+    log.append(1, 2, 1)
+    assert not log.has_baseline()
+    log.start_session()
+    log.append(3, 4, 1)
+    log.close()
+
+    assert log.has_baseline()
+    assert log.history() == [(3, 4, 1)]
+    replayed = fresh_ratings()
+    assert log.replay(replayed) == 1
+    assert replayed[1].mu == pytest.approx(Rating().mu)
+
+
+def test_replay_from_ignores_truncated_last_line(tmp_path):
+    log = ComparisonLog("alice", str(tmp_path))
+    log.append(1, 2, 1)
+    offset = log.offset()
+    log.append(2, 3, 1)
+    log.close()
+    with open(log.path, "a", encoding="utf-8") as f:
+        f.write('{"type": "comparison", "film1"')
+
+    assert log.replay_from(fresh_ratings(), offset, comparisons_made=1) == 2
+
+
+CATALOG_TEXT = "Film A\tDrame\tSF\nFilm B\tDrame\tSF\nFilm C\tComédie\tRomance\n"
+
+
+def resumed_tool(tmp_path, monkeypatch, write_log):
+    monkeypatch.chdir(tmp_path)
+    csv_file = "ListeATrier.alice.csv"
+    with open(csv_file, "w", encoding="utf-8") as f:
+        f.write("# Classement personnel de alice\n# Comparaisons effectuées: 5\nRang;Film\n")
+    catalog = FilmCatalog.from_rows(parse_rows(CATALOG_TEXT))
+    log = ComparisonLog("alice")
+    write_log(log, catalog)
+    log.close()
+
+    tool = PairRankingTool()
+    tool.use_catalog(catalog)
+    tool.load_existing_ratings(csv_file)
+    return tool
+
+
+def test_resume_adds_answers_logged_after_the_csv(tmp_path, monkeypatch):
+    def write_log(log, catalog):
+        log.append(catalog[0].id, catalog[1].id, 1)
+        log.append(catalog[1].id, catalog[2].id, 2)
+
+    # Pas de point de contrôle ni de `reset` : les réponses rejouées complètent le CSV
+    assert resumed_tool(tmp_path, monkeypatch, write_log).comparisons_made == 7
+
+
+def test_resume_takes_count_from_checkpoint(tmp_path, monkeypatch):
+    def write_log(log, catalog):
+        ratings = create_ratings("numpy", catalog.ids)
+        log.append(catalog[0].id, catalog[1].id, 1)
+        log.checkpoint(ratings, 9)
+        log.append(catalog[1].id, catalog[2].id, 2)
+
+    assert resumed_tool(tmp_path, monkeypatch, write_log).comparisons_made == 10
+
+
+def test_resume_takes_count_after_reset(tmp_path, monkeypatch):
+    def write_log(log, catalog):
+        log.start_session()
+        log.append(catalog[0].id, catalog[1].id, 1)
+
+    assert resumed_tool(tmp_path, monkeypatch, write_log).comparisons_made == 1
+
+
+def test_checkpoint_at_earlier_offset_replays_later_answers(tmp_path):
+    log = ComparisonLog("alice", str(tmp_path))
+    ratings = fresh_ratings()
+    log.append(1, 2, 1)
+    ratings.rate_1vs1(1, 2, 1)
+    offset = log.offset()
+    snapshot = {film_id: ratings[film_id] for film_id in IDS}
+    # Réponse écrite avant le point de contrôle mais après la copie des ratings
+    log.append(3, 4, 1)
+    ratings.rate_1vs1(3, 4, 1)
+    log.checkpoint(snapshot, 1, offset)
+    log.close()
+
+    replayed = fresh_ratings()
+    assert log.replay(replayed) == 2
+    assert replayed[3].mu == pytest.approx(ratings[3].mu)
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+from trueskill import Rating, global_env
+
+from convergence import ConvergenceTracker
+from film_catalog import Film
+
+
+def make_films(count):
+    return [Film(100 + i, i, f"Film {i}") for i in range(count)]
+
+
+def full_confidence(films, ratings):
+    """Confiance recalculée de zéro : tri complet puis tous les couples adjacents."""
+    ordered = sorted(films, key=lambda film: (-ratings[film.id].mu, film.id))
+    probabilities = [
+        global_env().cdf(
+            (ratings[upper.id].mu - ratings[lower.id].mu)
+            / (ratings[upper.id].sigma ** 2 + ratings[lower.id].sigma ** 2) ** 0.5
+        )
+        for upper, lower in zip(ordered, ordered[1:])
+    ]
+    return sum(probabilities) / len(probabilities)
+
+
+def test_untouched_ratings_give_one_half():
+    films = make_films(5)
+    tracker = ConvergenceTracker(target=0.9)
+    tracker.reset(films, {film.id: Rating() for film in films})
+    assert tracker.confidence == pytest.approx(0.5)
+    assert not tracker.converged
+
+
+def test_incremental_updates_match_full_recomputation():
+    rng = random.Random(0)
+    films = make_films(30)
+    ratings = {film.id: Rating(mu=rng.gauss(25, 3), sigma=8.0) for film in films}
+    tracker = ConvergenceTracker()
+    tracker.reset(films, ratings)
+
+    for _ in range(200):
+        film1, film2 = rng.sample(films, 2)
+        ratings[film1.id] = Rating(mu=rng.gauss(25, 10), sigma=ratings[film1.id].sigma * 0.95)
+        ratings[film2.id] = Rating(mu=rng.gauss(25, 10), sigma=ratings[film2.id].sigma * 0.95)
+        tracker.notify(film1, film2)
+
+    assert tracker.confidence == pytest.approx(full_confidence(films, ratings))
+
+
+def test_converges_when_ratings_are_separated():
+    films = make_films(4)
+    ratings = {film.id: Rating(mu=10.0 * film.index, sigma=1.0) for film in films}
+    tracker = ConvergenceTracker(target=0.95)
+    tracker.reset(films, ratings)
+    assert tracker.converged
+
+
+def test_no_pair_gives_zero():
+    tracker = ConvergenceTracker()
+    tracker.reset(make_films(1), {100: Rating()})
+    assert tracker.confidence == 0.0
+
+
+def test_notify_ignores_films_outside_the_list():
+    films = make_films(4)
+    ratings = {film.id: Rating(mu=10.0 * film.index, sigma=2.0) for film in films}
+    tracker = ConvergenceTracker()
+    tracker.reset(films, ratings)
+    before = tracker.confidence
+
+    ratings[999] = Rating()
+    tracker.notify(films[0], Film(999, 4, "Hors facette"))
+    assert tracker.confidence == pytest.approx(before)
@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+from film_catalog import FilmCatalog, cache_path, content_id, facet_matches, parse_rows
+
+SOURCE = "Film A\tDrame\tSF-Épopée\n# commentaire\nFilm B\tComédie\tSF\nFilm A\tDrame\tPolar\n"
+
+
+def test_duplicates_get_distinct_stable_ids(tmp_path):
+    source = tmp_path / "liste.md"
+    source.write_text(SOURCE, encoding="utf-8")
+
+    catalog = FilmCatalog.from_file(str(source), use_cache=False)
+
+    assert [film.description for film in catalog] == ["Film A", "Film B", "Film A"]
+    assert catalog.ids == [content_id("Film A"), content_id("Film B"), content_id("Film A", 1)]
+    assert catalog.legacy_ids == {1: catalog.ids[0], 3: catalog.ids[1], 4: catalog.ids[2]}
+
+
+def test_cache_is_json_and_keyed_by_content(tmp_path):
+    source = tmp_path / "liste.md"
+    source.write_text(SOURCE, encoding="utf-8")
+    first = FilmCatalog.from_file(str(source))
+
+    with open(cache_path(str(source)), encoding="utf-8") as f:
+        cached = json.load(f)
+    assert cached["digest"] == first.digest
+    assert len(cached["rows"]) == len(first)
+
+    # Lignes du cache reprises telles quelles pour un contenu identique
+    cached["rows"][1][2] = "Depuis le cache"
+    with open(cache_path(str(source)), "w", encoding="utf-8") as f:
+        json.dump(cached, f)
+    assert FilmCatalog.from_file(str(source))[1].description == "Depuis le cache"
+
+    # Contenu modifié : le cache ne correspond plus, la liste est ré-analysée
+    source.write_text(SOURCE + "Film C\t\t\n", encoding="utf-8")
+    second = FilmCatalog.from_file(str(source))
+    assert [film.description for film in second][1:] == ["Film B", "Film A", "Film C"]
+
+
+def test_unreadable_cache_is_ignored(tmp_path):
+    source = tmp_path / "liste.md"
+    source.write_text(SOURCE, encoding="utf-8")
+    with open(cache_path(str(source)), "wb") as f:
+        f.write(b"\x80\x04\x95 ancien cache pickle")
+
+    catalog = FilmCatalog.from_file(str(source))
+
+    assert len(catalog) == 3
+    with open(cache_path(str(source)), encoding="utf-8") as f:
+        assert json.load(f)["digest"] == catalog.digest
+
+
+def test_stale_catalog_and_diff(tmp_path):
+    source = tmp_path / "liste.md"
+    source.write_text(SOURCE, encoding="utf-8")
+    catalog = FilmCatalog.from_file(str(source))
+    assert not catalog.is_stale()
+
+    source.write_text("Film B\tComédie\tSF\nFilm C\t\t\n", encoding="utf-8")
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert catalog.is_stale()
+
+    added, removed = catalog.diff(FilmCatalog.from_file(str(source)))
+    assert added == {content_id("Film C")}
+    assert removed == {content_id("Film A"), content_id("Film A", 1)}
+
+
+@pytest.mark.parametrize(
+    "value, wanted, expected",
+    [
+        ("SF-Épopée", "SF", True),
+        ("SF", "sf ", True),
+        ("SF-Épopée", "sf-épopée", True),
+        ("SFX", "SF", False),
+        ("Polar", "SF", False),
+        ("SF", "SF-Épopée", False),
+        ("Polar", None, True),
+        ("Polar", "", True),
+    ],
+)
+def test_facet_matches(value, wanted, expected):
+    assert facet_matches(value, wanted) is expected
+
+
+def test_facet_films_combine_genre_and_category():
+    catalog = FilmCatalog.from_rows(parse_rows(SOURCE))
+    assert [film.index for film in catalog.facet_films(category="sf")] == [0, 1]
+    assert [film.index for film in catalog.facet_films("Drame", "SF")] == [0]
+    assert catalog.facet_films(genre="Western") == []
+    assert catalog.facet_films() is catalog.films
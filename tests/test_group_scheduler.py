@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from trueskill import Rating, global_env
+
+from film_catalog import FilmCatalog, parse_rows
+from group_scheduler import GROUP_FLOOR, GroupScheduler, gaussian_messages
+from pair_selection import GroupSelector
+from rating_backend import create_ratings
+
+CATALOG = FilmCatalog.from_rows(parse_rows("".join(f"Film {i}\tDrame\tSF\n" for i in range(6))))
+
+
+def separated_ratings(order):
+    """Ratings très sûrs qui classent les films dans l'ordre donné (positions du catalogue)."""
+    ratings = create_ratings("numpy", CATALOG.ids)
+    for rank, index in enumerate(order):
+        ratings[CATALOG.ids[index]] = Rating(mu=40.0 - 5 * rank, sigma=1.0)
+    return ratings
+
+
+def test_gaussian_messages_ignore_uncompared_films():
+    env = global_env()
+    precision, shift = gaussian_messages(np.array([env.mu, 30.0]), np.array([8.33, 2.0]))
+    assert precision[0] == 0.0 and shift[0] == 0.0
+    assert precision[1] == pytest.approx(1 / 4 - 1 / env.sigma**2)
+
+
+def test_pair_weights_exclude_the_user_own_ratings():
+    scheduler = GroupScheduler()
+    scheduler.refresh([("alice", separated_ratings([0, 1])), ("bob", create_ratings("numpy", CATALOG.ids))], CATALOG)
+
+    # Films 0 et 1 tranchés par alice : utiles à bob, plus à alice
+    alice = scheduler.view("alice").pair_weights([0], [1])
+    bob = scheduler.view("bob").pair_weights([0, 2], [1, 3])
+    assert alice[0] == pytest.approx(1 + GROUP_FLOOR)
+    assert bob[0] == pytest.approx(GROUP_FLOOR, abs=0.01)
+    assert bob[1] == pytest.approx(1 + GROUP_FLOOR)
+
+
+def test_csv_rankings_of_absent_users_are_included(tmp_path):
+    with open(tmp_path / "ListeATrier.carol.csv", "w", encoding="utf-8") as f:
+        f.write("Rang;Description;Genre;Catégorie;Score_Mu;Score_Sigma;Score_Conservateur\n")
+        f.write("1;Film 4;Drame;SF;40.00;1.00;37.00\n2;Film 5;Drame;SF;20.00;1.00;17.00\n3;Inconnu;;;25.00;1.00;22.00\n")
+    scheduler = GroupScheduler(directory=str(tmp_path))
+    state = scheduler.refresh([], CATALOG)
+
+    assert state.generation == 1
+    assert scheduler.view("alice").pair_weights([4], [5])[0] == pytest.approx(GROUP_FLOOR, abs=0.01)
+    # Un utilisateur en mémoire remplace son fichier
+    scheduler.refresh([("carol", create_ratings("numpy", CATALOG.ids))], CATALOG)
+    assert scheduler.view("alice").pair_weights([4], [5])[0] == pytest.approx(1 + GROUP_FLOOR)
+
+
+class FixedWeights:
+    def __init__(self, favourite):
+        self.favourite = favourite
+
+    def pair_weights(self, first, second):
+        return np.array([10.0 if {a, b} == self.favourite else 1.0 for a, b in zip(first, second)])
+
+
+def test_group_selector_follows_group_weights():
+    # Sans le groupe, la paire la plus utile est (0, 1) : proches et incertains
+    ratings = {film.id: Rating(mu=10.0 * film.index, sigma=2.0) for film in CATALOG}
+    ratings[CATALOG.ids[0]] = Rating(mu=21.0, sigma=8.0)
+    ratings[CATALOG.ids[1]] = Rating(mu=22.0, sigma=8.0)
+
+    ungrouped = GroupSelector()
+    ungrouped.reset(CATALOG.films, ratings)
+    assert {film.index for film in ungrouped.next_pair()} == {0, 1}
+
+    selector = GroupSelector(group=FixedWeights({0, 2}))
+    selector.reset(CATALOG.films, ratings)
+    assert {film.index for film in selector.next_pair()} == {0, 2}
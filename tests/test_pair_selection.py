@@ -0,0 +1,124 @@
+import pytest
+from trueskill import Rating
+
+from film_catalog import Film
+from pair_selection import (
+    SELECTORS,
+    ActiveSelector,
+    PairQueue,
+    PairSelector,
+    create_selector,
+    expected_variance_drop,
+)
+
+
+def make_films(count):
+    return [Film(100 + i, i, f"Film {i}") for i in range(count)]
+
+
+def test_create_selector_by_name():
+    for name, selector_class in SELECTORS.items():
+        assert type(create_selector(name)) is selector_class
+    assert create_selector("active", window=4).window == 4
+
+
+def test_create_selector_rejects_unknown_name_only():
+    with pytest.raises(ValueError, match="inconnue"):
+        create_selector("inconnue")
+    # Une erreur du constructeur n'est pas confondue avec un nom inconnu
+    with pytest.raises(TypeError):
+        create_selector("active", option_inexistante=1)
+
+
+def test_expected_variance_drop_prefers_uncertain_close_pairs():
+    close = expected_variance_drop(Rating(25, 8), Rating(25.5, 8))
+    far = expected_variance_drop(Rating(10, 8), Rating(40, 8))
+    certain = expected_variance_drop(Rating(25, 1), Rating(25.5, 1))
+    assert close > far
+    assert close > certain
+
+
+@pytest.mark.parametrize("name", ["random", "active", "quality", "topk"])
+def test_pairs_are_two_distinct_films_of_the_list(name):
+    films = make_films(12)
+    ratings = {film.id: Rating() for film in films}
+    selector = create_selector(name)
+    selector.reset(films, ratings)
+    for _ in range(50):
+        film1, film2 = selector.next_pair()
+        assert film1 in films and film2 in films
+        assert film1 is not film2
+        selector.notify(film1, film2)
+
+
+def test_fewer_than_two_films_gives_no_pair():
+    for selector in (PairSelector(), ActiveSelector()):
+        selector.reset(make_films(1), {100: Rating()})
+        assert selector.next_pair() == (None, None)
+
+
+def test_active_selector_picks_most_informative_pair():
+    films = make_films(6)
+    ratings = {film.id: Rating(mu=10.0 * film.index, sigma=1.0) for film in films}
+    # Deux films incertains et proches : la comparaison la plus utile
+    ratings[102] = Rating(mu=21.0, sigma=8.0)
+    ratings[103] = Rating(mu=22.0, sigma=8.0)
+    selector = ActiveSelector(window=5)
+    selector.reset(films, ratings)
+
+    film1, film2 = selector.next_pair()
+
+    assert {film1.id, film2.id} == {102, 103}
+
+
+def test_active_selector_follows_rating_updates():
+    films = make_films(5)
+    ratings = {film.id: Rating(mu=25.0, sigma=1.0) for film in films}
+    selector = ActiveSelector(window=4)
+    selector.reset(films, ratings)
+
+    # Nouvelle incertitude sur deux films : la paire est retrouvée après `notify`
+    ratings[100] = Rating(mu=25.0, sigma=8.0)
+    ratings[104] = Rating(mu=25.0, sigma=8.0)
+    selector.notify(films[0], films[4])
+
+    film1, film2 = selector.next_pair()
+    assert {film1.id, film2.id} == {100, 104}
+    # La paire qui vient d'être jugée n'est pas reproposée tout de suite
+    selector.notify(film1, film2)
+    assert {film.id for film in selector.next_pair()} != {100, 104}
+
+
+def test_pair_queue_prefetches_disjoint_pairs():
+    films = make_films(10)
+    ratings = {film.id: Rating() for film in films}
+    selector = ActiveSelector()
+    selector.reset(films, ratings)
+    queue = PairQueue(selector, size=2)
+
+    film1, film2 = queue.pop()
+    upcoming = queue.peek()
+    assert film1 is not film2
+    assert not {film1.id, film2.id} & {film.id for film in upcoming}
+    assert queue.pop() == upcoming
+
+    # Une paire prévue dont les films changent de rating est oubliée
+    assert len(queue) == 2
+    queue.invalidate(*queue.peek())
+    assert len(queue) == 1
+
+
+@pytest.mark.parametrize("name", ["active", "quality", "topk", "group", "cross"])
+def test_notify_ignores_films_outside_the_list(name):
+    films = make_films(6)
+    ratings = {film.id: Rating() for film in films}
+    outsider = Film(999, 6, "Hors facette")
+    ratings[outsider.id] = Rating(mu=30.0, sigma=5.0)
+    selector = create_selector(name)
+    selector.reset(films, ratings)
+
+    selector.notify(films[0], outsider)
+    selector.notify(outsider, Film(998, 7, "Autre"))
+    for _ in range(10):
+        film1, film2 = selector.next_pair()
+        assert film1 in films and film2 in films
@@ -0,0 +1,329 @@
+import threading
+
+import pytest
+
+
+def start(service, user_name, **options):
+    """Démarre un nouveau classement et retourne la session du navigateur."""
+    sess = {}
+    body, status = service.handle_start(sess, {"user_name": user_name, "resume": False, **options})
+    assert status == 200, body
+    return sess
+
+
+def answer(service, sess, result=1):
+    """Répond à la paire proposée ; retourne (paire, corps, code)."""
+    pair, status = service.handle_get_pair(sess)
+    assert status == 200, pair
+    data = {"film1_id": pair["film1"]["id"], "film2_id": pair["film2"]["id"], "result": result}
+    body, status = service.handle_compare(sess, data)
+    return pair, body, status
+
+
+def ratings(service, user_name):
+    mu, sigma = service.sessions.get(user_name).user_ratings.as_arrays()
+    return list(mu), list(sigma)
+
+
+def test_users_have_isolated_ratings(service):
+    alice, bob = start(service, "iso-alice"), start(service, "iso-bob")
+    before = ratings(service, "iso-bob")
+
+    for _ in range(3):
+        _, body, status = answer(service, alice)
+        assert status == 200, body
+
+    assert body["comparisons_made"] == 3
+    assert ratings(service, "iso-bob") == before
+    assert ratings(service, "iso-alice") != before
+    assert service.sessions.get("iso-bob").comparisons_made == 0
+    assert bob["comparisons_made"] == 0
+
+
+def test_film_catalog_is_shared_read_only(service):
+    start(service, "shared-alice")
+    start(service, "shared-bob")
+    alice, bob = service.sessions.get("shared-alice"), service.sessions.get("shared-bob")
+
+    assert alice.catalog is service.ranking_tool.catalog
+    assert alice.films is bob.films
+    assert alice.user_ratings is not bob.user_ratings
+
+
+def test_restart_reloads_saved_state(service):
+    sess = start(service, "restart-alice")
+    answer(service, sess)
+    saved = ratings(service, "restart-alice")
+
+    # Utilisateur retiré du cache (éviction, autre processus) : l'état enregistré est rechargé
+    service.sessions.pop("restart-alice")
+    service.writer.flush()
+    body, status = service.handle_get_pair(sess)
+
+    assert status == 200, body
+    assert ratings(service, "restart-alice") == pytest.approx(saved)
+    assert service.sessions.get("restart-alice").comparisons_made == 1
+
+
+def test_requests_without_session_are_rejected(service):
+    assert service.handle_get_pair({}) == service.NOT_STARTED
+    assert service.handle_compare({}, {"film1_id": 1, "film2_id": 2, "result": 1}) == service.NOT_STARTED
+
+
+@pytest.mark.parametrize(
+    "options, message",
+    [
+        ({"top_k": "x"}, "Taille de top invalide"),
+        ({"top_k": None}, "Taille de top invalide"),
+        ({"top_k": 0}, "Taille de top invalide"),
+        ({"max_comparisons": "x"}, "Nombre de comparaisons invalide"),
+        ({"max_comparisons": None}, "Nombre de comparaisons invalide"),
+        ({"max_comparisons": -3}, "Nombre de comparaisons invalide"),
+    ],
+)
+def test_start_rejects_invalid_numbers(service, options, message):
+    sess = {}
+    body, status = service.handle_start(sess, {"user_name": "bad-numbers", **options})
+    assert status == 400
+    assert body["status"] == "error"
+    assert message in body["message"]
+    assert "user_name" not in sess
+
+
+def test_start_top_k_strategy(service):
+    sess = {}
+    data = {"user_name": "topk-alice", "resume": False, "strategy": "topk", "top_k": "3", "max_comparisons": "auto"}
+    body, status = service.handle_start(sess, data)
+    assert status == 200, body
+    assert sess["auto_stop"]
+    assert service.sessions.get("topk-alice").top_k == 3
+
+    for _ in range(4):
+        answer(service, sess)
+    body, status = service.handle_finish(sess, {})
+    assert status == 200, body
+    assert body["top_k"] == 3
+    assert body["total"] == 3
+
+
+def test_finish_writes_checkpoint_in_background(service, monkeypatch):
+    sess = start(service, "finish-alice")
+    for _ in range(3):
+        answer(service, sess)
+    tool = service.sessions.get("finish-alice")
+    threads = []
+    checkpoint = tool.log.checkpoint
+    monkeypatch.setattr(
+        tool.log, "checkpoint", lambda *args: threads.append(threading.current_thread().name) or checkpoint(*args)
+    )
+
+    body, status = service.handle_finish(sess, {})
+    assert status == 200, body
+    service.writer.flush()
+
+    assert threads == [service.writer.name]
+    # Le point de contrôle couvre tout le journal : la reprise ne rejoue rien
+    restored = service.create_ratings(tool.backend, tool.catalog.ids)
+    assert tool.log.replay(restored) == 3
+    assert list(restored.as_arrays()[0]) == pytest.approx(list(tool.user_ratings.as_arrays()[0]))
+
+
+def log_lines(tool):
+    tool.log.offset()  # Écritures en tampon vidées
+    with open(tool.log.path, encoding="utf-8") as f:
+        return f.readlines()
+
+
+@pytest.mark.parametrize("result", [4, -1, "1", None])
+def test_compare_rejects_invalid_result(service, result):
+    sess = start(service, "bad-result")
+    tool = service.sessions.get("bad-result")
+    pair, _ = service.handle_get_pair(sess)
+    before, lines = ratings(service, "bad-result"), log_lines(tool)
+
+    data = {"film1_id": pair["film1"]["id"], "film2_id": pair["film2"]["id"], "result": result}
+    body, status = service.handle_compare(sess, data)
+
+    assert status == 400
+    assert "invalide" in body["error"]
+    assert ratings(service, "bad-result") == before
+    assert log_lines(tool) == lines
+    assert tool.comparisons_made == 0
+
+
+def test_compare_rejects_film_against_itself(service):
+    sess = start(service, "same-film")
+    film_id = service.ranking_tool.catalog.ids[0]
+    before = ratings(service, "same-film")
+
+    body, status = service.handle_compare_next(sess, {"film1_id": film_id, "film2_id": film_id, "result": 1})
+
+    assert status == 400
+    assert "next_pair" not in body
+    assert ratings(service, "same-film") == before
+
+
+def test_compare_next_returns_the_announced_pair(service):
+    sess = start(service, "next-alice")
+    pair, _ = service.handle_get_pair(sess)
+    upcoming = pair["upcoming"]
+    data = {"film1_id": pair["film1"]["id"], "film2_id": pair["film2"]["id"], "result": 2}
+
+    body, status = service.handle_compare_next(sess, data)
+
+    assert status == 200, body
+    assert body["comparisons_made"] == 1
+    assert body["next_pair"] == upcoming
+    shown = {body["next_pair"]["film1"]["id"], body["next_pair"]["film2"]["id"]}
+    assert not shown & {body["upcoming"]["film1"]["id"], body["upcoming"]["film2"]["id"]}
+
+
+def test_skipped_pair_is_logged_but_not_counted(service):
+    sess = start(service, "skip-alice")
+    tool = service.sessions.get("skip-alice")
+    lines = len(log_lines(tool))
+
+    _, body, status = answer(service, sess, result=0)
+
+    assert (body, status) == ({"status": "skipped"}, 200)
+    assert tool.comparisons_made == 0
+    assert len(log_lines(tool)) == lines + 1
+
+
+@pytest.mark.parametrize("data", [{}, {"user_name": ""}, {"user_name": "   "}, {"user_name": None}])
+def test_start_requires_a_user_name(service, data):
+    sess = {}
+    body, status = service.handle_start(sess, data)
+    assert (body, status) == ({"status": "error", "message": "Nom d'utilisateur requis"}, 400)
+    assert sess == {}
+
+
+def test_same_name_resumes_the_same_ranking(service):
+    first = start(service, "resume-alice")
+    answer(service, first)
+
+    other = {}
+    body, status = service.handle_start(other, {"user_name": " resume-alice ", "max_comparisons": 10})
+
+    assert status == 200, body
+    assert body["resumed"]
+    assert body["comparisons_made"] == 1
+    assert body["max_comparisons"] == 11
+    assert other["user_name"] == "resume-alice"
+
+
+def test_finish_with_refit(service):
+    sess = start(service, "refit-alice")
+    # Aucun jugement encore : l'a priori est gardé
+    body, status = service.handle_finish(sess, {"refit": "1"})
+    assert status == 200, body
+    assert body["refit"]
+
+    for _ in range(3):
+        answer(service, sess)
+    body, status = service.handle_finish(sess, {"refit": "1"})
+    assert status == 200, body
+    assert body["comparisons_made"] == 3
+
+
+def test_group_strategy_sees_other_users(service):
+    alice = start(service, "group-alice", strategy="group")
+    bob = start(service, "group-bob", strategy="group")
+    for _ in range(3):
+        _, body, status = answer(service, alice)
+        assert status == 200, body
+
+    state = service.group_scheduler.refresh(
+        [(tool.user_name, tool.user_ratings) for tool in service.sessions.values()], service.ranking_tool.catalog
+    )
+    assert "group-alice" in state.messages
+    _, body, status = answer(service, bob)
+    assert status == 200, body
+
+
+def test_snapshots_are_limited_to_the_session_user(service):
+    sess = start(service, "snap-alice")
+    answer(service, sess)
+    body, status = service.handle_finish(sess, {})
+    assert status == 200, body
+    service.writer.flush()
+
+    body, status = service.handle_snapshots(sess, {})
+    assert status == 200, body
+    assert [entry["version"] for entry in body["versions"]] == [1]
+    assert service.handle_snapshots(sess, {"user": "snap-alice"})[1] == 200
+
+    assert service.handle_snapshots(sess, {"user": "../../etc"}) == service.FORBIDDEN
+    assert service.handle_snapshots(sess, {"user": "snap-bob"}) == service.FORBIDDEN
+    assert service.handle_snapshot_diff(sess, {"user": "snap-bob"}) == service.FORBIDDEN
+    assert service.handle_snapshots({}, {"user": "snap-alice"}) == service.NOT_STARTED
+
+    body, status = service.handle_snapshot_diff(sess, {})
+    assert status == 200, body
+    assert body["from"] == body["to"] == 1
+
+
+@pytest.mark.parametrize("user_name", ["../../etc", "a/b", ".."])
+def test_start_rejects_names_unusable_as_file_names(service, user_name):
+    body, status = service.handle_start({}, {"user_name": user_name})
+    assert status == 400
+    assert "invalide" in body["message"]
+
+
+def test_category_session_rejects_films_of_other_categories(service):
+    sess = start(service, "facet-alice", category="SF")
+    catalog = service.ranking_tool.catalog
+    sf = [film for film in catalog if film.category.startswith("SF")]
+    other = next(film for film in catalog if not film.category.startswith("SF"))
+    tool = service.sessions.get("facet-alice")
+    lines = log_lines(tool)
+    before = ratings(service, "facet-alice")
+
+    for film1, film2 in ((sf[0], other), (other, sf[1])):
+        body, status = service.handle_compare_next(sess, {"film1_id": film1.id, "film2_id": film2.id, "result": 1})
+        assert (body, status) == ({"error": "Film hors du genre ou de la catégorie choisis"}, 400)
+    assert ratings(service, "facet-alice") == before
+    assert log_lines(tool) == lines
+    assert tool.comparisons_made == 0
+
+    for _ in range(5):
+        pair, body, status = answer(service, sess)
+        assert status == 200, body
+        assert {pair["film1"]["id"], pair["film2"]["id"]} <= {film.id for film in sf}
+
+
+def test_start_rejects_facet_with_fewer_than_two_films(service):
+    body, status = service.handle_start({}, {"user_name": "facet-bob", "category": "Western"})
+    assert status == 400
+    assert "Moins de deux films" in body["message"]
+
+
+def test_copy_updated_by_another_worker_is_reloaded(service):
+    sess = start(service, "worker-alice")
+    answer(service, sess)
+    tool = service.sessions.get("worker-alice")
+    film_id = tool.catalog.ids[0]
+
+    # Un autre worker enregistre une réponse : la copie en mémoire est périmée
+    service.state_store.update("worker-alice", [(film_id, 40.0, 2.0)], 2, None, tool.version)
+    body, status = service.handle_get_pair(sess)
+
+    assert status == 200, body
+    reloaded = service.sessions.get("worker-alice")
+    assert reloaded is not tool
+    assert reloaded.comparisons_made == 2
+    assert reloaded.user_ratings[film_id].mu == pytest.approx(40.0)
+
+
+def test_stale_copy_is_not_written(service):
+    start(service, "stale-alice")
+    tool = service.sessions.get("stale-alice")
+    film_id = tool.catalog.ids[0]
+    service.state_store.update("stale-alice", [(film_id, 40.0, 2.0)], 1, None, tool.version)
+
+    tool.dirty.add(film_id)
+    tool.unsaved = 1
+    assert not service.flush_state(tool)
+    meta, saved = service.state_store.load("stale-alice")
+    assert meta["comparisons_made"] == 1
+    assert (film_id, 40.0, 2.0) in saved
@@ -0,0 +1,67 @@
+import pytest
+
+from comparison_log import ComparisonLog
+from film_catalog import content_id
+from rating_backend import create_ratings
+from ranking_tool import PairRankingTool, read_judgments
+
+FILMS = ["Film A", "Film B", "Film C", "Film D"]
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "ListeATrier.md").write_text("".join(f"{film}\tDrame\tSF\n" for film in FILMS), encoding="utf-8")
+    return tmp_path
+
+
+def write_judgments(path, rows, delimiter=";"):
+    path.write_text("".join(delimiter.join(row) + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_read_judgments_detects_delimiter(tmp_path):
+    path = write_judgments(tmp_path / "jugements.csv", [["Film A", "Film B", "1"]], delimiter=",")
+    assert list(read_judgments(path)) == [(1, ["Film A", "Film B", "1"])]
+
+
+def test_import_applies_valid_rows_only(workdir):
+    rows = [
+        ["film_a", "film_b", "resultat"],  # En-tête
+        ["Film A", "Film B", "1"],
+        [str(content_id("Film C")), "Film D", "b"],
+        ["Film A", "Film C", "="],
+        ["Film B", "Film D", "passer"],
+        ["Film A", "Film A", "1"],  # Même film
+        ["Film A", "Inconnu", "1"],
+        ["Film B", "Film C", "7"],
+    ]
+    tool = PairRankingTool()
+    tool.run_import(write_judgments(workdir / "jugements.csv", rows), "alice", batch_size=2)
+
+    assert tool.comparisons_made == 3
+    expected = create_ratings("numpy", tool.catalog.ids)
+    ids = {film: content_id(film) for film in FILMS}
+    expected.rate_batch(
+        [(ids["Film A"], ids["Film B"], 1), (ids["Film C"], ids["Film D"], 2), (ids["Film A"], ids["Film C"], 3)]
+    )
+    for film_id in tool.catalog.ids:
+        assert tool.user_ratings[film_id].mu == pytest.approx(expected[film_id].mu)
+
+    assert (workdir / "ListeATrier.alice.csv").exists()
+    # Les réponses passées sont journalisées, seules les autres comptent au rejeu
+    assert ComparisonLog("alice").replay(create_ratings("numpy", tool.catalog.ids)) == 3
+
+
+def test_second_import_adds_to_existing_ranking(workdir):
+    first = write_judgments(workdir / "premier.csv", [["Film A", "Film B", "1"], ["Film C", "Film D", "1"]])
+    second = write_judgments(workdir / "second.csv", [["Film B", "Film C", "2"]])
+    PairRankingTool().run_import(first, "alice")
+
+    tool = PairRankingTool()
+    tool.run_import(second, "alice")
+    assert tool.comparisons_made == 3
+
+    fresh = PairRankingTool()
+    fresh.run_import(second, "alice", fresh=True)
+    assert fresh.comparisons_made == 1
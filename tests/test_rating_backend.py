@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from rating_backend import NumpyRatings, TrueSkillRatings, create_ratings
+
+FILM_IDS = list(range(100, 140))
+
+
+def random_comparisons(count, seed=0):
+    rng = random.Random(seed)
+    comparisons = []
+    for _ in range(count):
+        id1, id2 = rng.sample(FILM_IDS, 2)
+        comparisons.append((id1, id2, rng.choice([0, 1, 2, 3])))
+    return comparisons
+
+
+def assert_same_ratings(numpy_ratings, trueskill_ratings):
+    for film_id in FILM_IDS:
+        assert numpy_ratings[film_id].mu == pytest.approx(trueskill_ratings[film_id].mu, abs=1e-6)
+        assert numpy_ratings[film_id].sigma == pytest.approx(trueskill_ratings[film_id].sigma, abs=1e-6)
+
+
+def test_rate_1vs1_matches_trueskill():
+    numpy_ratings, trueskill_ratings = NumpyRatings(FILM_IDS), TrueSkillRatings(FILM_IDS)
+    for id1, id2, result in random_comparisons(300):
+        new_numpy = numpy_ratings.rate_1vs1(id1, id2, result)
+        new_trueskill = trueskill_ratings.rate_1vs1(id1, id2, result)
+        for a, b in zip(new_numpy, new_trueskill):
+            assert a.mu == pytest.approx(b.mu, abs=1e-6)
+            assert a.sigma == pytest.approx(b.sigma, abs=1e-6)
+    assert_same_ratings(numpy_ratings, trueskill_ratings)
+
+
+def test_rate_batch_matches_sequential_trueskill():
+    comparisons = random_comparisons(500, seed=1)
+    numpy_ratings, trueskill_ratings = NumpyRatings(FILM_IDS), TrueSkillRatings(FILM_IDS)
+
+    applied = numpy_ratings.rate_batch(comparisons)
+
+    assert applied == trueskill_ratings.rate_batch(comparisons)
+    assert applied == sum(1 for _, _, result in comparisons if result)
+    assert_same_ratings(numpy_ratings, trueskill_ratings)
+
+
+def test_reindex_keeps_remaining_films():
+    numpy_ratings, trueskill_ratings = NumpyRatings(FILM_IDS), TrueSkillRatings(FILM_IDS)
+    comparisons = random_comparisons(100, seed=2)
+    numpy_ratings.rate_batch(comparisons)
+    trueskill_ratings.rate_batch(comparisons)
+
+    new_ids = FILM_IDS[10:] + [999]
+    numpy_ratings.reindex(new_ids)
+    trueskill_ratings.reindex(new_ids)
+
+    assert list(numpy_ratings) == new_ids
+    assert sorted(trueskill_ratings) == sorted(new_ids)
+    for film_id in new_ids:
+        assert numpy_ratings[film_id].mu == pytest.approx(trueskill_ratings[film_id].mu, abs=1e-6)
+
+
+def test_create_ratings_rejects_unknown_backend():
+    assert isinstance(create_ratings("numpy", FILM_IDS), NumpyRatings)
+    with pytest.raises(ValueError, match="inconnu"):
+        create_ratings("inconnu", FILM_IDS)
@@ -0,0 +1,62 @@
+import math
+import random
+
+import numpy as np
+import pytest
+from trueskill import Rating, global_env
+
+from refit import fit_bradley_terry, refit_ratings
+
+
+def test_fit_matches_closed_form_for_two_films():
+    # Sans a priori, 3 victoires contre 1 : rapport de forces 3
+    first = np.array([0, 0, 0, 0])
+    second = np.array([1, 1, 1, 1])
+    result = np.array([1, 1, 1, 2])
+    strength, variance = fit_bradley_terry(first, second, result, 2, prior_games=0.0, tolerance=1e-10)
+
+    assert strength[0] - strength[1] == pytest.approx(math.log(3), abs=1e-6)
+    assert strength.sum() == pytest.approx(0.0)
+    assert variance[0] == pytest.approx(1 / (4 * 0.75 * 0.25))
+
+
+def test_no_comparison_keeps_the_prior():
+    ratings = {1: Rating(mu=40, sigma=2), 2: Rating(mu=10, sigma=2)}
+    assert refit_ratings(ratings, []) == 0
+    env = global_env()
+    for rating in ratings.values():
+        assert rating.mu == pytest.approx(env.mu)
+        assert rating.sigma == pytest.approx(env.sigma)
+
+
+def test_refit_orders_films_and_ignores_unusable_answers():
+    ratings = {film_id: Rating() for film_id in (1, 2, 3)}
+    comparisons = [(1, 2, 1), (2, 3, 1), (1, 3, 1)] * 5 + [(1, 2, 0), (1, 99, 2)]
+
+    assert refit_ratings(ratings, comparisons) == 15
+    assert ratings[1].mu > ratings[2].mu > ratings[3].mu
+    # Film toujours gagnant : score fini, incertitude réduite
+    assert math.isfinite(ratings[1].mu)
+    assert ratings[1].sigma < global_env().sigma
+
+
+def test_refit_does_not_depend_on_answer_order():
+    rng = random.Random(3)
+    comparisons = [(*rng.sample(range(10), 2), rng.choice((1, 2, 3))) for _ in range(200)]
+    shuffled = comparisons[:]
+    rng.shuffle(shuffled)
+
+    ratings1 = {film_id: Rating() for film_id in range(10)}
+    ratings2 = {film_id: Rating() for film_id in range(10)}
+    refit_ratings(ratings1, comparisons)
+    refit_ratings(ratings2, shuffled)
+
+    for film_id in range(10):
+        assert ratings1[film_id].mu == pytest.approx(ratings2[film_id].mu, abs=1e-3)
+        assert ratings1[film_id].sigma == pytest.approx(ratings2[film_id].sigma, abs=1e-3)
+
+
+def test_ties_count_as_half_wins():
+    ratings = {1: Rating(), 2: Rating()}
+    refit_ratings(ratings, [(1, 2, 3)] * 10)
+    assert ratings[1].mu == pytest.approx(ratings[2].mu)
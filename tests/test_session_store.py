@@ -0,0 +1,59 @@
+from session_store import SessionStore
+
+
+class Value:
+    def __init__(self, size=10):
+        self.size = size
+
+    def memory_size(self):
+        return self.size
+
+
+def test_least_recently_used_session_is_evicted():
+    evicted = []
+    store = SessionStore(max_sessions=2, on_evict=lambda sid, value: evicted.append(sid))
+    store.put("alice", Value())
+    store.put("bob", Value())
+    store.get("alice")  # bob devient le moins récemment utilisé
+    store.put("carol", Value())
+
+    assert evicted == ["bob"]
+    assert store.get("bob") is None
+    assert len(store) == 2
+
+
+def test_expired_session_is_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("session_store.time.monotonic", lambda: now[0])
+    evicted = []
+    store = SessionStore(ttl=60, on_evict=lambda sid, value: evicted.append(sid))
+    store.put("alice", Value())
+
+    now[0] += 61
+    assert store.get("alice") is None
+    assert evicted == ["alice"]
+
+
+def test_memory_cap_evicts_oldest_but_keeps_new_session():
+    store = SessionStore(max_bytes=25)
+    store.put("alice", Value(10))
+    store.put("bob", Value(10))
+    store.put("carol", Value(10))
+    assert store.get("alice") is None
+    assert store.memory_used == 20
+
+    # Une session plus grosse que le plafond reste (c'est la session courante)
+    store.put("dave", Value(100))
+    assert store.get("dave") is not None
+    assert store.stats() == {"sessions": 1, "memory_bytes": 100}
+
+
+def test_size_is_updated_on_access():
+    value = Value(10)
+    store = SessionStore()
+    store.put("alice", value)
+    value.size = 30
+    store.get("alice")
+    assert store.memory_used == 30
+    assert store.pop("alice") is value
+    assert store.memory_used == 0
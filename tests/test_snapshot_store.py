@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from snapshot_store import SnapshotStore, read_snapshot
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    return SnapshotStore(str(tmp_path / "classements"))
+
+
+def test_save_and_load_round_trip(snapshots):
+    ids = [30, 10, 20]
+    mu = [31.5, 27.25, 20.0]
+    sigma = [1.5, 2.0, 3.25]
+
+    saved = snapshots.save("alice", ids, mu, sigma, comparisons=12, meta={"header": ["# Classement"]})
+    loaded = snapshots.load("alice")
+
+    assert saved.version == loaded.version == 1
+    assert loaded.ids.tolist() == ids
+    np.testing.assert_allclose(loaded.mu, mu)
+    np.testing.assert_allclose(loaded.sigma, sigma)
+    assert loaded.comparisons == 12
+    assert loaded.header == ["# Classement"]
+    assert loaded.summary()["films"] == 3
+    assert read_snapshot(loaded.path, loaded.version).ids.tolist() == ids
+
+
+def test_versions_increase_and_empty_snapshot_loads(snapshots):
+    snapshots.save("alice", [1, 2], [26.0, 24.0], [1.0, 1.0])
+    snapshots.save("alice", [], [], [])
+
+    assert snapshots.versions("alice") == [1, 2]
+    assert snapshots.latest("alice") == 2
+    assert len(snapshots.load("alice")) == 0
+    assert len(snapshots.load("alice", 1)) == 2
+    assert [entry["version"] for entry in snapshots.history("alice")] == [1, 2]
+    with pytest.raises(FileNotFoundError):
+        snapshots.load("bob")
+
+
+def test_read_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "autre.rank"
+    path.write_bytes(b"pas un instantane, mais assez long pour un en-tete")
+    with pytest.raises(ValueError):
+        read_snapshot(str(path))
+
+
+def test_diff_reports_moves_added_and_removed(snapshots):
+    snapshots.save("alice", [1, 2, 3, 4], [30.0, 28.0, 26.0, 24.0], [1.0] * 4)
+    snapshots.save("alice", [3, 1, 5, 2], [31.0, 29.0, 27.0, 25.0], [1.0] * 4)
+
+    diff = snapshots.diff("alice")
+
+    assert diff.old.version == 1 and diff.new.version == 2
+    assert diff.ids.tolist() == [3, 1, 2]  # Films communs, dans l'ordre du nouveau classement
+    assert diff.old_rank.tolist() == [3, 1, 2]
+    assert diff.new_rank.tolist() == [1, 2, 4]
+    assert diff.shift.tolist() == [2, -1, -2]
+    np.testing.assert_allclose(diff.mu_change, [5.0, -1.0, -3.0])
+    assert diff.added.tolist() == [5]
+    assert diff.removed.tolist() == [4]
+
+    moves = diff.moves(min_shift=2)
+    assert [move["id"] for move in moves] == [3, 2]
+    assert moves[0] == {"id": 3, "old_rank": 3, "new_rank": 1, "shift": 2, "mu_change": 5.0}
+    assert len(diff.moves(limit=1)) == 1
+
+
+def test_diff_of_single_version_is_empty(snapshots):
+    snapshots.save("alice", [1, 2], [26.0, 24.0], [1.0, 1.0])
+    diff = snapshots.diff("alice")
+    assert diff.moves() == []
+    assert diff.added.size == 0 and diff.removed.size == 0
+
+
+@pytest.mark.parametrize("user_name", ["", ".", "..", "../../etc", "a/b", "a\\b", "nul\0"])
+def test_user_name_must_name_a_single_directory(snapshots, user_name):
+    with pytest.raises(ValueError, match="invalide"):
+        snapshots.versions(user_name)
+    with pytest.raises(ValueError, match="invalide"):
+        snapshots.save(user_name, [1], [25.0], [8.0])
+
+
+def test_dotted_user_names_stay_inside_the_store(snapshots, tmp_path):
+    snapshots.save("jean.dupont", [1], [25.0], [8.0])
+    assert snapshots.versions("jean.dupont") == [1]
+    assert (tmp_path / "classements" / "jean.dupont").is_dir()
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from sorted_index import SortedIndex
+
+
+@pytest.mark.parametrize("load", [2, 3, 16])
+def test_matches_sorted_list_under_random_updates(load):
+    rng = random.Random(load)
+    index = SortedIndex(load)
+    reference = {}
+    for step in range(3000):
+        item = rng.randrange(300)
+        if rng.random() < 0.6:
+            key = rng.choice([rng.random(), 0.5])  # Clés égales départagées par l'élément
+            index.add(key, item)
+            reference[item] = key
+        else:
+            index.discard(item)
+            reference.pop(item, None)
+
+        if step % 25:
+            continue
+        expected = sorted((key, item) for item, key in reference.items())
+        assert list(index) == expected
+        assert len(index) == len(expected)
+        if not expected:
+            continue
+        pos = rng.randrange(len(expected))
+        assert index[pos] == expected[pos]
+        assert index[-1] == expected[-1]
+        assert index.position(expected[pos][1]) == pos
+        start = rng.randrange(-2, len(expected) + 2)
+        stop = start + rng.randrange(40)
+        assert index.slice(start, stop) == expected[max(0, start) : max(0, min(stop, len(expected)))]
+        key = rng.random()
+        assert index.count_below(key) == sum(1 for other, _ in expected if other < key)
+
+
+def test_bulk_update_then_positions():
+    index = SortedIndex(4)
+    index.update((float(-i), i) for i in range(50))
+
+    assert index[0] == (-49.0, 49)
+    assert index.position(0) == 49
+    assert index.neighbors(25, 2) == [27, 26, 24, 23]
+    with pytest.raises(IndexError):
+        index[50]
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from state_store import LockTimeout, StateStore, UserLocks
+
+RATINGS = [(1, 25.0, 8.333), (2, 25.0, 8.333), (3, 25.0, 8.333)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StateStore(str(tmp_path / "state.db"))
+
+
+def test_update_with_current_version_writes_changes(store):
+    version = store.create("alice", "active", None, RATINGS)
+
+    new_version = store.update("alice", [(2, 27.5, 7.0)], 1, log_offset=42, expected_version=version)
+
+    assert new_version == version + 1
+    meta, ratings = store.load("alice")
+    assert meta["version"] == new_version
+    assert meta["comparisons_made"] == 1
+    assert meta["log_offset"] == 42
+    assert (2, 27.5, 7.0) in ratings
+
+
+def test_update_with_stale_version_writes_nothing(store):
+    version = store.create("alice", "active", None, RATINGS)
+    assert store.update("alice", [(1, 30.0, 6.0)], 1, expected_version=version) == version + 1
+
+    # Copie restée sur l'ancienne version : compare-and-swap refusé
+    assert store.update("alice", [(1, 10.0, 5.0)], 5, expected_version=version) is None
+
+    meta, ratings = store.load("alice")
+    assert meta["version"] == version + 1
+    assert meta["comparisons_made"] == 1
+    assert (1, 30.0, 6.0) in ratings
+
+
+def test_update_unknown_user_returns_none(store):
+    assert store.update("inconnu", [(1, 30.0, 6.0)], 1) is None
+
+
+def test_recreate_keeps_increasing_version(store):
+    first = store.create("alice", "active", None, RATINGS)
+    second = store.create("alice", "topk", 10, RATINGS)
+    assert second > first
+    assert store.update("alice", [], 0, expected_version=first) is None
+
+
+def test_lease_excludes_other_owner_until_released(store):
+    assert store.acquire("alice", "a", ttl=30)
+    assert not store.acquire("alice", "b", ttl=30)
+    assert store.acquire("alice", "a", ttl=30)  # Même propriétaire : prolongé
+    assert store.renew("alice", "a", ttl=30)
+    assert not store.renew("alice", "b", ttl=30)
+
+    store.release("alice", "b")  # Sans effet : pas son bail
+    assert not store.acquire("alice", "b", ttl=30)
+    store.release("alice", "a")
+    assert not store.renew("alice", "a", ttl=30)  # Un bail rendu n'est pas recréé
+    assert store.acquire("alice", "b", ttl=30)
+
+
+def test_expired_lease_is_taken_over(store):
+    assert store.acquire("alice", "a", ttl=-1)
+    assert store.acquire("alice", "b", ttl=30)
+    assert not store.renew("alice", "a", ttl=30)
+
+
+def test_user_locks_time_out_across_processes(store):
+    first, second = UserLocks(store, timeout=0.05), UserLocks(store, timeout=0.05)
+    with first.hold("alice"):
+        with pytest.raises(LockTimeout):
+            with second.hold("alice"):
+                pass
+        with second.hold("bob"):
+            pass
+    with second.hold("alice"):
+        pass
+
+
+def test_user_locks_are_reentrant_in_the_holding_thread(store):
+    locks = UserLocks(store, timeout=0.05)
+    with locks.hold("alice"):
+        with locks.hold("alice"):
+            pass
+        # Un autre thread attend toujours
+        errors = []
+
+        def other():
+            try:
+                with locks.hold("alice"):
+                    pass
+            except LockTimeout as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join()
+        assert len(errors) == 1
+    assert store.acquire("alice", "autre", ttl=30)  # Bail rendu à la sortie
+
+
+def test_user_locks_renew_lease_while_held(store):
+    locks, other = UserLocks(store, ttl=0.3, timeout=0.05), UserLocks(store, ttl=0.3, timeout=0.05)
+    with locks.hold("alice"):
+        time.sleep(0.8)  # Plus long que le bail : prolongé en arrière-plan
+        with pytest.raises(LockTimeout):
+            with other.hold("alice"):
+                pass
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+from trueskill import Rating
+
+from film_catalog import Film
+from top_k import TopKTracker
+
+
+def make_films(count):
+    return [Film(100 + i, i, f"Film {i}") for i in range(count)]
+
+
+def expected_top(ratings, k):
+    return [film_id for film_id, _ in sorted(ratings.items(), key=lambda item: -item[1].mu)[:k]]
+
+
+def test_rejects_empty_top():
+    with pytest.raises(ValueError, match="invalide"):
+        TopKTracker(0)
+
+
+def test_members_follow_rating_updates():
+    rng = random.Random(1)
+    films = make_films(40)
+    ratings = {film.id: Rating(mu=rng.gauss(25, 5), sigma=5.0) for film in films}
+    tracker = TopKTracker(5)
+    tracker.reset(films, ratings)
+    assert tracker.members() == expected_top(ratings, 5)
+
+    for _ in range(500):
+        film1, film2 = rng.sample(films, 2)
+        ratings[film1.id] = Rating(mu=rng.gauss(25, 5), sigma=5.0)
+        ratings[film2.id] = Rating(mu=rng.gauss(25, 5), sigma=5.0)
+        tracker.notify(film1, film2)
+        assert tracker.members() == expected_top(ratings, 5)
+
+    inside = tracker.last_inside()
+    outside = tracker.first_outside()
+    assert ratings[inside].mu >= ratings[outside].mu
+    assert tracker.boundary == pytest.approx((ratings[inside].mu + ratings[outside].mu) / 2)
+    assert sum(film.id in tracker for film in films) == 5
+
+
+def test_confidence_and_straddle_probability():
+    films = make_films(4)
+    ratings = {film.id: Rating(mu=100.0 - 30 * film.index, sigma=1.0) for film in films}
+    tracker = TopKTracker(2)
+    tracker.reset(films, ratings)
+
+    assert tracker.confidence() == pytest.approx(1.0)
+    assert tracker.straddle_probability(Rating(mu=tracker.boundary, sigma=5.0)) == pytest.approx(0.5)
+    assert tracker.straddle_probability(ratings[100]) < 1e-6
+
+
+def test_top_larger_than_list():
+    films = make_films(3)
+    tracker = TopKTracker(10)
+    tracker.reset(films, {film.id: Rating(mu=film.index) for film in films})
+    assert len(tracker) == 3
+    assert tracker.members() == [102, 101, 100]
+    assert tracker.confidence() == 1.0
+
+
+def test_notify_ignores_films_outside_the_list():
+    films = make_films(4)
+    ratings = {film.id: Rating(mu=float(film.index)) for film in films}
+    tracker = TopKTracker(2)
+    tracker.reset(films, ratings)
+
+    ratings[999] = Rating(mu=100.0)
+    tracker.notify(films[0], Film(999, 4, "Hors facette"))
+    assert tracker.members() == [103, 102]
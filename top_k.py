@@ -0,0 +1,139 @@
+"""
+Suivi des K meilleurs films (classement partiel).
+
+Deux tas se partagent les films : un tas-min des K meilleurs (sa racine est le K-ième film)
+et un tas-max des autres (sa racine est le meilleur film hors du top). Après chaque comparaison,
+seuls les deux films touchés sont repoussés puis les racines échangées tant qu'elles sont mal
+ordonnées : O(log n) par mise à jour, sans retri de la liste. Les entrées périmées sont
+invalidées par un numéro de version par film et purgées paresseusement.
+"""
+
+import heapq
+import math
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from trueskill import Rating, global_env
+
+from film_catalog import Film
+
+DEFAULT_TOP_K = 10
+
+
+class TopKTracker:
+    """Ensemble des K films de mu le plus élevé, tenu à jour comparaison après comparaison."""
+
+    def __init__(self, k: int = DEFAULT_TOP_K):
+        if k < 1:
+            raise ValueError(f"Taille de top-K invalide: {k}")
+        self.k = k
+        self.ratings: Mapping[int, Rating] = {}
+        self.boundary = 0.0  # Milieu entre le K-ième film et le premier film hors du top
+        self._top: List[Tuple[float, int, int]] = []  # Tas-min (mu, version, id)
+        self._rest: List[Tuple[float, int, int]] = []  # Tas-max (-mu, version, id)
+        self._in_top: Dict[int, bool] = {}
+        self._version: Dict[int, int] = {}
+
+    def reset(self, films: List[Film], ratings: Mapping[int, Rating]) -> None:
+        """(Ré)initialise le suivi sur une liste de films et leurs ratings."""
+        self.ratings = ratings
+        self._version = {film.id: 0 for film in films}
+        best = heapq.nlargest(self.k, ((ratings[film.id].mu, film.id) for film in films))
+        top_ids = {film_id for _, film_id in best}
+
+        self._in_top = {film.id: film.id in top_ids for film in films}
+        self._top = [(mu, 0, film_id) for mu, film_id in best]
+        self._rest = [(-ratings[film.id].mu, 0, film.id) for film in films if film.id not in top_ids]
+        heapq.heapify(self._top)
+        heapq.heapify(self._rest)
+        self._update_boundary()
+
+    def __len__(self) -> int:
+        return min(self.k, len(self._in_top))
+
+    def __contains__(self, film_id: int) -> bool:
+        return self._in_top.get(film_id, False)
+
+    def memory_size(self) -> int:
+        """Estimation de la mémoire occupée par les deux tas et les index par film."""
+        return 100 * (len(self._top) + len(self._rest)) + 200 * len(self._version)
+
+    def _clean(self, heap: List[Tuple[float, int, int]]) -> None:
+        """Retire les entrées périmées à la racine d'un tas."""
+        while heap and heap[0][1] != self._version[heap[0][2]]:
+            heapq.heappop(heap)
+
+    def _push(self, film_id: int) -> None:
+        mu = self.ratings[film_id].mu
+        if self._in_top[film_id]:
+            heapq.heappush(self._top, (mu, self._version[film_id], film_id))
+        else:
+            heapq.heappush(self._rest, (-mu, self._version[film_id], film_id))
+
+    def _update_boundary(self) -> None:
+        self._clean(self._top)
+        self._clean(self._rest)
+        if self._top and self._rest:
+            self.boundary = (self._top[0][0] - self._rest[0][0]) / 2
+        elif self._top:
+            self.boundary = self._top[0][0]
+
+    def last_inside(self) -> Optional[int]:
+        """Identifiant du K-ième film (le moins bon du top)."""
+        return self._top[0][2] if self._top else None
+
+    def first_outside(self) -> Optional[int]:
+        """Identifiant du meilleur film hors du top."""
+        return self._rest[0][2] if self._rest else None
+
+    def notify(self, film1: Film, film2: Film) -> None:
+        """Repositionne les deux films qui viennent d'être comparés."""
+        for film_id in (film1.id, film2.id):
+            if film_id not in self._version:
+                continue  # Film absent de la liste suivie
+            self._version[film_id] += 1
+            self._push(film_id)
+
+        # Échanger les racines tant que le K-ième film est moins bon que le premier exclu
+        while True:
+            self._clean(self._top)
+            self._clean(self._rest)
+            if not self._top or not self._rest or self._top[0][0] >= -self._rest[0][0]:
+                break
+            _, _, demoted = heapq.heappop(self._top)
+            _, _, promoted = heapq.heappop(self._rest)
+            for film_id, in_top in ((demoted, False), (promoted, True)):
+                self._in_top[film_id] = in_top
+                self._version[film_id] += 1
+                self._push(film_id)
+
+        # Compacter les tas quand les entrées périmées dominent
+        if len(self._top) + len(self._rest) > 4 * len(self._version) + 64:
+            self._top = [entry for entry in self._top if entry[1] == self._version[entry[2]]]
+            self._rest = [entry for entry in self._rest if entry[1] == self._version[entry[2]]]
+            heapq.heapify(self._top)
+            heapq.heapify(self._rest)
+
+        self._update_boundary()
+
+    def members(self) -> List[int]:
+        """Identifiants du top-K, du meilleur au K-ième (seuls les K films sont triés)."""
+        current = [entry for entry in self._top if entry[1] == self._version[entry[2]]]
+        return [film_id for _, _, film_id in sorted(current, key=lambda entry: -entry[0])]
+
+    def straddle_probability(self, rating: Rating) -> float:
+        """Probabilité qu'un film soit en réalité de l'autre côté de la frontière du top-K."""
+        return global_env().cdf(-abs(rating.mu - self.boundary) / rating.sigma)
+
+    def confidence(self) -> float:
+        """Probabilité moyenne que chaque film du top batte le meilleur film exclu."""
+        outside = self.first_outside()
+        if outside is None:
+            return 1.0
+        rating_out = self.ratings[outside]
+        members = self.members()
+        total = 0.0
+        for film_id in members:
+            rating = self.ratings[film_id]
+            spread = math.sqrt(rating.sigma**2 + rating_out.sigma**2)
+            total += global_env().cdf((rating.mu - rating_out.mu) / spread)
+        return total / len(members) if members else 0.0
@@ -0,0 +1,303 @@
+"""
+Planificateur de séances : dans quel ordre regarder les films avec les personnes présentes.
+
+L'ordre d'un ensemble de spectateurs est le classement de groupe restreint à ces utilisateurs :
+l'a priori TrueSkill multiplié par l'information (λ, η) de chacun (voir `group_scheduler`), soit un
+mu de groupe par film. Les films non vus sont tenus dans un `SortedIndex` par ensemble de
+spectateurs : « les N prochains films » est une lecture du début de l'index, sans tri.
+
+L'index est construit à la première demande pour un ensemble puis tenu à jour : une réponse d'un
+spectateur (`notify`) ne déplace que les deux films comparés, marquer un film comme vu le retire.
+Les derniers ensembles demandés restent en mémoire (`MAX_GROUPS`). Chaque ensemble a son verrou :
+le verrou du planificateur ne couvre que les tables d'utilisateurs et d'ensembles, les réponses de
+plusieurs utilisateurs déplacent leurs films en parallèle.
+
+Les utilisateurs en mémoire (interface web) apportent leurs ratings à jour ; les autres, leur
+fichier `ListeATrier.<utilisateur>.csv`, relu quand il change. Les films vus sont enregistrés par
+identifiant dans `films_vus.json`, partagé avec la commande `pair_ranking.py watch` et relu s'il a
+été modifié par un autre processus.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+from trueskill import Rating, global_env
+
+from aggregation import UserRanking, load_user_rankings
+from film_catalog import Film, FilmCatalog
+from group_scheduler import Messages, catalog_columns, gaussian_messages
+from metrics import timed
+from sorted_index import SortedIndex
+
+WATCHED_FILE = "films_vus.json"
+MAX_GROUPS = 32
+DEFAULT_COUNT = 5
+
+
+def read_watched(path: str) -> Dict[int, str]:
+    """Films vus enregistrés : {identifiant: date}."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Films vus illisibles ({path}): {e}")
+        return {}
+    return {int(entry["id"]): entry.get("watched_at", "") for entry in data.get("watched", [])}
+
+
+class GroupOrder:
+    """Ordre des films non vus pour un ensemble de spectateurs (mu de groupe décroissant)."""
+
+    __slots__ = ("users", "precision", "shift", "index", "lock")
+
+    def __init__(self, users: FrozenSet[str], precision: np.ndarray, shift: np.ndarray):
+        self.users = users
+        self.precision = precision  # 1/σ₀² + Σ λ des spectateurs
+        self.shift = shift  # μ₀/σ₀² + Σ η des spectateurs
+        self.index = SortedIndex()  # (-mu de groupe, position dans le catalogue)
+        self.lock = threading.Lock()  # Pris après celui du planificateur, jamais l'inverse
+
+    def key(self, position: int) -> float:
+        return -self.shift[position] / self.precision[position]
+
+    def fill(self, catalog: FilmCatalog, watched: Mapping[int, str]) -> None:
+        mu = self.shift / self.precision
+        self.index.update((-m, film.index) for film, m in zip(catalog, mu.tolist()) if film.id not in watched)
+
+    def move(self, positions: np.ndarray, precision: np.ndarray, shift: np.ndarray, films: Sequence[Film]) -> None:
+        """Ajoute l'écart d'information des films donnés et les replace dans l'index s'ils n'ont pas été vus."""
+        with self.lock:
+            self.precision[positions] += precision
+            self.shift[positions] += shift
+            for film in films:
+                if film.index in self.index:
+                    self.index.add(self.key(film.index), film.index)
+
+
+class WatchPlanner:
+    """Ordre de visionnage en direct des ensembles de spectateurs et liste des films vus."""
+
+    def __init__(
+        self,
+        catalog: FilmCatalog,
+        directory: str = ".",
+        watched_file: str = WATCHED_FILE,
+        max_groups: int = MAX_GROUPS,
+    ):
+        self.catalog = catalog
+        self.directory = directory
+        self.path = os.path.join(directory, watched_file)
+        self.max_groups = max_groups
+        self.watched: Dict[int, str] = {}
+        self._watched_mtime: Optional[int] = None
+        self._messages: Dict[str, Messages] = {}
+        self._live: Dict[str, bool] = {}  # True : ratings en mémoire, False : fichier CSV
+        self._seen: Dict[str, UserRanking] = {}  # Dernier CSV lu par utilisateur
+        self._groups: "OrderedDict[FrozenSet[str], GroupOrder]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._reload_watched()
+
+    def use_catalog(self, catalog: FilmCatalog) -> None:
+        """Passe à une nouvelle version du catalogue (les utilisateurs en mémoire sont rechargés à leur prochaine réponse)."""
+        with self._lock:
+            if catalog is self.catalog:
+                return
+            self.catalog = catalog
+            self._messages.clear()
+            self._live.clear()
+            self._seen.clear()
+            self._groups.clear()
+
+    def _set_messages(self, user_name: str, messages: Optional[Messages], live: bool) -> None:
+        """Remplace toute l'information d'un utilisateur ; ses ensembles seront reconstruits à la demande."""
+        if messages is None:
+            self._messages.pop(user_name, None)
+            self._live.pop(user_name, None)
+        else:
+            self._messages[user_name] = messages
+            self._live[user_name] = live
+        for users in [users for users in self._groups if user_name in users]:
+            del self._groups[users]
+
+    def load_user(self, user_name: str, catalog: FilmCatalog, ratings) -> None:
+        """Prend tous les ratings en mémoire d'un utilisateur (nouveau classement, reprise, réajustement)."""
+        with self._lock:
+            if catalog is not self.catalog:
+                return
+            mu, sigma = ratings.as_arrays()
+            self._set_messages(user_name, gaussian_messages(np.array(mu), np.array(sigma)), live=True)
+
+    def notify(self, user_name: str, catalog: FilmCatalog, ratings: Mapping[int, Rating], films: Sequence[Film]) -> None:
+        """Répercute une réponse : seuls les films comparés bougent dans les ensembles de l'utilisateur."""
+        films = list({film.index: film for film in films}.values())
+        positions = np.fromiter((film.index for film in films), dtype=np.int64, count=len(films))
+        precision, shift = gaussian_messages(
+            np.array([ratings[film.id].mu for film in films]),
+            np.array([ratings[film.id].sigma for film in films]),
+        )
+        with self._lock:
+            if catalog is not self.catalog:
+                return
+            if not self._live.get(user_name):
+                self.load_user(user_name, catalog, ratings)
+                return
+            old_precision, old_shift = self._messages[user_name]
+            delta_precision = precision - old_precision[positions]
+            delta_shift = shift - old_shift[positions]
+            old_precision[positions] = precision
+            old_shift[positions] = shift
+            # Ensembles existants à cet instant ; ceux créés ensuite partent des messages déjà à jour
+            groups = [group for users, group in self._groups.items() if user_name in users]
+        # Les écarts s'additionnent : l'ordre entre les réponses de différents utilisateurs est indifférent
+        for group in groups:
+            group.move(positions, delta_precision, delta_shift, films)
+
+    def _refresh_rankings(self) -> None:
+        """Relit les classements CSV modifiés ; un CSV plus récent remplace les ratings en mémoire."""
+        rankings = load_user_rankings(self.directory)
+        for ranking in rankings:
+            previous = self._seen.get(ranking.user_name)
+            if previous is ranking:
+                continue
+            self._seen[ranking.user_name] = ranking
+            if previous is None and self._live.get(ranking.user_name):
+                continue  # Ratings en mémoire déjà plus récents que le fichier
+            columns = catalog_columns(ranking.descriptions, self.catalog)
+            known = columns >= 0
+            user_precision, user_shift = gaussian_messages(ranking.mu, ranking.sigma)
+            precision, shift = np.zeros(len(self.catalog)), np.zeros(len(self.catalog))
+            precision[columns[known]] = user_precision[known]
+            shift[columns[known]] = user_shift[known]
+            self._set_messages(ranking.user_name, (precision, shift), live=False)
+
+        # Fichiers supprimés : l'utilisateur disparaît s'il n'est pas en mémoire
+        present = {ranking.user_name for ranking in rankings}
+        for user_name in [user_name for user_name in self._seen if user_name not in present]:
+            del self._seen[user_name]
+            if not self._live.get(user_name):
+                self._set_messages(user_name, None, live=False)
+
+    def _reload_watched(self) -> None:
+        """Relit les films vus si le fichier a été modifié par un autre processus."""
+        try:
+            mtime: Optional[int] = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._watched_mtime:
+            return
+        watched = read_watched(self.path)
+        for film_id in set(self.watched) ^ set(watched):
+            self._apply_watched(film_id, film_id in watched)
+        self.watched = watched
+        self._watched_mtime = mtime
+
+    def _apply_watched(self, film_id: int, watched: bool) -> None:
+        film = self.catalog.get(film_id)
+        if film is None:
+            return
+        for group in self._groups.values():
+            with group.lock:
+                if watched:
+                    group.index.discard(film.index)
+                else:
+                    group.index.add(group.key(film.index), film.index)
+
+    def _save_watched(self) -> None:
+        entries = []
+        for film_id, date in self.watched.items():
+            film = self.catalog.get(film_id)
+            entries.append({"id": film_id, "description": film.description if film else "", "watched_at": date})
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"watched": entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+        self._watched_mtime = os.stat(self.path).st_mtime_ns
+
+    def users(self) -> List[str]:
+        """Utilisateurs dont le classement est connu (en mémoire ou CSV)."""
+        with self._lock:
+            self._refresh_rankings()
+            return sorted(self._messages)
+
+    def _group(self, users: FrozenSet[str]) -> GroupOrder:
+        group = self._groups.get(users)
+        if group is not None:
+            self._groups.move_to_end(users)
+            return group
+
+        env = global_env()
+        prior = 1.0 / env.sigma**2
+        precision = np.full(len(self.catalog), prior)
+        shift = np.full(len(self.catalog), env.mu * prior)
+        for user_name in users:
+            precision += self._messages[user_name][0]
+            shift += self._messages[user_name][1]
+        group = GroupOrder(users, precision, shift)
+        group.fill(self.catalog, self.watched)
+
+        self._groups[users] = group
+        while len(self._groups) > self.max_groups:
+            self._groups.popitem(last=False)
+        return group
+
+    @timed("watch_next")
+    def next_films(self, attendees: Optional[Iterable[str]] = None, count: int = DEFAULT_COUNT) -> List[Dict]:
+        """Les `count` prochains films non vus pour ces spectateurs (tous les utilisateurs par défaut)."""
+        with self._lock:
+            self._refresh_rankings()
+            self._reload_watched()
+            users = frozenset(attendees or self._messages)
+            unknown = sorted(users - set(self._messages))
+            if unknown:
+                raise ValueError(f"Utilisateurs sans classement: {', '.join(unknown)}")
+            if not users:
+                raise ValueError("Aucun classement disponible")
+
+            group = self._group(users)
+            catalog = self.catalog
+            precisions = [self._messages[user_name][0] for user_name in users]
+
+        results = []
+        with group.lock:
+            for rank, (key, position) in enumerate(group.index.slice(0, count), 1):
+                film = catalog[position]
+                results.append(
+                    {
+                        "rank": rank,
+                        **film.to_dict(),
+                        "score_mu": round(-key, 2),
+                        "score_sigma": round(1.0 / math.sqrt(group.precision[position]), 2),
+                        "rated_by": sum(1 for precision in precisions if precision[position] > 0),
+                    }
+                )
+        return results
+
+    def mark_watched(self, film: Film, watched: bool = True) -> bool:
+        """Marque (ou démarque) un film comme vu ; retourne False s'il était déjà dans cet état."""
+        with self._lock:
+            self._reload_watched()
+            if (film.id in self.watched) == watched:
+                return False
+            if watched:
+                self.watched[film.id] = datetime.now().isoformat(timespec="seconds")
+            else:
+                del self.watched[film.id]
+            self._apply_watched(film.id, watched)
+            self._save_watched()
+            return True
+
+    def watched_films(self) -> List[Dict]:
+        """Films vus, du plus ancien au plus récent."""
+        with self._lock:
+            self._reload_watched()
+            films = [(date, self.catalog.get(film_id)) for film_id, date in self.watched.items()]
+            films.sort(key=lambda entry: entry[0])
+            return [{**film.to_dict(), "watched_at": date} for date, film in films if film is not None]